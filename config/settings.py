@@ -7,6 +7,104 @@ load_dotenv()
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 AIRTABLE_TABLE_NAME = os.getenv("AIRTABLE_TABLE_NAME")
+AIRTABLE_ENDPOINT_URL = os.getenv("AIRTABLE_ENDPOINT_URL", "https://api.airtable.com")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")  # e.g. a local fake for testing; None uses the real API
 
+
+# Evaluation engine limits
+EVAL_MAX_CONCURRENCY = int(os.getenv("EVAL_MAX_CONCURRENCY", "8"))
+EVAL_TOKENS_PER_MINUTE = int(os.getenv("EVAL_TOKENS_PER_MINUTE", "80000"))  # 0 disables the budget
+
+# Airtable write-back
+AIRTABLE_REQUESTS_PER_SECOND = float(os.getenv("AIRTABLE_REQUESTS_PER_SECOND", "5"))
+
+# Shared HTTP connection pool
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# GitHub response cache
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", ".cache/github_cache.sqlite3")
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", str(24 * 3600)))  # seconds; 0 disables the cache
+GITHUB_CACHE_MEMORY_SIZE = int(os.getenv("GITHUB_CACHE_MEMORY_SIZE", "1024"))
+
+# Streaming pipeline (workers per stage and queue depth between stages)
+PIPELINE_ENRICH_WORKERS = int(os.getenv("PIPELINE_ENRICH_WORKERS", "8"))
+PIPELINE_PROMPT_WORKERS = int(os.getenv("PIPELINE_PROMPT_WORKERS", "2"))
+PIPELINE_LLM_WORKERS = int(os.getenv("PIPELINE_LLM_WORKERS", str(EVAL_MAX_CONCURRENCY)))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+
+# Combined individual + team run: team evaluations in flight while the individual pass continues
+TEAM_EVAL_WORKERS = int(os.getenv("TEAM_EVAL_WORKERS", "4"))
+
+# Message Batches (bulk offline scoring)
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))  # seconds between status checks
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10000"))  # requests per submitted batch
+
+# GitHub enrichment
+GITHUB_WEB_URL = os.getenv("GITHUB_WEB_URL", "https://github.com")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_PREFETCH_WORKERS = int(os.getenv("GITHUB_PREFETCH_WORKERS", "8"))
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # enables GraphQL batch enrichment; REST scraping is used without it
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+GITHUB_GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "25"))  # profiles/repos per query
+GITHUB_ACTIVITY_STATS = os.getenv("GITHUB_ACTIVITY_STATS", "false").lower() in ("1", "true", "yes")  # contributors + participation: two more requests per repo
+README_MAX_BYTES = int(os.getenv("README_MAX_BYTES", str(64 * 1024)))  # raw README bytes read before the stream is cut
+README_MAX_TOKENS = int(os.getenv("README_MAX_TOKENS", "1500"))  # condensed README kept in the cache
+
+# Shared retry / rate-limit layer (services/http_retry.py)
+GITHUB_REQUESTS_PER_SECOND = float(os.getenv("GITHUB_REQUESTS_PER_SECOND", "10"))
+ANTHROPIC_REQUESTS_PER_MINUTE = float(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "6"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))  # seconds, doubled per attempt
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))
+
+# Run journal for resumable runs
+RUN_JOURNAL_DIR = os.getenv("RUN_JOURNAL_DIR", ".cache/journal")
+
+# LLM response cache: off | read-through | record | replay
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Run metrics report written at the end of a run (.prom/.txt: Prometheus text, otherwise JSON); unset to skip
+METRICS_REPORT_PATH = os.getenv("METRICS_REPORT_PATH")
+
+# Evaluation output: "text" (scraped Score:/Feedback: reply) or "tool" (typed tool-use object)
+EVAL_OUTPUT_MODE = os.getenv("EVAL_OUTPUT_MODE", "text")
+STRUCTURED_REPAIR_ATTEMPTS = int(os.getenv("STRUCTURED_REPAIR_ATTEMPTS", "2"))  # repair requests per reply for invalid fields
+
+# Incremental sync daemon (test_scripts/sync_daemon.py)
+SYNC_POLL_INTERVAL = float(os.getenv("SYNC_POLL_INTERVAL", "60"))  # seconds between Airtable polls
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "120"))  # re-read window for clock skew; fingerprints skip repeats
+SYNC_STATE_PATH = os.getenv("SYNC_STATE_PATH", ".cache/sync_state.json")
+SYNC_TEAM_BATCH_SIZE = int(os.getenv("SYNC_TEAM_BATCH_SIZE", "50"))  # team codes per member-fetch formula
+
+# Prompt assembly: token budget for the applicant details of one evaluation call
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2000"))  # long free-text answers are trimmed to fit
+PROMPT_README_TOKENS = int(os.getenv("PROMPT_README_TOKENS", "0"))  # condensed README in the prompt, within the budget; 0 leaves it out
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))  # model's minimum cacheable prefix; shorter rubrics are sent uncached, 0 never caches
+
+# Two-tier model cascade: a small model screens everyone, borderline results are re-run on the large model
+EVAL_CASCADE = os.getenv("EVAL_CASCADE", "false").lower() in ("1", "true", "yes")
+CASCADE_SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "claude-3-5-haiku-20241022")
+CASCADE_SMALL_MAX_TOKENS = int(os.getenv("CASCADE_SMALL_MAX_TOKENS", "400"))
+CASCADE_CUT_LINE = int(os.getenv("CASCADE_CUT_LINE", "75"))  # Select/Waitlist boundary on the score scale
+CASCADE_CUT_MARGIN = int(os.getenv("CASCADE_CUT_MARGIN", "5"))  # scores this close to the cut line are escalated
+CASCADE_BAND_LOW = int(os.getenv("CASCADE_BAND_LOW", "0"))  # optional extra range of scores [low, high] to escalate
+CASCADE_BAND_HIGH = int(os.getenv("CASCADE_BAND_HIGH", "0"))  # 0 turns the band off
+
+# Review dashboard (test_scripts/dashboard.py) and the local snapshot it reads
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", ".cache/applicants.parquet")
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))  # at most one Airtable delta read per interval, shared by all reviewers
+SNAPSHOT_FULL_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_FULL_REFRESH_SECONDS", str(6 * 3600)))  # full re-read to drop deleted records
+DASHBOARD_AUTOREFRESH_SECONDS = int(os.getenv("DASHBOARD_AUTOREFRESH_SECONDS", "30"))  # page reload; reads the snapshot only
+DASHBOARD_MAX_ROWS = int(os.getenv("DASHBOARD_MAX_ROWS", "1000"))  # rows rendered after filtering and sorting
+
+# Local SQLite mirror of the Airtable table (services/airtable_mirror.py)
+AIRTABLE_READ_SOURCE = os.getenv("AIRTABLE_READ_SOURCE", "api")  # api | mirror (delta sync, then read SQLite) | offline (SQLite only)
+AIRTABLE_MIRROR_PATH = os.getenv("AIRTABLE_MIRROR_PATH", ".cache/airtable_mirror.sqlite3")
+AIRTABLE_MIRROR_SYNC_SECONDS = float(os.getenv("AIRTABLE_MIRROR_SYNC_SECONDS", "0"))  # minimum gap between delta syncs; 0 syncs before every read
+AIRTABLE_MIRROR_FULL_SYNC_SECONDS = float(os.getenv("AIRTABLE_MIRROR_FULL_SYNC_SECONDS", str(24 * 3600)))  # full re-read to drop deleted records
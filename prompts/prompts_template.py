@@ -1,4 +1,8 @@
-from services import github
+import json
+from config import settings
+from services import metrics, structured_eval
+from services.airtable import PROJECT_REPO_FIELD
+from services.readme import estimate_tokens, truncate
 
 # def get_applicant_evaluation_prompt(applicant_data):
 #     first_name = applicant_data.get("First Name", "Applicant")
@@ -6,7 +10,7 @@ from services import github
 #     company = applicant_data.get("Company", "")
 #     title = applicant_data.get("Title", "")
 #     github_url = applicant_data.get("GitHub URL", "")
-#     github_repo = applicant_data.get("GitHub Repository Link for Project", "")
+#     github_repo = applicant_data.get(PROJECT_REPO_FIELD, "")
 #     motivation = applicant_data.get("Motivation to Join", "")
 #     skills = applicant_data.get("Technical Skills", "")
 #     past_projects = applicant_data.get("Past Projects", "")
@@ -68,9 +72,144 @@ from services import github
 # """.strip()
 
 
-def get_team_evaluation_prompt(team_data):
+# Static instructions, identical for every call, go in the system prompt;
+# the user message holds only the applicant/team details. build_prompt marks
+# the system prompt for caching once it reaches PROMPT_CACHE_MIN_TOKENS (the
+# model's minimum cacheable length); these rubrics are shorter than that, so
+# they are sent uncached.
+APPLICANT_RUBRIC = """
+🚨 SYSTEM CRITICAL: YOUR RESPONSE MUST BEGIN WITH A SCORE LINE OR THE SYSTEM WILL CRASH 🚨
+
+MANDATORY FORMAT - FOLLOW EXACTLY:
+
+Line 1: Score: [number]/100
+Line 2: 
+Line 3: Feedback: Hey Alan and Gretel,
+Line 4: [Your assessment of the applicant in detail. Mention their strengths/weaknessess and explain the score]
+Line 5: 
+Line 6: Recommendation: [Select/Waitlist]
+
+EXAMPLE:
+Score: 75/100
+
+Feedback: Hey Alan and Gretel,
+This applicant shows solid motivation and some decent technical grounding,especially in Python and React.Their GitHub profile has moderate activity and a couple of relevant repos, though nothing groundbreaking. The project repo linked is basic but functional...
+
+Recommendation: Waitlist
+
+
+---
+
+You are an experienced hackathon judge preparing internal notes for selection reviewers (Alan and Gretel).
+
+Evaluate the applicant based on the details provided below. Justify your score using observable evidence (motivation, GitHub activity, skills, project quality, etc.). Be objective, concise, and clear.
+
+🎯 SPECIAL WEIGHTING GUIDELINE (IMPORTANT):  
+The applicant's selected motivation carries weight in scoring. Prioritize applicants based on this internal ranking (top to bottom = most preferred):  
+1. "I'm using this hackathon to explore an idea I eventually want to turn into a startup."  
+2. "I'm finally exploring an idea I've been thinking about for a while."  
+3. "I'm here to have fun, learn new things, and collaborate with other builders."  
+4. "I want to gain experience working with cutting-edge tech and get access to mentors."  
+5. "I'm building my portfolio or resume with a cool project."  
+
+For example, Applicants who chose Option 1 should receive higher scores than those who chose Option 5. Factor this into your evaluation and final score.
+
+SCORING GUIDELINES:
+- 90-100: Outstanding (strong skills, great motivation, impressive project)
+- 80-89: Strong candidate 
+- 70-79: Good candidate
+- 60-69: Average candidate
+- 50-59: Below average
+- 30-49: Poor (but shows some effort)
+- Minimum score: 10/100
+"""
+
+
+TEAM_RUBRIC = """
+🚨 SYSTEM CRITICAL: YOUR RESPONSE MUST BEGIN WITH A SCORE LINE OR THE SYSTEM WILL CRASH 🚨
+
+MANDATORY FORMAT - FOLLOW EXACTLY:
+
+Line 1: Score: [number]/100
+Line 2: 
+Line 3: Feedback: Hey Alan and Gretel,
+Line 4: [Your assessment of the team in detail. Mention their strengths/weaknessess and explain the score]
+Line 5: 
+Line 6: Recommendation: [Select/Waitlist]
+
+EXAMPLE:
+Team Score: 82/100
+
+Team Feedback: Hi Alan and Gretel,
+This team shows excellent potential...
+
+---
+
+You are an experienced hackathon judge preparing internal notes for selection reviewers (Alan and Gretel).
+You are evaluating a TEAM APPLICATION. Consider team dynamics, skill complementarity, collective motivation, and potential for collaboration.
+
+TEAM SCORING GUIDELINES:
+- 90-100: Outstanding team (diverse skills, strong synergy, clear vision)
+- 80-89: Strong team (good skill mix, solid motivation)
+- 70-79: Good team (decent skills, some complementarity)
+- 60-69: Average team (basic skills, unclear synergy)
+- 50-59: Below average team (limited skill diversity)
+- 30-49: Poor team (weak skills, poor fit)
+- Minimum score: 10/100
+
+EVALUATION CRITERIA:
+1. SKILL COMPLEMENTARITY: Do members have complementary technical skills?
+2. TEAM SYNERGY: Do their motivations align? Will they work well together?
+3. TRACK FIT: Are their combined skills suitable for the chosen track? Ntote: This is not a hard rule.
+
+Consider:
+- Skill gaps and overlaps
+- Leadership potential
+- Communication and teamwork indicators
+- Project execution capability
+- Innovation potential as a team
+"""
+
+
+# Tool-use mode: the same judging guidance without the text-format coaxing;
+# the tool schema defines the output instead
+TOOL_INSTRUCTIONS = f"""
+Record your evaluation by calling the {structured_eval.TOOL_NAME} tool. Write the feedback as an
+internal note starting "Hey Alan and Gretel," that mentions strengths and weaknesses and explains the score.
+"""
+STRUCTURED_APPLICANT_RUBRIC = APPLICANT_RUBRIC.split("\n---\n", 1)[1] + TOOL_INSTRUCTIONS
+STRUCTURED_TEAM_RUBRIC = TEAM_RUBRIC.split("\n---\n", 1)[1] + TOOL_INSTRUCTIONS
+
+APPLICANT_RUBRIC += '\nRESPOND EXACTLY AS SHOWN ABOVE. START WITH "Score: [number]/100"\n'
+TEAM_RUBRIC += '\nRESPOND EXACTLY AS SHOWN ABOVE. START WITH "Team Score: [number]/100"\n'
+
+
+def build_prompt(rubric, details, structured=False):
+    """
+    Structured prompt: the rubric as the system block and the
+    per-applicant/per-team details as the user message. With `structured`,
+    the model is made to answer through the evaluation tool.
+    Pass to services.ai_eval.message_params().
+
+    The system block is marked cache_control only when the cached prefix
+    (tool schema and rubric) reaches PROMPT_CACHE_MIN_TOKENS; shorter
+    prefixes aren't cached by the API.
+    """
+    system = {"type": "text", "text": rubric.strip()}
+    prompt = {"system": [system], "messages": [{"role": "user", "content": details.strip()}]}
+    if structured:
+        prompt.update(structured_eval.tool_params())
+    prefix_tokens = estimate_tokens(system["text"] + json.dumps(prompt.get("tools", [])))
+    if settings.PROMPT_CACHE_MIN_TOKENS > 0 and prefix_tokens >= settings.PROMPT_CACHE_MIN_TOKENS:
+        system["cache_control"] = {"type": "ephemeral"}
+    return prompt
+
+
+@metrics.timed("prompt")
+def get_team_evaluation_prompt(team_data, structured=None):
     """
     Generate team evaluation prompt based on individual member scores and data.
+    `structured` (default: tool output mode enabled) asks for a tool-use reply.
     
     Args:
         team_data (dict): Should contain:
@@ -108,70 +247,60 @@ Skills: {skills}
         member_summaries.append(member_summary.strip())
     
     members_text = "\n\n".join(member_summaries)
-    
-    return f"""
-🚨 SYSTEM CRITICAL: YOUR RESPONSE MUST BEGIN WITH A SCORE LINE OR THE SYSTEM WILL CRASH 🚨
-
-MANDATORY FORMAT - FOLLOW EXACTLY:
-
-Line 1: Score: [number]/100
-Line 2: 
-Line 3: Feedback: Hey Alan and Gretel,
-Line 4: [Your assessment of the team in detail. Mention their strengths/weaknessess and explain the score]
-Line 5: 
-Line 6: Recommendation: [Select/Waitlist]
-
-EXAMPLE:
-Team Score: 82/100
-
-Team Feedback: Hi Alan and Gretel,
-Team {team_name} shows excellent potential...
-
----
-
-You are an experienced hackathon judge preparing internal notes for selection reviewers (Alan and Gretel).
-You are evaluating a TEAM APPLICATION. Consider team dynamics, skill complementarity, collective motivation, and potential for collaboration.
-
-TEAM SCORING GUIDELINES:
-- 90-100: Outstanding team (diverse skills, strong synergy, clear vision)
-- 80-89: Strong team (good skill mix, solid motivation)
-- 70-79: Good team (decent skills, some complementarity)
-- 60-69: Average team (basic skills, unclear synergy)
-- 50-59: Below average team (limited skill diversity)
-- 30-49: Poor team (weak skills, poor fit)
-- Minimum score: 10/100
 
+    if structured is None:
+        structured = structured_eval.enabled()
+    rubric = STRUCTURED_TEAM_RUBRIC if structured else TEAM_RUBRIC
+    
+    return build_prompt(rubric, f"""
 TEAM: {team_name}
 Track: {chosen_track}
 Team Size: {len(members)} members
 Average Individual Score: {avg_individual_score:.1f}/100
 
 {members_text}
+""", structured)
 
-EVALUATION CRITERIA:
-1. SKILL COMPLEMENTARITY: Do members have complementary technical skills?
-2. TEAM SYNERGY: Do their motivations align? Will they work well together?
-3. TRACK FIT: Are their combined skills suitable for the chosen track? Ntote: This is not a hard rule.
 
-Consider:
-- Skill gaps and overlaps
-- Leadership potential
-- Communication and teamwork indicators
-- Project execution capability
-- Innovation potential as a team
 
-RESPOND EXACTLY AS SHOWN ABOVE. START WITH "Team Score: [number]/100"
-""".strip()
+def _activity_lines(repo_info):
+    # Only present with GITHUB_ACTIVITY_STATS; otherwise the prompt is unchanged
+    lines = ""
+    if repo_info.get("contributor_count") is not None:
+        lines += f"\n- Contributors: {repo_info['contributor_count']}"
+    if repo_info.get("commits_last_4_weeks") is not None:
+        lines += f"\n- Commits (last 4 weeks / last year): {repo_info['commits_last_4_weeks']} / {repo_info.get('commits_last_year')}"
+    return lines
+
 
+def _readme_section(readme):
+    return f"\n\nProject README (condensed):\n{readme}" if readme else ""
 
 
-def get_applicant_evaluation_prompt(applicant_data):
+def fit_to_budget(texts, max_tokens):
+    """
+    Trim {name: text} so the texts together fit `max_tokens`. Short texts
+    are kept whole; the long ones share what is left evenly.
+    """
+    if sum(estimate_tokens(text) for text in texts.values()) <= max_tokens:
+        return dict(texts)
+    fitted = {}
+    remaining = max(0, max_tokens)
+    by_length = sorted(texts, key=lambda name: len(texts[name]))
+    for n, name in enumerate(by_length):
+        fitted[name] = truncate(texts[name], remaining // (len(by_length) - n))
+        remaining -= estimate_tokens(fitted[name])
+    return fitted
+
+
+@metrics.timed("prompt")
+def get_applicant_evaluation_prompt(applicant_data, structured=None):
     first_name = applicant_data.get("First Name", "Applicant")
     chosen_track = applicant_data.get("Chosen Track", "")
     company = applicant_data.get("Company", "")
     title = applicant_data.get("Title", "")
     github_url = applicant_data.get("GitHub URL", "")
-    github_repo = applicant_data.get("GitHub Repository Link for Project", "")
+    github_repo = applicant_data.get(PROJECT_REPO_FIELD, "")
     motivation = applicant_data.get("Motivation to Join", "")
     skills = applicant_data.get("Technical Skills", "")
     past_projects = applicant_data.get("Past Projects", "")
@@ -179,64 +308,28 @@ def get_applicant_evaluation_prompt(applicant_data):
     post_event_interest_other = applicant_data.get("Other","")
     
 
-    github_profile_data = github.fetch_github_profile(github_url) if github_url else {}
-    repo_info = github.fetch_repo_info(github_repo) if github_repo else {}
-
-    return f"""
-🚨 SYSTEM CRITICAL: YOUR RESPONSE MUST BEGIN WITH A SCORE LINE OR THE SYSTEM WILL CRASH 🚨
-
-MANDATORY FORMAT - FOLLOW EXACTLY:
-
-Line 1: Score: [number]/100
-Line 2: 
-Line 3: Feedback: Hey Alan and Gretel,
-Line 4: [Your assessment of the applicant in detail. Mention their strengths/weaknessess and explain the score]
-Line 5: 
-Line 6: Recommendation: [Select/Waitlist]
-
-EXAMPLE:
-Score: 75/100
-
-Feedback: Hey Alan and Gretel,
-This applicant shows solid motivation and some decent technical grounding,especially in Python and React.Their GitHub profile has moderate activity and a couple of relevant repos, though nothing groundbreaking. The project repo linked is basic but functional...
-
-Recommendation: Waitlist
+    # GitHub data is attached beforehand by services.enrichment; no I/O here
+    github_profile_data = applicant_data.get("github_profile") or {}
+    repo_info = applicant_data.get("repo_info") or {}
 
+    if structured is None:
+        structured = structured_eval.enabled()
+    rubric = STRUCTURED_APPLICANT_RUBRIC if structured else APPLICANT_RUBRIC
 
----
-
-You are an experienced hackathon judge preparing internal notes for selection reviewers (Alan and Gretel).
-
-Evaluate the applicant based on the details provided below. Justify your score using observable evidence (motivation, GitHub activity, skills, project quality, etc.). Be objective, concise, and clear.
-
-🎯 SPECIAL WEIGHTING GUIDELINE (IMPORTANT):  
-The applicant's selected motivation carries weight in scoring. Prioritize applicants based on this internal ranking (top to bottom = most preferred):  
-1. "I'm using this hackathon to explore an idea I eventually want to turn into a startup."  
-2. "I'm finally exploring an idea I've been thinking about for a while."  
-3. "I'm here to have fun, learn new things, and collaborate with other builders."  
-4. "I want to gain experience working with cutting-edge tech and get access to mentors."  
-5. "I'm building my portfolio or resume with a cool project."  
-
-For example, Applicants who chose Option 1 should receive higher scores than those who chose Option 5. Factor this into your evaluation and final score.
-
-SCORING GUIDELINES:
-- 90-100: Outstanding (strong skills, great motivation, impressive project)
-- 80-89: Strong candidate 
-- 70-79: Good candidate
-- 60-69: Average candidate
-- 50-59: Below average
-- 30-49: Poor (but shows some effort)
-- Minimum score: 10/100
-
+    # Keep the details within PROMPT_TOKEN_BUDGET: the applicant's own answers
+    # come first, the condensed README gets what is left (up to PROMPT_README_TOKENS)
+    answers = {"motivation": motivation, "skills": skills, "past_projects": past_projects, "other": post_event_interest_other}
+    def details(answers, readme):
+        return f"""
 APPLICANT: {first_name}
 Company: {company}
 Title: {title}
 Track: {chosen_track}
 
-Motivation: {motivation}
-Skills: {skills}
-Projects: {past_projects}
-Continue after hackathon: {post_event_interest} or {post_event_interest_other}
+Motivation: {answers["motivation"]}
+Skills: {answers["skills"]}
+Projects: {answers["past_projects"]}
+Continue after hackathon: {post_event_interest} or {answers["other"]}
 
 GitHub Profile: {github_url or "Not provided"}
 - Username: {github_profile_data.get('username', 'N/A')}
@@ -248,7 +341,12 @@ GitHub Project: {github_repo or "Not provided"}
 - Language: {repo_info.get('language', 'N/A')}
 - Stars: {repo_info.get('stars', 0)}
 - Watchers: {repo_info.get('watchers',0)}
-- Commit Count: {repo_info.get('commit_count','N/A')}
-
-RESPOND EXACTLY AS SHOWN ABOVE. START WITH "Score: [number]/100"
-""".strip()
\ No newline at end of file
+- Commit Count: {repo_info.get('commit_count','N/A')}{_activity_lines(repo_info)}{_readme_section(readme)}
+"""
+    fixed = estimate_tokens(details(dict.fromkeys(answers, ""), ""))
+    answers = fit_to_budget(answers, settings.PROMPT_TOKEN_BUDGET - fixed)
+    readme = ""
+    if settings.PROMPT_README_TOKENS > 0 and repo_info.get("readme_content"):
+        room = settings.PROMPT_TOKEN_BUDGET - estimate_tokens(details(answers, "")) - estimate_tokens(_readme_section(" "))
+        readme = truncate(repo_info["readme_content"], min(settings.PROMPT_README_TOKENS, room))
+    return build_prompt(rubric, details(answers, readme), structured)
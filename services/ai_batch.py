@@ -0,0 +1,177 @@
+"""
+Bulk scoring through the Anthropic Message Batches API.
+
+All prompts are submitted as batches (BATCH_MAX_REQUESTS per batch), polled
+until processing ends, and the text replies are returned by caller id.
+Batches cost about half as much as interactive calls and are not bound by
+the interactive rate limits, which suits overnight full-cohort runs.
+
+With the model cascade enabled, evaluate_batch() runs one batch on the small
+model and a second, large-model batch for the prompts it escalates.
+"""
+import hashlib
+import re
+import time
+from config import settings
+from services.clients import get_anthropic_client
+from services.ai_eval import message_params, record_usage, response_text, repair_structured
+from services.http_retry import call_with_retry
+from services import cascade, llm_cache, metrics, response_parser
+
+# custom_id must match this; record ids do, team codes may not
+_CUSTOM_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+def _custom_ids(keys):
+    """
+    Map each caller key to a valid, unique custom_id: the key itself when it
+    fits the pattern and isn't taken, otherwise a hash of the key.
+    """
+    ids, used = {}, set()
+    for key in keys:
+        custom_id = str(key)
+        if not _CUSTOM_ID_PATTERN.match(custom_id) or custom_id in used:
+            custom_id = "key-" + hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:40]
+        suffix = 0
+        while custom_id in used:
+            suffix += 1
+            custom_id = f"{custom_id[:40]}-{suffix}"
+        used.add(custom_id)
+        ids[key] = custom_id
+    return ids
+
+
+def submit_batch(prompts_by_id, model=None, max_tokens=None):
+    """
+    Submit {custom_id: prompt} as one Message Batch. Returns the batch id.
+    """
+    client = get_anthropic_client()
+    batch = call_with_retry(
+        "anthropic",
+        client.messages.batches.create,
+        requests=[
+            {"custom_id": custom_id, "params": message_params(prompt, model, max_tokens)}
+            for custom_id, prompt in prompts_by_id.items()
+        ]
+    )
+    return batch.id
+
+
+def wait_for_batch(batch_id, poll_interval=None):
+    """
+    Block until the batch has finished processing. Returns the final batch object.
+    """
+    if poll_interval is None:
+        poll_interval = settings.BATCH_POLL_INTERVAL
+    client = get_anthropic_client()
+    while True:
+        batch = call_with_retry("anthropic", client.messages.batches.retrieve, batch_id)
+        if batch.processing_status == "ended":
+            return batch
+        counts = batch.request_counts
+        print(f"Batch {batch_id}: {counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored")
+        time.sleep(poll_interval)
+
+
+def iter_batch_results(batch_id, tier=None):
+    """
+    Yield (custom_id, text, error) for every request in a finished batch.
+    Usage is also counted against the cascade `tier` when given.
+    """
+    client = get_anthropic_client()
+    for entry in call_with_retry("anthropic", client.messages.batches.results, batch_id):
+        result = entry.result
+        if result.type == "succeeded":
+            record_usage(result.message.usage)
+            if tier is not None:
+                cascade.record_call(tier, result.message.model, usage=result.message.usage)
+            yield entry.custom_id, response_text(result.message), None
+        elif result.type == "errored":
+            yield entry.custom_id, None, f"errored: {result.error}"
+        else:
+            # canceled or expired
+            yield entry.custom_id, None, result.type
+
+
+def run_batch(prompts, poll_interval=None, model=None, max_tokens=None, tier=None):
+    """
+    Score {key: prompt} through Message Batches.
+    Returns {key: (text, error)}; exactly one of text/error is set.
+    Prompts already in the LLM response cache are not submitted.
+    `model`/`max_tokens` override the message_params() defaults; `tier` names
+    the cascade tier the requests belong to.
+    """
+    ids = _custom_ids(prompts)
+    keys_by_id = {custom_id: key for key, custom_id in ids.items()}
+    results = {}
+    keys = []
+    for key, prompt in prompts.items():
+        try:
+            cached = llm_cache.lookup(message_params(prompt, model, max_tokens))
+        except llm_cache.LLMCacheMiss as e:
+            results[key] = (None, str(e))
+            continue
+        if cached is not None:
+            results[key] = (cached, None)
+            if tier is not None:
+                cascade.record_call(tier, model or message_params(prompt)["model"])
+        else:
+            keys.append(key)
+
+    for start in range(0, len(keys), settings.BATCH_MAX_REQUESTS):
+        chunk = keys[start:start + settings.BATCH_MAX_REQUESTS]
+        # One observation per batch: submit to ended, however many requests it held
+        with metrics.timer("llm_batch"):
+            batch_id = submit_batch({ids[key]: prompts[key] for key in chunk}, model, max_tokens)
+            print(f"Submitted batch {batch_id} with {len(chunk)} requests")
+            wait_for_batch(batch_id, poll_interval)
+        for custom_id, text, error in iter_batch_results(batch_id, tier):
+            key = keys_by_id[custom_id]
+            params = message_params(prompts[key], model, max_tokens)
+            if text is not None and "tools" in params:
+                # Invalid fields are repaired with short interactive calls
+                text = repair_structured(text, params)
+            results[key] = (text, error)
+            if text is not None:
+                llm_cache.store(params, text)
+
+    # Anything the batch didn't report on counts as failed
+    for key in prompts:
+        results.setdefault(key, (None, "missing from batch results"))
+    return results
+
+
+def run_cascade_batch(prompts, team=False, poll_interval=None):
+    """
+    run_batch() through the model cascade: every prompt goes into a small-model
+    batch, and only the escalated ones into a second batch on the large model.
+    """
+    small = run_batch(
+        {key: cascade.short_prompt(prompt) for key, prompt in prompts.items()}, poll_interval,
+        model=settings.CASCADE_SMALL_MODEL, max_tokens=settings.CASCADE_SMALL_MAX_TOKENS, tier=cascade.SMALL,
+    )
+    results, escalated = {}, {}
+    for key, (text, error) in small.items():
+        if error is not None:
+            # A failed screen is not a verdict; let the large model score it
+            escalated[key] = prompts[key]
+            continue
+        reason = cascade.escalation_reason(response_parser.parse(text, team=team))
+        cascade.record_decision(reason)
+        if reason is None:
+            results[key] = (text, None)
+        else:
+            escalated[key] = prompts[key]
+    if escalated:
+        print(f"Cascade: escalating {len(escalated)} of {len(prompts)} prompts to the large model")
+        results.update(run_batch(escalated, poll_interval, tier=cascade.LARGE))
+    return results
+
+
+def evaluate_batch(prompts, team=False, poll_interval=None):
+    """
+    Score {key: prompt} through Message Batches, via the cascade when it is enabled.
+    """
+    if cascade.enabled():
+        return run_cascade_batch(prompts, team=team, poll_interval=poll_interval)
+    return run_batch(prompts, poll_interval)
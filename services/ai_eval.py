@@ -5,152 +5,249 @@
 # client = OpenAI(api_key=OPENAI_API_KEY)
 
 
-from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
-from config.settings import CLAUDE_API_KEY
+import json
+import threading
+import time
+from config import settings
+from services.clients import get_anthropic_client
+from services.http_retry import call_with_retry
+from services import cascade, llm_cache, metrics, readme, response_parser, structured_eval
 from prompts.prompts_template import get_applicant_evaluation_prompt
 
-client = Anthropic(api_key=CLAUDE_API_KEY)
+MODEL = "claude-3-5-sonnet-20241022"
+MAX_TOKENS = 2000
+TEMPERATURE = 0.3
+
+
+def _prompt_text(prompt):
+    if not isinstance(prompt, dict):
+        return str(prompt)
+    parts = []
+    system = prompt.get("system") or []
+    parts.extend([system] if isinstance(system, str) else [block.get("text", "") for block in system])
+    for message in prompt.get("messages", []):
+        content = message["content"]
+        parts.extend([content] if isinstance(content, str) else [block.get("text", "") for block in content])
+    if "tools" in prompt:
+        parts.append(json.dumps(prompt["tools"]))
+    return "\n".join(parts)
+
+
+def estimate_tokens(prompt):
+    """
+    Cheap token estimate (~4 characters per token) of a built evaluation
+    prompt (string or build_prompt dict) plus the maximum response length.
+    Used to reserve tokens-per-minute budget right before a call is made.
+    """
+    return readme.estimate_tokens(_prompt_text(prompt)) + MAX_TOKENS
+
+
+def message_params(prompt, model=None, max_tokens=None):
+    """
+    Messages API parameters for an evaluation prompt. Shared by the
+    interactive calls and the Message Batches requests.
+
+    `prompt` is either a plain string or the structured {"system", "messages"}
+    dict from prompts_template.build_prompt (cacheable rubric prefix).
+    `model`/`max_tokens` default to MODEL/MAX_TOKENS (the cascade's small tier overrides them).
+    """
+    params = {
+        "model": model or MODEL,
+        "max_tokens": max_tokens or MAX_TOKENS,
+        "temperature": TEMPERATURE,
+    }
+    if isinstance(prompt, dict):
+        params.update(prompt)
+    else:
+        params["messages"] = [{"role": "user", "content": prompt}]
+    return params
+
+
+# Token usage across all calls in this process, including prompt cache reads/writes
+USAGE_FIELDS = ["input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"]
+_usage = {field: 0 for field in USAGE_FIELDS}
+_usage["calls"] = 0
+_usage_lock = threading.Lock()
+
+
+def record_usage(usage):
+    """
+    Add a response's `usage` to the running totals.
+    """
+    if usage is None:
+        return
+    with _usage_lock:
+        _usage["calls"] += 1
+        for field in USAGE_FIELDS:
+            _usage[field] += getattr(usage, field, None) or 0
+    for field in USAGE_FIELDS:
+        metrics.increment("llm_tokens_total", getattr(usage, field, None) or 0, type=field.replace("_tokens", ""))
+
+
+def usage_summary():
+    """
+    Token totals so far plus the share of cacheable input served from the
+    prompt cache (None when no prompt was long enough to be cached).
+    """
+    with _usage_lock:
+        summary = dict(_usage)
+    cacheable = summary["cache_read_input_tokens"] + summary["cache_creation_input_tokens"]
+    summary["cache_hit_rate"] = round(summary["cache_read_input_tokens"] / cacheable, 3) if cacheable else None
+    return summary
+
+
+def reset_usage():
+    with _usage_lock:
+        for field in _usage:
+            _usage[field] = 0
+
+
+def complete(prompt, model=None, max_tokens=None):
+    """
+    Send an already-built evaluation prompt to Claude and return the text reply.
+    Identical requests are answered from the LLM response cache when enabled.
+    """
+    return _complete(message_params(prompt, model, max_tokens))[0]
+
+
+def _complete(params):
+    # (text, usage); usage is None when the reply came from the LLM cache
+    cached = llm_cache.lookup(params)
+    if cached is not None:
+        return cached, None
+
+    response = _create(params)
+    text = response_text(response)
+    if "tools" in params:
+        text = repair_structured(text, params)
+    llm_cache.store(params, text)
+    return text, response.usage
+
+
+def _cascade_call(tier, params):
+    started = time.perf_counter()
+    text, usage = _complete(params)
+    cascade.record_call(tier, params["model"], time.perf_counter() - started, usage)
+    return text
+
+
+def cascade_complete(prompt, team=False):
+    """
+    Evaluate through the model cascade (see services.cascade): the small
+    model's short reply is returned unless its score is uncertain, in which
+    case the prompt is sent unchanged to MODEL.
+    """
+    small = message_params(cascade.short_prompt(prompt), settings.CASCADE_SMALL_MODEL, settings.CASCADE_SMALL_MAX_TOKENS)
+    text = _cascade_call(cascade.SMALL, small)
+    reason = cascade.escalation_reason(response_parser.parse(text, team=team))
+    cascade.record_decision(reason)
+    if reason is None:
+        return text
+    return _cascade_call(cascade.LARGE, message_params(prompt))
+
+
+def evaluate_prompt(prompt, team=False):
+    """
+    Evaluate a built applicant (or, with `team`, team) prompt, through the cascade when it is enabled.
+    """
+    if cascade.enabled():
+        return cascade_complete(prompt, team=team)
+    return complete(prompt)
+
+
+def _create(params):
+    # Raw response so the rate-limit headers reach the limiter
+    with metrics.timer("llm"):
+        raw = call_with_retry(
+            "anthropic",
+            get_anthropic_client().messages.with_raw_response.create,
+            headers_of=lambda raw: raw.headers,
+            **params,
+        )
+        response = raw.parse()
+    record_usage(response.usage)
+    return response
+
+
+def response_text(message):
+    """
+    The reply as text; for a tool-use reply, the tool input as a JSON object
+    (which services.response_parser reads without any regex).
+    """
+    data = structured_eval.tool_input(message)
+    if data is not None:
+        return json.dumps(data)
+    return message.content[0].text
+
+
+def repair_structured(text, params):
+    """
+    Validate a tool-use reply (JSON text) to the request `params` and re-ask
+    for just the invalid fields, up to STRUCTURED_REPAIR_ATTEMPTS times, in
+    the same conversation and on the same model. Returns the JSON text;
+    fields still invalid after that are left for the parser's fallback.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = {}
+    for attempt in range(settings.STRUCTURED_REPAIR_ATTEMPTS):
+        errors = structured_eval.validate(data)
+        if not errors:
+            break
+        print(f"Repairing invalid fields: {errors}")
+        for field in errors:
+            metrics.increment("structured_repairs_total", field=field)
+        repair = structured_eval.repair_params(params, data, errors)
+        fixed = structured_eval.tool_input(_create(repair)) or {}
+        data.update({field: value for field, value in fixed.items() if field in errors})
+    return json.dumps(data)
+
 
 def evaluate_applicant(applicant_data):
     prompt = get_applicant_evaluation_prompt(applicant_data)
+    return evaluate_prompt(prompt)
 
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
-        max_tokens=2000,
-        temperature=0.3,
-        messages=[{"role": "user", "content": prompt}]
-    )
 
-    return response.content[0].text
+# Score recorded when a reply has no usable score (the rubric's minimum)
+FALLBACK_SCORE = 10
 
 
-import re
+def _with_fallback(parsed, response_text, what):
+    if parsed.score is not None:
+        feedback = parsed.feedback
+        if parsed.recommendation and feedback and "Recommendation:" not in feedback:
+            # Tool-use replies carry it as a field; keep the stored feedback the same shape as text replies
+            feedback = f"{feedback}\n\nRecommendation: {parsed.recommendation}"
+        return parsed.score, feedback
+    print(f"Warning: Could not extract {what} from response")
+    metrics.increment("parse_failures_total", kind=what)
+    return FALLBACK_SCORE, response_text.strip()
 
+
+@metrics.timed("parse")
 def parse_ai_response(response_text):
     """
-    Simple parser for AI evaluation responses.
-    Extracts score and feedback without making assumptions about quality.
+    Extract (score, feedback) from an evaluation reply (see services.response_parser).
+    A reply without a score in 0-100 gets FALLBACK_SCORE and the whole reply as feedback.
     """
-    score = None
-    
-    # Look for score patterns in order of preference
-    score_patterns = [
-        r'Score:\s*(\d+)/100',           # "Score: 85/100"
-        r'Score:\s*(\d+)',               # "Score: 85"
-        r'(\d+)/100',                    # "85/100"
-        r'(\d+)\s*out of 100',           # "85 out of 100"
-        r'(\d+)\s*points',               # "85 points"
-        r'(\d+)\s*%',                    # "85%"
-    ]
-    
-    for pattern in score_patterns:
-        match = re.search(pattern, response_text, re.IGNORECASE)
-        if match:
-            try:
-                extracted_score = int(match.group(1))
-                # Only validate it's a reasonable number (0-100)
-                if 0 <= extracted_score <= 100:
-                    score = extracted_score
-                    break
-            except (ValueError, IndexError):
-                continue
-    
-    # Extract feedback
-    feedback_match = re.search(r'Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
-    if feedback_match:
-        feedback = feedback_match.group(1).strip()
-    else:
-        # If no "Feedback:" found, use the entire response minus the score line
-        feedback_lines = []
-        for line in response_text.split('\n'):
-            if not re.match(r'Score:\s*\d+', line, re.IGNORECASE):
-                feedback_lines.append(line)
-        feedback = '\n'.join(feedback_lines).strip()
-    
-    # If no score found, return None and let the caller decide what to do
-    if score is None:
-        print(f"Warning: Could not extract score from response")
-        score=10
-        feedback = response_text.strip()
-    
-    return score, feedback
+    return _with_fallback(response_parser.parse(response_text), response_text, "score")
 
 
 def evaluate_team(team_data):
     """
     Evaluate a team using AI and return the response.
     """
-    from anthropic import Anthropic
-    from config.settings import CLAUDE_API_KEY
     from prompts.prompts_template import get_team_evaluation_prompt
     
-    client = Anthropic(api_key=CLAUDE_API_KEY)
     prompt = get_team_evaluation_prompt(team_data)
-
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
-        max_tokens=2000,
-        temperature=0.3,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return evaluate_prompt(prompt, team=True)
 
 
+@metrics.timed("parse")
 def parse_team_ai_response(response_text):
     """
     Parse AI response to extract team score and team feedback.
-    Similar to parse_ai_response but for team evaluation.
+    Same as parse_ai_response, with "Team Score"/"Team Feedback" preferred.
     """
-    import re
-    
-    score = None
-    
-    # Look for team score patterns in order of preference
-    score_patterns = [
-        r'Team Score:\s*(\d+)/100',      # "Team Score: 85/100"
-        r'Team Score:\s*(\d+)',          # "Team Score: 85"
-        r'Score:\s*(\d+)/100',           # "Score: 85/100" (fallback)
-        r'Score:\s*(\d+)',               # "Score: 85" (fallback)
-        r'(\d+)/100',                    # "85/100"
-        r'(\d+)\s*out of 100',           # "85 out of 100"
-        r'(\d+)\s*points',               # "85 points"
-        r'(\d+)\s*%',                    # "85%"
-    ]
-    
-    for pattern in score_patterns:
-        match = re.search(pattern, response_text, re.IGNORECASE)
-        if match:
-            try:
-                extracted_score = int(match.group(1))
-                # Only validate it's a reasonable number (0-100)
-                if 0 <= extracted_score <= 100:
-                    score = extracted_score
-                    break
-            except (ValueError, IndexError):
-                continue
-    
-    # Extract team feedback
-    feedback_match = re.search(r'Team Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
-    if feedback_match:
-        feedback = feedback_match.group(1).strip()
-    else:
-        # Fallback to regular "Feedback:" pattern
-        feedback_match = re.search(r'Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
-        if feedback_match:
-            feedback = feedback_match.group(1).strip()
-        else:
-            # If no "Feedback:" found, use the entire response minus the score line
-            feedback_lines = []
-            for line in response_text.split('\n'):
-                if not re.match(r'(Team\s+)?Score:\s*\d+', line, re.IGNORECASE):
-                    feedback_lines.append(line)
-            feedback = '\n'.join(feedback_lines).strip()
-    
-    # If no score found, return default score and let caller decide what to do
-    if score is None:
-        print(f"Warning: Could not extract team score from response")
-        score = 10
-        feedback = response_text.strip()
-    
-    return score, feedback
\ No newline at end of file
+    return _with_fallback(response_parser.parse(response_text, team=True), response_text, "team score")
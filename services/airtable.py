@@ -1,39 +1,170 @@
+import threading
 from collections import defaultdict
-from pyairtable import Api
 from config import settings
+from services.clients import get_airtable_table
+from services.airtable_writer import AirtableWriteQueue
+from services.airtable_mirror import get_mirror, read_source
+from services.http_retry import get_limiter
+from services import metrics
 
 API_KEY = settings.AIRTABLE_API_KEY
 BASE_ID = settings.AIRTABLE_BASE_ID
 TABLE_NAME = settings.AIRTABLE_TABLE_NAME
 
+# Project repo link, read by enrichment (repo info, activity, README) and the prompt
+PROJECT_REPO_FIELD = "GitHub Repository Link for Project"
+
 FIELDS_TO_FETCH = [
     "Chosen Track", "First Name", "Last Name", "Company", "Title",
     "GitHub URL", "Motivation to Join", "Technical Skills", "Past Projects",
-    "GitHub Repository", "Post-Event Development Interest", "Other"
+    PROJECT_REPO_FIELD, "Post-Event Development Interest", "Other"
 ]
 
+# Previous result, read back so unchanged applicants can be skipped
+INCREMENTAL_FIELDS = ["Individual Score", "Evaluation Fingerprint"]
+
 def test_read_airtable():
     try:
-        api = Api(API_KEY)
-        table = api.table(BASE_ID, TABLE_NAME)
-        records = table.all()
+        records = [record for page in iter_record_pages() for record in page]
         print(f"Fetched {len(records)} records from Airtable:")
         for rec in records:
             print(rec['fields'])
     except Exception as e:
         print(f"Error reading from Airtable: {e}")
 
-def fetch_applicants_for_evaluation():
-    api = Api(API_KEY)
-    table = api.table(BASE_ID, TABLE_NAME)
-    records = table.all()
-    applicants = []
-    for rec in records:
-        fields = rec.get("fields", {})
-        applicant = {field: fields.get(field, "") for field in FIELDS_TO_FETCH}
-        applicant["record_id"] = rec["id"]  # for updating back later
-        applicants.append(applicant)
-    return applicants
+# filterByFormula building blocks, evaluated by Airtable so unwanted rows are never downloaded
+HAS_TEAM_CODE = "NOT({Team Code} = '')"
+INDIVIDUAL_SCORE_BLANK = "{Individual Score} = BLANK()"
+
+
+def modified_since(timestamp, fields=None):
+    """
+    Formula matching records modified after `timestamp` (ISO 8601 string).
+    With `fields`, only edits to those fields count, so our own score
+    write-backs don't make a record look modified.
+    """
+    watched = ", ".join(f"{{{field}}}" for field in fields or ())
+    return f"IS_AFTER(LAST_MODIFIED_TIME({watched}), DATETIME_PARSE('{timestamp}'))"
+
+
+def _combine(function, formulas):
+    formulas = [formula for formula in formulas if formula]
+    if not formulas:
+        return None
+    if len(formulas) == 1:
+        return formulas[0]
+    return f"{function}({', '.join(formulas)})"
+
+
+def all_of(*formulas):
+    """
+    AND together the given formulas, ignoring empty ones.
+    """
+    return _combine("AND", formulas)
+
+
+def any_of(*formulas):
+    """
+    OR together the given formulas, ignoring empty ones.
+    """
+    return _combine("OR", formulas)
+
+
+def team_code_in(team_codes):
+    """
+    Formula matching the members of the given teams.
+    """
+    quoted = ["'" + code.replace("\\", "\\\\").replace("'", "\\'") + "'" for code in team_codes]
+    return any_of(*(f"{{Team Code}} = {code}" for code in quoted))
+
+
+def record_id_in(record_ids):
+    """
+    Formula matching the given records.
+    """
+    return any_of(*(f"RECORD_ID() = '{record_id}'" for record_id in record_ids))
+
+
+# Formulas the mirror answers from its indexed columns (SQL WHERE clauses)
+MIRROR_FILTERS = {
+    None: None,
+    HAS_TEAM_CODE: "team_code != ''",
+    INDIVIDUAL_SCORE_BLANK: "COALESCE(json_extract(fields, '$.\"Individual Score\"'), '') = ''",
+}
+
+
+def _current_mirror(source):
+    mirror = get_mirror()
+    if source == "mirror":
+        mirror.ensure_current()
+    elif mirror.cursor() is None:
+        raise ValueError("The Airtable mirror is empty; sync it (python -m services.airtable_mirror) before an offline run")
+    return mirror
+
+
+def iter_record_pages(fields=None, formula=None, page_size=100):
+    """
+    Stream records one page at a time, from Airtable or the local mirror
+    (see services.airtable_mirror and AIRTABLE_READ_SOURCE).
+    """
+    source = read_source()
+    if source != "api" and formula in MIRROR_FILTERS:
+        yield from _current_mirror(source).iter_pages(fields, MIRROR_FILTERS[formula])
+        return
+    if source == "offline":
+        raise ValueError(f"Offline reads come from the mirror, which can't apply the formula {formula}")
+    yield from iter_api_pages(fields, formula, page_size)
+
+
+def iter_api_pages(fields=None, formula=None, page_size=100):
+    """
+    Stream records from Airtable one page (up to 100 records) at a time.
+    Only `fields` are returned and only rows matching `formula` are sent.
+    Page requests share the "airtable" rate limiter with the writer; 429s on
+    reads are retried by pyairtable's own retry strategy.
+    """
+    table = get_airtable_table(BASE_ID, TABLE_NAME)
+    options = {"page_size": page_size}
+    if fields:
+        options["fields"] = fields
+    if formula:
+        options["formula"] = formula
+
+    limiter = get_limiter("airtable")
+    pages = table.iterate(**options)
+    while True:
+        limiter.acquire()
+        try:
+            with metrics.timer("fetch"):
+                page = next(pages, None)
+        finally:
+            limiter.release()
+        if page is None:
+            return
+        metrics.increment("records_fetched_total", len(page))
+        yield page
+
+
+def _iter_applicants(field_names, formula=None, pages=None):
+    if pages is None:
+        pages = iter_record_pages(fields=field_names, formula=formula)
+    for page in pages:
+        for rec in page:
+            fields = rec.get("fields", {})
+            applicant = {field: fields.get(field, "") for field in field_names}
+            applicant["record_id"] = rec["id"]  # for updating back later
+            yield applicant
+
+
+def iter_applicants_for_evaluation(formula=None):
+    """
+    Yield applicants for individual evaluation as their page arrives.
+    """
+    yield from _iter_applicants(FIELDS_TO_FETCH + INCREMENTAL_FIELDS, formula)
+
+
+def fetch_applicants_for_evaluation(formula=None):
+    return list(iter_applicants_for_evaluation(formula))
 
 # Fields needed for team evaluation
 TEAM_FIELDS_TO_FETCH = [
@@ -48,24 +179,38 @@ TEAM_FIELDS_TO_FETCH = [
     
 ]
 
-def fetch_applicants_for_team_evaluation():
+def iter_applicants_for_team_evaluation(formula=None):
+    """
+    Yield applicants that have team codes. The team code filter runs in
+    Airtable; from the mirror, only members of teams of two or more are read.
+    """
+    source = read_source()
+    if source != "api" and formula is None:
+        yield from _iter_applicants(TEAM_FIELDS_TO_FETCH, pages=_current_mirror(source).iter_team_pages(TEAM_FIELDS_TO_FETCH))
+        return
+    yield from _iter_applicants(TEAM_FIELDS_TO_FETCH, all_of(HAS_TEAM_CODE, formula))
+
+
+def fetch_applicants_for_team_evaluation(formula=None):
     """
     Fetch all applicants that have team codes for team evaluation.
     """
-    api = Api(API_KEY)
-    table = api.table(BASE_ID, TABLE_NAME)
-    records = table.all()
-    
-    applicants = []
-    for rec in records:
-        fields = rec.get("fields", {})
-        # Only include applicants that have a team code
-        if fields.get("Team Code"):
-            applicant = {field: fields.get(field, "") for field in TEAM_FIELDS_TO_FETCH}
-            applicant["record_id"] = rec["id"]  # for updating back later
-            applicants.append(applicant)
-    
-    return applicants
+    return list(iter_applicants_for_team_evaluation(formula))
+
+# Everything both passes need, so a combined run scans the table once
+COMBINED_FIELDS_TO_FETCH = list(dict.fromkeys(FIELDS_TO_FETCH + INCREMENTAL_FIELDS + TEAM_FIELDS_TO_FETCH))
+
+
+# Edits to these make an applicant (and their team) due for re-evaluation
+SYNC_WATCHED_FIELDS = FIELDS_TO_FETCH + ["Team Code", "Team Name"]
+
+
+def fetch_applicants_for_combined_evaluation(formula=None):
+    """
+    Fetch every applicant (or those matching `formula`) with the fields for
+    both the individual and the team evaluation.
+    """
+    return list(_iter_applicants(COMBINED_FIELDS_TO_FETCH, formula))
 
 def group_applicants_by_team(applicants):
     """
@@ -114,19 +259,39 @@ def prepare_team_data_for_ai(team_code, team_members):
     
     return team_data
 
-def update_team_members_in_airtable(team_members, team_score, team_feedback):
+def _count_down(count, callback):
+    # Callable that runs `callback` on its `count`-th call, from any thread
+    remaining = {"count": count}
+    lock = threading.Lock()
+
+    def on_written():
+        with lock:
+            remaining["count"] -= 1
+            done = remaining["count"] == 0
+        if done:
+            callback()
+    return on_written
+
+
+def update_team_members_in_airtable(team_members, team_score, team_feedback, writer=None, on_team_written=None):
     """
     Update all team members with the same team score and team feedback.
+    Updates are queued on `writer` (an AirtableWriteQueue) and written in
+    batches of 10; without a writer the team is flushed before returning.
+    `on_team_written()` is called once every member's update has been saved.
     """
-    api = Api(API_KEY)
-    table = api.table(BASE_ID, TABLE_NAME)
-    
+    owns_writer = writer is None
+    if owns_writer:
+        writer = AirtableWriteQueue()
+
+    fields = {
+        "Team Score": team_score if team_score is not None else 0,
+        "Team Feedback": team_feedback if team_feedback else "No team feedback generated."
+    }
+    on_written = _count_down(len(team_members), on_team_written) if on_team_written is not None else None
     for member in team_members:
-        try:
-            table.update(member["record_id"], {
-                "Team Score": team_score if team_score is not None else 0,
-                "Team Feedback": team_feedback if team_feedback else "No team feedback generated."
-            })
-            print(f"Updated team member {member.get('First Name')} with team score {team_score}")
-        except Exception as e:
-            print(f"Error updating team member {member.get('First Name')}: {e}")
\ No newline at end of file
+        writer.add(member["record_id"], fields, on_written=on_written)
+        print(f"Queued team member {member.get('First Name')} with team score {team_score}")
+
+    if owns_writer:
+        writer.flush()
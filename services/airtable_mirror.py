@@ -0,0 +1,235 @@
+"""
+Local SQLite mirror of the Airtable applicants table.
+
+Every record is stored with all its fields (as JSON) next to indexed
+columns for record_id, Team Code, Chosen Track and `modified`, which is the
+start of the sync that last brought the record in. The Airtable list API
+doesn't return a record's own modification time.
+
+sync() keeps the mirror current. The first sync reads the whole table.
+After that only records modified since the previous sync are read, using
+a LAST_MODIFIED_TIME() filter over all fields, so our own score
+write-backs come in too. They are then upserted. Deleted records never
+show up in a delta, so the whole table is read again (and replaced) once
+the last full read is older than AIRTABLE_MIRROR_FULL_SYNC_SECONDS. The
+records and the cursor are written in one transaction. Updates saved by
+services.airtable_writer are applied to the mirror as well (apply_updates),
+so a pass that reads it straight after another one wrote scores sees them
+without waiting for the next sync.
+
+services.airtable serves reads from here according to AIRTABLE_READ_SOURCE:
+
+- api:     always read Airtable (the default)
+- mirror:  sync a delta (at most once per AIRTABLE_MIRROR_SYNC_SECONDS), then
+           read SQLite
+- offline: read SQLite only, no Airtable requests at all
+
+Full-table and team reads come from the mirror. Team members are found with
+an indexed GROUP BY on Team Code, and teams of one are left out in SQL. Reads
+filtered by other formulas go to Airtable, and raise an error when offline.
+
+    python -m services.airtable_mirror          # delta sync (a full read the first time)
+    python -m services.airtable_mirror --full
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from config import settings
+from services import metrics
+from services.sync_state import to_iso, utc_now
+
+SOURCES = ("api", "mirror", "offline")
+
+# Members of teams with at least two applicants, in team order
+_TEAM_MEMBERS = (
+    "team_code IN (SELECT team_code FROM records WHERE team_code != '' "
+    "GROUP BY team_code HAVING COUNT(*) > 1)"
+)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _row(record, modified):
+    fields = record.get("fields", {})
+    return (
+        record["id"],
+        str(fields.get("Team Code") or "").strip(),
+        str(fields.get("Chosen Track") or ""),
+        modified,
+        json.dumps(fields, ensure_ascii=False),
+    )
+
+
+class AirtableMirror:
+    def __init__(self, path=None):
+        self.path = path or settings.AIRTABLE_MIRROR_PATH
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.synced_at = None  # when this process last synced, for AIRTABLE_MIRROR_SYNC_SECONDS
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                record_id TEXT PRIMARY KEY,
+                team_code TEXT NOT NULL,
+                chosen_track TEXT NOT NULL,
+                modified TEXT NOT NULL,
+                fields TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS records_team_code ON records (team_code)")
+        conn.execute("CREATE INDEX IF NOT EXISTS records_chosen_track ON records (chosen_track)")
+        conn.execute("CREATE INDEX IF NOT EXISTS records_modified ON records (modified)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn = conn
+        return conn
+
+    def _meta(self, key):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def cursor(self):
+        """
+        Start of the last finished sync (ISO 8601), or None before the first.
+        """
+        return self._meta("cursor")
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def sync(self, full=False):
+        """
+        Bring the mirror up to date from Airtable. Returns the number of
+        records read. Reads everything with `full`, on the first sync and
+        when the last full read is older than AIRTABLE_MIRROR_FULL_SYNC_SECONDS.
+        """
+        from services.airtable import iter_api_pages, modified_since
+
+        with self.lock:
+            started = utc_now()
+            cursor, full_at = self.cursor(), _parse_time(self._meta("full_sync_at"))
+            full = (full or cursor is None or full_at is None
+                    or started - full_at > timedelta(seconds=settings.AIRTABLE_MIRROR_FULL_SYNC_SECONDS))
+            formula = None
+            if not full:
+                since = _parse_time(cursor) - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+                formula = modified_since(to_iso(since))
+            modified = to_iso(started)
+            rows = [_row(record, modified) for page in iter_api_pages(formula=formula) for record in page]
+
+            conn = self._connection()
+            with conn:
+                if full:
+                    conn.execute("DELETE FROM records")
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('full_sync_at', ?)", (modified,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO records (record_id, team_code, chosen_track, modified, fields) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (modified,))
+            self.synced_at = started
+            metrics.increment("mirror_sync_records_total", len(rows), kind="full" if full else "delta")
+            print(f"Mirror {'full' if full else 'delta'} sync: {len(rows)} records read, {self.count()} in mirror")
+            return len(rows)
+
+    def apply_updates(self, records):
+        """
+        Merge saved Airtable updates ({"id", "fields"}) into the mirrored
+        records. Records not in the mirror yet are left for the next sync.
+        """
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                for record in records:
+                    row = conn.execute("SELECT modified, fields FROM records WHERE record_id = ?", (record["id"],)).fetchone()
+                    if row is None:
+                        continue
+                    modified, stored = row
+                    fields = dict(json.loads(stored), **record["fields"])
+                    conn.execute(
+                        "INSERT OR REPLACE INTO records (record_id, team_code, chosen_track, modified, fields) VALUES (?, ?, ?, ?, ?)",
+                        _row({"id": record["id"], "fields": fields}, modified),
+                    )
+
+    def ensure_current(self):
+        """
+        sync() unless this process synced within AIRTABLE_MIRROR_SYNC_SECONDS.
+        """
+        if self.synced_at is not None and utc_now() - self.synced_at < timedelta(seconds=settings.AIRTABLE_MIRROR_SYNC_SECONDS):
+            return
+        self.sync()
+
+    def iter_pages(self, fields=None, where=None, page_size=1000):
+        """
+        Yield records as Airtable-shaped pages ({"id", "fields"}, only
+        `fields` when given), optionally filtered by a SQL `where` clause on
+        the indexed columns. Ordered by team, so members arrive together.
+        """
+        query = "SELECT record_id, fields FROM records"
+        if where:
+            query += f" WHERE {where}"
+        query += " ORDER BY team_code, record_id"
+        rows = self._connection().execute(query)
+        while True:
+            with metrics.timer("fetch"):
+                chunk = rows.fetchmany(page_size)
+            if not chunk:
+                return
+            page = []
+            for record_id, stored in chunk:
+                record_fields = json.loads(stored)
+                if fields:
+                    record_fields = {field: record_fields[field] for field in fields if field in record_fields}
+                page.append({"id": record_id, "fields": record_fields})
+            metrics.increment("mirror_records_read_total", len(page))
+            yield page
+
+    def iter_team_pages(self, fields=None, page_size=1000):
+        """
+        Members of teams of two or more, grouped by Team Code in SQL.
+        """
+        yield from self.iter_pages(fields, _TEAM_MEMBERS, page_size)
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror():
+    global _mirror
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = AirtableMirror()
+    return _mirror
+
+
+def read_source():
+    source = settings.AIRTABLE_READ_SOURCE
+    if source not in SOURCES:
+        raise ValueError(f"Unknown AIRTABLE_READ_SOURCE {source!r}; expected one of {', '.join(SOURCES)}")
+    return source
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync the local SQLite mirror of the Airtable table")
+    parser.add_argument("--full", action="store_true", help="re-read the whole table instead of a delta")
+    args = parser.parse_args()
+    get_mirror().sync(full=args.full)
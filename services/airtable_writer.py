@@ -0,0 +1,112 @@
+import threading
+from services.airtable_mirror import get_mirror, read_source
+from services.clients import get_airtable_table
+from services.http_retry import call_with_retry
+from services import metrics
+
+# Airtable accepts at most 10 records per batch request
+AIRTABLE_BATCH_SIZE = 10
+
+
+class AirtableWriteQueue:
+    """
+    Buffers pending record updates and writes them with batch_update in
+    chunks of 10, paced and retried by the shared "airtable" limiter
+    (AIRTABLE_REQUESTS_PER_SECOND, the base's request limit).
+
+    Updates for the same record that are still pending are merged, so a record
+    is written once per flush. Records that fail are collected in `failures`
+    as {"record_id", "fields", "error"} dicts instead of being dropped.
+    When reads come from the local mirror (AIRTABLE_READ_SOURCE), saved
+    updates are applied to it too.
+    """
+
+    def __init__(self, table=None, batch_size=AIRTABLE_BATCH_SIZE):
+        if table is None:
+            table = get_airtable_table()
+        self.table = table
+        self.batch_size = min(batch_size, AIRTABLE_BATCH_SIZE)
+        self.pending = {}
+        self.callbacks = {}
+        self.failures = []
+        self.written = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def add(self, record_id, fields, on_written=None):
+        """
+        Queue an update. Full chunks are written straight away.
+        `on_written()` is called once the record has been saved.
+        """
+        with self.lock:
+            self.pending.setdefault(record_id, {}).update(fields)
+            if on_written is not None:
+                self.callbacks.setdefault(record_id, []).append(on_written)
+            if len(self.pending) < self.batch_size:
+                return
+            chunk = self._take(self.batch_size)
+        self._write_chunk(chunk)
+
+    def flush(self):
+        """
+        Write everything still pending. Returns the failures collected so far.
+        """
+        while True:
+            with self.lock:
+                chunk = self._take(self.batch_size)
+            if not chunk:
+                return self.failures
+            self._write_chunk(chunk)
+
+    def _take(self, count):
+        record_ids = list(self.pending)[:count]
+        return [{"id": record_id, "fields": self.pending.pop(record_id)} for record_id in record_ids]
+
+    def _request(self, fn, *args):
+        with self.lock:
+            self.requests += 1
+        with metrics.timer("write"):
+            return call_with_retry("airtable", fn, *args)
+
+    def _written(self, records):
+        with self.lock:
+            self.written += len(records)
+            callbacks = [cb for record in records for cb in self.callbacks.pop(record["id"], [])]
+        metrics.increment("records_written_total", len(records))
+        if read_source() != "api":
+            get_mirror().apply_updates(records)
+        for callback in callbacks:
+            callback()
+
+    def _write_chunk(self, chunk):
+        try:
+            self._request(self.table.batch_update, chunk)
+            self._written(chunk)
+            return
+        except Exception as e:
+            if len(chunk) == 1:
+                self._record_failure(chunk[0], e)
+                return
+
+        # One bad record fails the whole batch, so retry individually to find it
+        for record in chunk:
+            try:
+                self._request(self.table.update, record["id"], record["fields"])
+                self._written([record])
+            except Exception as e:
+                self._record_failure(record, e)
+
+    def _record_failure(self, record, error):
+        print(f"Error updating record {record['id']}: {error}")
+        with self.lock:
+            self.callbacks.pop(record["id"], None)
+            self.failures.append({"record_id": record["id"], "fields": record["fields"], "error": str(error)})
+
+    def summary(self):
+        return {"written": self.written, "failed": len(self.failures), "requests": self.requests}
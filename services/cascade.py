@@ -0,0 +1,164 @@
+"""
+Two-tier model cascade for evaluations.
+
+With EVAL_CASCADE, every prompt first goes to CASCADE_SMALL_MODEL with a
+short output allowance (CASCADE_SMALL_MAX_TOKENS) and a request for brief
+feedback. The small model's result is final unless it is uncertain:
+
+- cut_line:  the score is within CASCADE_CUT_MARGIN of CASCADE_CUT_LINE,
+             where Select turns into Waitlist (the main rule)
+- disagrees: the recommendation contradicts the score's side of the cut line
+- band:      the score is inside [CASCADE_BAND_LOW, CASCADE_BAND_HIGH], an
+             optional extra range that is off by default
+- unparsed:  no usable score came back
+
+Team replies carry a Select/Waitlist recommendation too, so the same rules
+apply to them.
+
+Uncertain prompts are re-run unchanged on the large model (services.ai_eval.MODEL)
+for the full evaluation. This module holds the policy and the per-tier
+report; services.ai_eval and services.ai_batch make the calls.
+"""
+import threading
+from config import settings
+from services import metrics
+
+SMALL, LARGE = "small", "large"
+
+# USD per million tokens: input, output, cache write, cache read
+MODEL_PRICES = {
+    "claude-3-5-sonnet-20241022": (3.00, 15.00, 3.75, 0.30),
+    "claude-3-5-haiku-20241022": (0.80, 4.00, 1.00, 0.08),
+}
+
+SHORT_OUTPUT_NOTE = "\n\nPRE-SCREEN: keep the feedback to two or three sentences."
+
+_lock = threading.Lock()
+_decisions = {"screened": 0, "escalated": 0}
+_reasons = {}
+_usage = {}  # tier -> {"model", "calls", "input_tokens", ...}
+_latency = {}  # tier -> metrics.Histogram of call seconds
+
+_enabled = settings.EVAL_CASCADE
+
+
+def configure(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def enabled():
+    return _enabled
+
+
+def thresholds():
+    return {
+        "small_model": settings.CASCADE_SMALL_MODEL,
+        "small_max_tokens": settings.CASCADE_SMALL_MAX_TOKENS,
+        "band": [settings.CASCADE_BAND_LOW, settings.CASCADE_BAND_HIGH],
+        "cut_line": settings.CASCADE_CUT_LINE,
+        "cut_margin": settings.CASCADE_CUT_MARGIN,
+    }
+
+
+def short_prompt(prompt):
+    """
+    The small-tier version of a built prompt: same rubric (so the cached
+    prefix is shared), with a note asking for brief feedback.
+    """
+    if not isinstance(prompt, dict):
+        return prompt + SHORT_OUTPUT_NOTE
+    messages = [dict(message) for message in prompt["messages"]]
+    messages[-1]["content"] = messages[-1]["content"] + SHORT_OUTPUT_NOTE
+    return dict(prompt, messages=messages)
+
+
+def escalation_reason(parsed):
+    """
+    Why a small-tier result (a response_parser.ParsedResponse) needs the
+    large model, or None if it can stand.
+    """
+    score = parsed.score
+    if score is None:
+        return "unparsed"
+    if abs(score - settings.CASCADE_CUT_LINE) <= settings.CASCADE_CUT_MARGIN:
+        return "cut_line"
+    if parsed.recommendation == "Select" and score < settings.CASCADE_CUT_LINE:
+        return "disagrees"
+    if parsed.recommendation == "Waitlist" and score > settings.CASCADE_CUT_LINE:
+        return "disagrees"
+    if settings.CASCADE_BAND_HIGH > 0 and settings.CASCADE_BAND_LOW <= score <= settings.CASCADE_BAND_HIGH:
+        return "band"
+    return None
+
+
+def record_decision(reason):
+    with _lock:
+        if reason is None:
+            _decisions["screened"] += 1
+        else:
+            _decisions["escalated"] += 1
+            _reasons[reason] = _reasons.get(reason, 0) + 1
+    metrics.increment("cascade_decisions_total", result="screened" if reason is None else f"escalated_{reason}")
+
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def record_call(tier, model, seconds=None, usage=None):
+    """
+    One `tier` request to `model`: its wall time (None for batch requests)
+    and token usage (None for an LLM-cache hit).
+    """
+    if seconds is not None:
+        metrics.observe("cascade_tier_seconds", seconds, tier=tier)
+    with _lock:
+        totals = _usage.setdefault(tier, dict(dict.fromkeys(USAGE_FIELDS, 0), model=model, calls=0))
+        totals["calls"] += 1
+        for field in USAGE_FIELDS:
+            totals[field] += getattr(usage, field, None) or 0
+        if seconds is not None:
+            _latency.setdefault(tier, metrics.Histogram()).observe(seconds)
+
+
+def cost(model, totals):
+    """
+    USD for the token totals at MODEL_PRICES, or None for an unknown model.
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return round(sum(totals.get(field, 0) * price for field, price in zip(USAGE_FIELDS, prices)) / 1_000_000, 4)
+
+
+def reset():
+    with _lock:
+        _decisions.update(screened=0, escalated=0)
+        _reasons.clear()
+        _usage.clear()
+        _latency.clear()
+
+
+def summary():
+    """
+    Thresholds, screened/escalated counts (by reason) and per-tier calls,
+    latency, tokens and cost. `large_only_cost_usd` estimates what scoring
+    every item on the large model would have cost, from its average per call.
+    """
+    with _lock:
+        decisions, reasons = dict(_decisions), dict(_reasons)
+        usage = {tier: dict(totals) for tier, totals in _usage.items()}
+        latency = {tier: histogram.summary() for tier, histogram in _latency.items()}
+    tiers = {}
+    for tier, totals in usage.items():
+        timing = latency.get(tier, {})
+        tiers[tier] = dict(totals, cost_usd=cost(totals["model"], totals),
+                           p50_seconds=timing.get("p50"), p90_seconds=timing.get("p90"))
+    report = {"thresholds": thresholds(), **decisions, "reasons": reasons, "tiers": tiers}
+    total_cost = sum(tier["cost_usd"] or 0 for tier in tiers.values())
+    large = tiers.get(LARGE)
+    items = decisions["screened"] + decisions["escalated"]
+    if large and large["calls"] and large["cost_usd"] is not None:
+        report["cost_usd"] = round(total_cost, 4)
+        report["large_only_cost_usd"] = round(large["cost_usd"] / large["calls"] * items, 4)
+    return report
@@ -0,0 +1,80 @@
+"""
+Registry of long-lived API clients.
+
+Every service module gets its clients from here instead of building new ones
+per call, so TCP/TLS connections are kept alive and reused across applicants.
+Clients are created lazily on first use and shared by all threads.
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config import settings
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+
+def _build_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "technical-evaluation-airtable"})
+    return session
+
+
+def _build_anthropic_client():
+    from anthropic import Anthropic
+    # Retries are handled by services.http_retry, which also tracks the rate-limit headers
+    return Anthropic(api_key=settings.CLAUDE_API_KEY, base_url=settings.ANTHROPIC_BASE_URL, max_retries=0)
+
+
+def _build_airtable_api():
+    from pyairtable import Api
+    return Api(
+        settings.AIRTABLE_API_KEY,
+        timeout=(settings.HTTP_TIMEOUT, settings.HTTP_TIMEOUT),
+        endpoint_url=settings.AIRTABLE_ENDPOINT_URL,
+    )
+
+
+def get_http_session():
+    """
+    Shared keep-alive requests.Session for plain HTTP calls (GitHub).
+    """
+    return _get_or_create("http", _build_http_session)
+
+
+def get_anthropic_client():
+    """
+    Shared Anthropic client.
+    """
+    return _get_or_create("anthropic", _build_anthropic_client)
+
+
+def get_airtable_api():
+    """
+    Shared pyairtable Api (one pooled session for all tables).
+    """
+    return _get_or_create("airtable", _build_airtable_api)
+
+
+def get_airtable_table(base_id=None, table_name=None):
+    """
+    Applicant table on the shared Airtable Api.
+    """
+    return get_airtable_api().table(base_id or settings.AIRTABLE_BASE_ID, table_name or settings.AIRTABLE_TABLE_NAME)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import settings
+from services import github, github_graphql, metrics
+from services.airtable import FIELDS_TO_FETCH, PROJECT_REPO_FIELD
+
+# Bump when the prompt or scoring changes so every applicant is re-scored once
+FINGERPRINT_VERSION = "1"
+
+
+class GitHubPrefetcher:
+    """
+    Fetches GitHub profiles and repos on a bounded thread pool, once per
+    unique (normalized) username or repo for the lifetime of the prefetcher.
+
+    Concurrent requests for the same key share one in-flight fetch, so
+    teammates linking the same project repo cost a single lookup.
+
+    With GITHUB_TOKEN set, lookups are queued and sent as aliased GraphQL
+    queries of GITHUB_GRAPHQL_BATCH_SIZE (see services.github_graphql);
+    otherwise each one goes through the REST/scraping helpers.
+    """
+
+    def __init__(self, max_workers=None, use_graphql=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or settings.GITHUB_PREFETCH_WORKERS)
+        self.use_graphql = github_graphql.is_available() if use_graphql is None else use_graphql
+        self.futures = {}
+        self.pending = {}  # GraphQL lookups queued but not yet sent
+        self.lock = threading.Lock()
+
+    def _submit(self, key, fn, arg):
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                future = self.executor.submit(fn, arg)
+                self.futures[key] = future
+        return future
+
+    def _queue(self, key):
+        with self.lock:
+            future = self.futures.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self.futures[key] = future
+            self.pending[key] = future
+            full = len(self.pending) >= settings.GITHUB_GRAPHQL_BATCH_SIZE
+        if full:
+            self.flush()
+        return future
+
+    def flush(self):
+        """
+        Send all queued GraphQL lookups as one batch.
+        """
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        if batch:
+            self.executor.submit(self._run_graphql_batch, batch)
+
+    def _run_graphql_batch(self, batch):
+        usernames = [name for kind, name in batch if kind == "profile"]
+        repos = [name for kind, name in batch if kind == "repo"]
+        try:
+            profiles, repo_infos = github_graphql.fetch_batch(usernames, repos)
+        except Exception as e:
+            for future in batch.values():
+                future.set_result({"error": str(e)})
+            return
+        for (kind, name), future in batch.items():
+            results = profiles if kind == "profile" else repo_infos
+            future.set_result(results.get(name, {"error": "missing from GraphQL response"}))
+
+    def _profile_future(self, github_url):
+        if not github_url or not github_url.strip():
+            return None
+        username = github.normalize_username(github_url)
+        if self.use_graphql:
+            return self._queue(("profile", username))
+        return self._submit(("profile", username), github.fetch_github_profile, github_url)
+
+    def _repo_future(self, github_repo):
+        if not github_repo or not github_repo.strip():
+            return None
+        full_name = github.normalize_repo(github_repo)
+        if self.use_graphql and full_name:
+            return self._queue(("repo", full_name))
+        return self._submit(("repo", full_name or github_repo.strip()), github.fetch_repo_info, github_repo)
+
+    def _result(self, future):
+        if future is None:
+            return {}
+        if not future.done():
+            # Don't wait for a partially filled GraphQL batch to fill up
+            self.flush()
+        return future.result()
+
+    def prefetch(self, applicants):
+        """
+        Start fetching every unique profile/repo referenced by `applicants`.
+        Returns the number of unique lookups scheduled so far.
+        """
+        for applicant in applicants:
+            self._profile_future(applicant.get("GitHub URL", ""))
+            self._repo_future(applicant.get(PROJECT_REPO_FIELD, ""))
+        return len(self.futures)
+
+    def enrich(self, applicant):
+        """
+        Attach the (prefetched) GitHub data to one applicant, waiting for it if needed.
+        """
+        if "github_profile" not in applicant:
+            applicant["github_profile"] = self._result(self._profile_future(applicant.get("GitHub URL", "")))
+        if "repo_info" not in applicant:
+            applicant["repo_info"] = self._result(self._repo_future(applicant.get(PROJECT_REPO_FIELD, "")))
+        return applicant
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(wait=False)
+
+
+def enrich_applicants(applicants, prefetcher=None):
+    """
+    Deduplicate and fetch all GitHub data for `applicants` concurrently, then
+    attach it to each applicant in place. Returns the list.
+    """
+    applicants = list(applicants)
+    owns_prefetcher = prefetcher is None
+    prefetcher = prefetcher or GitHubPrefetcher()
+    try:
+        unique = prefetcher.prefetch(applicants)
+        print(f"Fetching GitHub data: {unique} unique lookups for {len(applicants)} applicants")
+        for applicant in applicants:
+            enrich_applicant(applicant, prefetcher)
+    finally:
+        if owns_prefetcher:
+            prefetcher.close()
+    return applicants
+
+
+def enrich_applicant(applicant, prefetcher=None):
+    """
+    Attach GitHub profile and repo data to the applicant dict (in place) under
+    "github_profile" and "repo_info", the keys the prompt builder reads.
+    """
+    with metrics.timer("enrich"):
+        if prefetcher is not None:
+            return prefetcher.enrich(applicant)
+        return _fetch_github_data(applicant)
+
+
+def _fetch_github_data(applicant):
+    github_url = applicant.get("GitHub URL", "")
+    github_repo = applicant.get(PROJECT_REPO_FIELD, "")
+    if "github_profile" not in applicant:
+        applicant["github_profile"] = github.fetch_github_profile(github_url) if github_url else {}
+    if "repo_info" not in applicant:
+        applicant["repo_info"] = github.fetch_repo_info(github_repo) if github_repo else {}
+    return applicant
+
+
+def compute_fingerprint(applicant):
+    """
+    Hash of everything that feeds the evaluation: the fetched Airtable fields
+    plus the GitHub data. Errors from GitHub are left out so a transient
+    failure doesn't look like a change.
+    """
+    payload = {
+        "version": FINGERPRINT_VERSION,
+        "fields": {field: applicant.get(field, "") for field in FIELDS_TO_FETCH},
+        "github_profile": _without_error(applicant.get("github_profile")),
+        "repo_info": _without_error(applicant.get("repo_info")),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _without_error(data):
+    if not data or "error" in data:
+        return {}
+    return data
+
+
+def needs_evaluation(applicant, fingerprint, force=False):
+    """
+    True unless the applicant already has a score computed from identical inputs.
+    """
+    if force:
+        return True
+    has_score = applicant.get("Individual Score") not in (None, "")
+    return not has_score or applicant.get("Evaluation Fingerprint") != fingerprint
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import settings
+
+
+def run_bounded(items, worker, max_concurrency=None):
+    """
+    Run worker(item) for every item with at most `max_concurrency` calls in flight.
+
+    Items are pulled lazily, so `items` can be a generator. The
+    tokens-per-minute budget is charged by the worker right before its LLM
+    call (see test_scripts.eval_pipeline.score_applicant), so items that are
+    skipped or replayed from a journal don't use any of it.
+
+    Yields (item, result, error) tuples in completion order. Exactly one of
+    result/error is meaningful; a failing item never stops the run.
+    """
+    if max_concurrency is None:
+        max_concurrency = settings.EVAL_MAX_CONCURRENCY
+    max_concurrency = max(1, int(max_concurrency))
+
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight = {}
+
+        def submit_next():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return False
+            in_flight[executor.submit(worker, item)] = item
+            return True
+
+        # Fill the pool, then top it up one-for-one as calls complete
+        while len(in_flight) < max_concurrency and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+                submit_next()
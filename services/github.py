@@ -1,5 +1,38 @@
-import requests
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
+from config import settings
+from services.github_cache import cached_get
+from services.repo_activity import fetch_activity
+from services.readme import fetch_condensed_readme
+
+
+def normalize_username(username_or_url):
+    """
+    "https://github.com/Foo/", "github.com/foo?tab=repositories" and "foo" all become "foo".
+    """
+    value = username_or_url.strip()
+    if "github.com/" in value:
+        value = value.split("github.com/")[-1]
+    value = value.split("?")[0].split("#")[0].strip("/").lstrip("@")
+    return value.split("/")[0].lower()
+
+
+def normalize_repo(repo_url):
+    """
+    Return "owner/repo" (lower-cased, without .git) for a GitHub repo URL, or None if it isn't one.
+    """
+    url = repo_url.strip().rstrip("/")
+    if not url.startswith(("http://", "https://")):
+        url = "https://" + url
+    parsed = urlparse(url)
+    path_parts = parsed.path.strip("/").split("/")
+    if len(path_parts) < 2 or parsed.netloc.lower() not in ("github.com", "www.github.com"):
+        return None
+    owner, repo = path_parts[0], path_parts[1]
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return f"{owner}/{repo}".lower()
+
 
 def fetch_github_profile(username_or_url):
     """
@@ -17,13 +50,10 @@ def fetch_github_profile(username_or_url):
         }
 
     try:
-        if "github.com/" in username_or_url:
-            username = username_or_url.strip().split("github.com/")[-1].strip("/")
-        else:
-            username = username_or_url.strip()
+        username = normalize_username(username_or_url)
 
-        url = f"https://github.com/{username}"
-        res = requests.get(url)
+        url = f"{settings.GITHUB_WEB_URL}/{username}"
+        res = cached_get(url)
         soup = BeautifulSoup(res.text, 'html.parser')
 
         name = soup.select_one('span.p-name')
@@ -59,34 +89,33 @@ def fetch_repo_info(repo_url):
         }
     
     try:
-        parts = repo_url.strip("/").split("/")
-        if len(parts) < 2:
+        full_name = normalize_repo(repo_url)
+        if not full_name:
             return {"error": "Invalid GitHub repo URL"}
 
-        owner, repo = parts[-2], parts[-1]
-        repo_api_url = f"https://api.github.com/repos/{owner}/{repo}"
-        commits_api_url = f"{repo_api_url}/commits?per_page=100"
-
-        repo_resp = requests.get(repo_api_url)
-        commits_resp = requests.get(commits_api_url)
-
+        repo_api_url = f"{settings.GITHUB_API_URL}/repos/{full_name}"
+        repo_resp = cached_get(repo_api_url)
         if repo_resp.status_code != 200:
             return {"error": f"Repo API returned status {repo_resp.status_code}"}
-        if commits_resp.status_code != 200:
-            return {"error": f"Commits API returned status {commits_resp.status_code}"}
+
+        # Exact commit count and last commit from a one-commit page
+        activity = fetch_activity(full_name)
+        if "error" in activity:
+            return activity
 
         repo_data = repo_resp.json()
-        commits_data = commits_resp.json()
 
-        return {
+        result = {
             "repo_name": repo_data.get("name"),
             "stars": repo_data.get("stargazers_count", 0),
             "forks": repo_data.get("forks_count", 0),
             "watchers": repo_data.get("watchers_count", 0),
             "language": repo_data.get("language", ""),
-            "commit_count": len(commits_data),
-            "last_commit_date": commits_data[0]['commit']['committer']['date'] if commits_data else None,
+            **activity,
         }
+        if settings.PROMPT_README_TOKENS > 0:
+            result.update(fetch_condensed_readme(full_name))
+        return result
 
     except Exception as e:
         return {"error": str(e)}
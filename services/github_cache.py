@@ -0,0 +1,201 @@
+"""
+Persistent cache for GitHub HTTP responses.
+
+Two tiers: an in-process LRU in front of a SQLite table on disk. Entries are
+served without any request until GITHUB_CACHE_TTL expires; after that they
+are revalidated with If-None-Match, and a 304 (which GitHub does not count
+against the rate limit for authenticated requests) just refreshes the entry.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import settings
+from services.http_retry import request
+from services import metrics
+
+# Statuses worth remembering. 404 is cached so missing profiles/repos are not re-queried.
+CACHEABLE_STATUSES = {200, 404}
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for requests.Response built from a cache entry.
+    """
+
+    def __init__(self, status_code, text, headers, etag=None, fetched_at=None, from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.etag = etag
+        self.fetched_at = fetched_at or time.time()
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class GitHubCache:
+    def __init__(self, path=None, ttl=None, memory_size=None):
+        self.path = path or settings.GITHUB_CACHE_PATH
+        self.ttl = settings.GITHUB_CACHE_TTL if ttl is None else ttl
+        self.memory_size = settings.GITHUB_CACHE_MEMORY_SIZE if memory_size is None else memory_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "revalidated": 0, "misses": 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                etag TEXT,
+                headers TEXT,
+                body TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared across threads
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn = conn
+        return conn
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry, "memory"
+
+        row = self._connection().execute(
+            "SELECT status, etag, headers, body, fetched_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        status, etag, headers, body, fetched_at = row
+        entry = CachedResponse(status, body, json.loads(headers or "{}"), etag, fetched_at, from_cache=True)
+        self._remember(key, entry)
+        return entry, "disk"
+
+    def store(self, key, entry):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, status, etag, headers, body, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry.status_code, entry.etag, json.dumps(dict(entry.headers)), entry.text, entry.fetched_at),
+        )
+        conn.commit()
+        self._remember(key, entry)
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+        metrics.increment("github_cache_total", result=stat)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def get(self, url, headers=None):
+        """
+        GET `url` through the cache. Returns a CachedResponse.
+        """
+        key = normalize_url(url)
+        entry, tier = self.lookup(key)
+        if entry is not None and self.is_fresh(entry):
+            self._count("memory_hits" if tier == "memory" else "disk_hits")
+            return entry
+
+        request_headers = dict(headers or {})
+        if entry is not None and entry.etag:
+            request_headers["If-None-Match"] = entry.etag
+
+        res = request("github", "GET", url, headers=request_headers)
+
+        if res.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            refreshed = CachedResponse(entry.status_code, entry.text, entry.headers, entry.etag, time.time(), from_cache=True)
+            self.store(key, refreshed)
+            return refreshed
+
+        self._count("misses")
+        fresh = CachedResponse(res.status_code, res.text, _response_headers(res), res.headers.get("ETag"))
+        if res.status_code in CACHEABLE_STATUSES:
+            self.store(key, fresh)
+        return fresh
+
+
+    def get_value(self, key):
+        """
+        Fresh JSON value stored with put_value(), or None.
+        """
+        entry, tier = self.lookup(key)
+        if entry is None or not self.is_fresh(entry):
+            self._count("misses")
+            return None
+        self._count("memory_hits" if tier == "memory" else "disk_hits")
+        return entry.json()
+
+    def put_value(self, key, value):
+        """
+        Store a JSON-serializable result (e.g. parsed GraphQL data) under `key`.
+        """
+        self.store(key, CachedResponse(200, json.dumps(value), {}))
+
+
+def _response_headers(res):
+    # Keep only what callers read back; rate-limit headers are stale once cached
+    keep = ("Content-Type", "ETag", "Link", "Last-Modified")
+    return {name: res.headers[name] for name in keep if name in res.headers}
+
+
+def normalize_url(url):
+    """
+    Cache key for a GitHub URL. Owner and repo names are case-insensitive on
+    GitHub, so the path is lower-cased; the query string is kept as-is.
+    """
+    base, _, query = url.strip().partition("?")
+    base = base.rstrip("/").lower()
+    return f"{base}?{query}" if query else base
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GitHubCache()
+    return _cache
+
+
+def cached_get(url, headers=None):
+    """
+    GET a GitHub URL through the shared cache, or straight through the
+    rate-limited session when caching is disabled (GITHUB_CACHE_TTL=0).
+    """
+    if settings.GITHUB_CACHE_TTL <= 0:
+        return request("github", "GET", url, headers=headers)
+    return get_cache().get(url, headers=headers)
@@ -0,0 +1,196 @@
+"""
+GitHub GraphQL enrichment backend.
+
+Fetches profiles, repo stats, commit counts and (with PROMPT_README_TOKENS)
+README text for many applicants in one aliased query per
+GITHUB_GRAPHQL_BATCH_SIZE lookups, instead of one HTML scrape plus 2-3 REST
+calls per applicant. Requires
+GITHUB_TOKEN (GraphQL has no anonymous access). Results are returned in the
+same shape as services.github / services.github_repo and cached per
+username/repo in the GitHub cache.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from config import settings
+from services.http_retry import request
+from services.github_cache import get_cache
+from services.readme import condense
+
+_USER_FIELDS = """
+    login
+    name
+    bio
+    followers { totalCount }
+    repositories(privacy: PUBLIC) { totalCount }
+"""
+
+_REPO_FIELDS = """
+    name
+    stargazerCount
+    forkCount
+    watchers { totalCount }
+    primaryLanguage { name }
+    pushedAt
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: 1) { totalCount nodes { committedDate } }
+        }
+      }
+    }
+"""
+
+# Only asked for when READMEs go into prompts (PROMPT_README_TOKENS)
+_README_FIELD = """
+    readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+"""
+
+# Commits in the last 4 / 52 weeks, the GraphQL side of GITHUB_ACTIVITY_STATS
+_ACTIVITY_FIELDS = """
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          recent: history(since: %(recent)s) { totalCount }
+          year: history(since: %(year)s) { totalCount }
+        }
+      }
+    }
+"""
+
+
+def _repo_fields():
+    fields = _REPO_FIELDS
+    if settings.PROMPT_README_TOKENS > 0:
+        fields += _README_FIELD
+    if settings.GITHUB_ACTIVITY_STATS:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        since = {
+            "recent": _literal((now - timedelta(weeks=4)).isoformat()),
+            "year": _literal((now - timedelta(weeks=52)).isoformat()),
+        }
+        fields += _ACTIVITY_FIELDS % since
+    return fields
+
+
+def is_available():
+    return bool(settings.GITHUB_TOKEN)
+
+
+def _literal(value):
+    # JSON string escaping is valid GraphQL string syntax
+    return json.dumps(value)
+
+
+def build_query(usernames, repos):
+    """
+    One query with an alias per lookup: u0..uN for users, r0..rN for repos ("owner/repo").
+    """
+    parts = []
+    repo_fields = _repo_fields()
+    for n, username in enumerate(usernames):
+        parts.append(f"u{n}: user(login: {_literal(username)}) {{{_USER_FIELDS}}}")
+    for n, full_name in enumerate(repos):
+        owner, name = full_name.split("/", 1)
+        parts.append(f"r{n}: repository(owner: {_literal(owner)}, name: {_literal(name)}) {{{repo_fields}}}")
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+
+def _profile_from_node(username, node):
+    if node is None:
+        return {"error": f"GitHub user {username} not found"}
+    return {
+        "username": node.get("login") or username,
+        "name": node.get("name") or "",
+        "bio": node.get("bio") or "",
+        "followers": (node.get("followers") or {}).get("totalCount", 0),
+        "repo_count": (node.get("repositories") or {}).get("totalCount", 0),
+    }
+
+
+def _repo_from_node(full_name, node):
+    if node is None:
+        return {"error": f"GitHub repo {full_name} not found"}
+    target = ((node.get("defaultBranchRef") or {}).get("target") or {})
+    history = target.get("history") or {}
+    commits = history.get("nodes") or []
+    readme = node.get("readme") or {}
+    info = {
+        "repo_name": node.get("name"),
+        "stars": node.get("stargazerCount", 0),
+        "forks": node.get("forkCount", 0),
+        "watchers": (node.get("watchers") or {}).get("totalCount", 0),
+        "language": (node.get("primaryLanguage") or {}).get("name", ""),
+        "commit_count": history.get("totalCount", 0),
+        "last_commit_date": commits[0]["committedDate"] if commits else node.get("pushedAt"),
+        # GraphQL can't cut the blob server-side; condense before it is cached
+        "readme_content": condense(readme["text"]) if readme.get("text") is not None else None,
+        "readme_filename": "README.md" if readme.get("text") is not None else None,
+    }
+    if "recent" in target:
+        info["commits_last_4_weeks"] = (target.get("recent") or {}).get("totalCount")
+        info["commits_last_year"] = (target.get("year") or {}).get("totalCount")
+    return info
+
+
+def _run_query(query):
+    res = request(
+        "github_graphql",
+        "POST",
+        settings.GITHUB_GRAPHQL_URL,
+        json={"query": query},
+        headers={"Authorization": f"bearer {settings.GITHUB_TOKEN}"},
+    )
+    if res.status_code != 200:
+        raise RuntimeError(f"GraphQL API returned status {res.status_code}")
+    # NOT_FOUND errors come back alongside partial data; the alias is then null
+    return res.json().get("data") or {}
+
+
+def fetch_batch(usernames=(), repos=()):
+    """
+    Look up normalized usernames and "owner/repo" names.
+    Returns ({username: profile}, {full_name: repo_info}); lookups that fail
+    are returned as {"error": ...} like the REST helpers do.
+    """
+    cache = get_cache() if settings.GITHUB_CACHE_TTL > 0 else None
+    profiles, repo_infos = {}, {}
+
+    if cache is not None:
+        for username in usernames:
+            cached = cache.get_value(f"graphql:user:{username}")
+            if cached is not None:
+                profiles[username] = cached
+        for full_name in repos:
+            cached = cache.get_value(f"graphql:repo:{full_name}")
+            if cached is not None:
+                repo_infos[full_name] = cached
+
+    missing_users = [username for username in dict.fromkeys(usernames) if username not in profiles]
+    missing_repos = [full_name for full_name in dict.fromkeys(repos) if full_name not in repo_infos]
+    batch_size = max(1, settings.GITHUB_GRAPHQL_BATCH_SIZE)
+
+    while missing_users or missing_repos:
+        chunk_users = missing_users[:batch_size]
+        chunk_repos = missing_repos[:batch_size - len(chunk_users)]
+        missing_users = missing_users[len(chunk_users):]
+        missing_repos = missing_repos[len(chunk_repos):]
+
+        try:
+            data = _run_query(build_query(chunk_users, chunk_repos))
+        except Exception as e:
+            for username in chunk_users:
+                profiles[username] = {"error": str(e)}
+            for full_name in chunk_repos:
+                repo_infos[full_name] = {"error": str(e)}
+            continue
+
+        for n, username in enumerate(chunk_users):
+            profiles[username] = _profile_from_node(username, data.get(f"u{n}"))
+            if cache is not None and "error" not in profiles[username]:
+                cache.put_value(f"graphql:user:{username}", profiles[username])
+        for n, full_name in enumerate(chunk_repos):
+            repo_infos[full_name] = _repo_from_node(full_name, data.get(f"r{n}"))
+            if cache is not None and "error" not in repo_infos[full_name]:
+                cache.put_value(f"graphql:repo:{full_name}", repo_infos[full_name])
+
+    return profiles, repo_infos
@@ -1,11 +1,13 @@
-import requests
-import base64
-from urllib.parse import urlparse
+from config import settings
+from services.github import normalize_repo
+from services.github_cache import cached_get
+from services.repo_activity import fetch_activity
+from services.readme import fetch_condensed_readme
 
 def fetch_repo_info(repo_url, include_readme=True):
     """
     Fetch public GitHub project repo info via API:
-    - stars, forks, watchers, language, last commit date, README content
+    - stars, forks, watchers, language, commit count, last commit date, README content
     
     Args:
         repo_url (str): GitHub repository URL
@@ -18,34 +20,25 @@ def fetch_repo_info(repo_url, include_readme=True):
             "forks": 0,
             "watchers": 0,
             "language": "",
+            "commit_count": 0,
             "last_commit_date": None,
             "readme_content": None,
             "readme_filename": None
         }
     
     try:
-        # More robust URL parsing
-        url = repo_url.strip().rstrip('/')
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        
-        if len(path_parts) < 2 or parsed.netloc != 'github.com':
+        full_name = normalize_repo(repo_url)
+        if not full_name:
             return {"error": "Invalid GitHub repo URL"}
 
-        owner, repo = path_parts[0], path_parts[1]
-        # Remove .git suffix if present
-        if repo.endswith('.git'):
-            repo = repo[:-4]
+        owner, repo = full_name.split('/')
             
-        repo_api_url = f"https://api.github.com/repos/{owner}/{repo}"
+        repo_api_url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}"
         
         # Add headers for better rate limiting
         headers = {'Accept': 'application/vnd.github.v3+json'}
         
-        repo_resp = requests.get(repo_api_url, headers=headers)
+        repo_resp = cached_get(repo_api_url, headers=headers)
         
         if repo_resp.status_code != 200:
             return {"error": f"Repo API returned status {repo_resp.status_code}"}
@@ -59,10 +52,16 @@ def fetch_repo_info(repo_url, include_readme=True):
             "forks": repo_data.get("forks_count", 0),
             "watchers": repo_data.get("watchers_count", 0),
             "language": repo_data.get("language", ""),
+            "commit_count": None,
             "last_commit_date": repo_data.get('pushed_at'),
             "readme_content": None,
             "readme_filename": None
         }
+
+        # A failed activity lookup leaves the count unknown rather than failing the repo
+        activity = fetch_activity(full_name, headers)
+        if "error" not in activity:
+            result.update(activity)
         
         # Fetch README if requested
         if include_readme:
@@ -77,37 +76,15 @@ def fetch_repo_info(repo_url, include_readme=True):
 
 def fetch_readme(owner, repo, headers):
     """
-    Fetch README content from a GitHub repository using the direct README endpoint.
+    README of a GitHub repository, streamed up to README_MAX_BYTES and
+    condensed (see services.readme); cached per head commit.
     """
-    try:
-        # Direct README endpoint - GitHub automatically finds the README file
-        readme_url = f"https://api.github.com/repos/{owner}/{repo}/readme"
-        readme_resp = requests.get(readme_url, headers=headers)
-        
-        if readme_resp.status_code == 200:
-            readme_data = readme_resp.json()
-            
-            # README content is base64 encoded
-            if readme_data.get('content'):
-                content = base64.b64decode(readme_data['content']).decode('utf-8')
-                return {
-                    "readme_content": content,
-                    "readme_filename": readme_data.get('name', 'README')
-                }
-                
-    except Exception:
-        pass
-    
-    # No README found or error occurred
-    return {
-        "readme_content": None,
-        "readme_filename": None
-    }
+    return fetch_condensed_readme(f"{owner}/{repo}", headers)
 
 
 def fetch_readme_only(repo_url):
     """
-    Convenience function to fetch only README content
+    Convenience function to fetch only the condensed README content
     """
     result = fetch_repo_info(repo_url, include_readme=True)
     
@@ -0,0 +1,305 @@
+"""
+Rate-limit-aware calling layer shared by the GitHub, Airtable and Anthropic clients.
+
+Every call goes through a per-service limiter that combines
+- a token bucket pacing the request rate,
+- an adaptive concurrency limit (halved on throttling, grown back by one on
+  success while the service reports headroom), and
+- a pause until the reset time when a service reports no requests left.
+
+Throttling and transient failures (429, 403 with an exhausted GitHub quota,
+5xx, 529 overloaded, connection errors) are retried with jittered exponential
+backoff, honouring Retry-After and the services' reset headers. Other errors
+are raised/returned to the caller unchanged.
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from config import settings
+from services.clients import get_http_session
+from services.rate_limit import TokenBucket
+from services import metrics
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# (remaining, limit, reset) header names per service
+_QUOTA_HEADERS = {
+    "github": [("X-RateLimit-Remaining", "X-RateLimit-Limit", "X-RateLimit-Reset")],
+    "github_graphql": [("X-RateLimit-Remaining", "X-RateLimit-Limit", "X-RateLimit-Reset")],
+    "anthropic": [
+        ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-reset"),
+        ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-tokens-reset"),
+        ("anthropic-ratelimit-input-tokens-remaining", "anthropic-ratelimit-input-tokens-limit", "anthropic-ratelimit-input-tokens-reset"),
+        ("anthropic-ratelimit-output-tokens-remaining", "anthropic-ratelimit-output-tokens-limit", "anthropic-ratelimit-output-tokens-reset"),
+    ],
+    "airtable": [],
+}
+
+# Below this share of quota left, concurrency is cut back
+LOW_HEADROOM = 0.1
+
+# Share of AIRTABLE_REQUESTS_PER_SECOND the limiter sends
+AIRTABLE_PACE = 0.9
+
+
+class RetryableStatus(Exception):
+    """
+    Raised internally when a plain HTTP response has a retryable status.
+    """
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class ServiceLimiter:
+    def __init__(self, name, requests_per_second, burst, max_concurrency):
+        self.name = name
+        self.bucket = TokenBucket(rate=requests_per_second, capacity=max(1.0, burst))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.concurrency = self.max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def acquire(self):
+        while True:
+            with self.condition:
+                pause = self.paused_until - time.time()
+                if pause <= 0 and self.in_flight < self.concurrency:
+                    self.in_flight += 1
+                    break
+                if pause <= 0:
+                    self.condition.wait(timeout=1.0)
+                    continue
+            time.sleep(min(pause, 5.0))
+        self.bucket.acquire()
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def count(self, stat):
+        with self.condition:
+            self.stats[stat] += 1
+        metrics.increment(f"http_{stat}_total", service=self.name)
+
+    def throttled(self, delay):
+        """
+        The service pushed back: halve concurrency and hold new calls for `delay` seconds.
+        """
+        with self.condition:
+            self.stats["throttled"] += 1
+            self.concurrency = max(1, self.concurrency // 2)
+            self.paused_until = max(self.paused_until, time.time() + delay)
+        metrics.increment("http_throttled_total", service=self.name)
+
+    def succeeded(self, headroom):
+        with self.condition:
+            if headroom is None or headroom > LOW_HEADROOM:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            else:
+                self.concurrency = max(1, self.concurrency - 1)
+            self.condition.notify_all()
+
+    def observe(self, headers):
+        """
+        Read quota headers from a response. Returns the smallest remaining/limit
+        ratio reported (None if the service sent none). When a quota is used up,
+        calls are paused until it resets. With little left, the request rate
+        is spread over the time left in the window; it returns to the
+        configured rate when the window resets or the headroom is back.
+        """
+        if not headers:
+            return None
+        headroom = None
+        for remaining_name, limit_name, reset_name in _QUOTA_HEADERS.get(self.name, []):
+            remaining = _number(headers.get(remaining_name))
+            limit = _number(headers.get(limit_name))
+            if remaining is None or not limit:
+                continue
+            ratio = remaining / limit
+            headroom = ratio if headroom is None else min(headroom, ratio)
+            reset_in = _seconds_until(headers.get(reset_name))
+            if remaining <= 0 and reset_in:
+                with self.condition:
+                    self.paused_until = max(self.paused_until, time.time() + reset_in)
+            elif remaining_name.endswith(("requests-remaining", "RateLimit-Remaining")):
+                if ratio <= LOW_HEADROOM and reset_in:
+                    # Stretch what's left over the rest of the window
+                    self.bucket.slow_down(remaining / reset_in, reset_in)
+                elif ratio > LOW_HEADROOM:
+                    self.bucket.restore_rate()
+        return headroom
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until(value):
+    """
+    Reset headers are either epoch seconds (GitHub) or RFC 3339 timestamps (Anthropic).
+    """
+    if not value:
+        return None
+    number = _number(value)
+    if number is not None:
+        return max(0.0, number - time.time()) if number > 1e9 else max(0.0, number)
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, reset_at.timestamp() - time.time())
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _default_limits(service):
+    """
+    (requests per second, burst, max concurrency) for a service.
+    """
+    if service.startswith("github"):
+        rate = settings.GITHUB_REQUESTS_PER_SECOND
+        return rate, rate, settings.GITHUB_PREFETCH_WORKERS
+    if service == "airtable":
+        # Airtable counts requests per second with no burst allowance (a 429
+        # locks the base out for 30 s), so requests are spaced evenly and a
+        # little under the limit, which network jitter would otherwise push
+        # two requests' worth into one second
+        rate = settings.AIRTABLE_REQUESTS_PER_SECOND
+        return rate * AIRTABLE_PACE, 1.0, rate
+    if service == "anthropic":
+        # Anthropic replenishes per-minute limits continuously, so a full minute can burst
+        per_minute = settings.ANTHROPIC_REQUESTS_PER_MINUTE
+        return per_minute / 60.0, per_minute, settings.PIPELINE_LLM_WORKERS
+    return 10.0, 10.0, 10
+
+
+def get_limiter(service):
+    limiter = _limiters.get(service)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(service)
+            if limiter is None:
+                rate, burst, concurrency = _default_limits(service)
+                limiter = ServiceLimiter(service, rate, burst, concurrency)
+                _limiters[service] = limiter
+    return limiter
+
+
+def _status_and_headers(error):
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    return status, headers
+
+
+def _is_connection_error(error):
+    try:
+        import requests
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+    except ImportError:
+        pass
+    try:
+        import anthropic
+        if isinstance(error, anthropic.APIConnectionError):
+            return True
+    except ImportError:
+        pass
+    return False
+
+
+def _retry_delay(attempt, headers):
+    retry_after = _seconds_until(headers.get("Retry-After") or headers.get("retry-after"))
+    if retry_after:
+        return min(retry_after, settings.RETRY_MAX_DELAY)
+    reset_in = None
+    if str(headers.get("X-RateLimit-Remaining", "")) == "0":
+        reset_in = _seconds_until(headers.get("X-RateLimit-Reset"))
+    if reset_in:
+        return reset_in
+    # Full jitter: uniform in [0, base * 2^attempt], capped
+    return random.uniform(0, min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def is_retryable(error):
+    status, headers = _status_and_headers(error)
+    if status in RETRYABLE_STATUSES:
+        return True
+    # GitHub signals an exhausted quota with 403 and X-RateLimit-Remaining: 0
+    if status == 403 and str(headers.get("X-RateLimit-Remaining", "")) == "0":
+        return True
+    return status is None and _is_connection_error(error)
+
+
+def call_with_retry(service, fn, *args, headers_of=None, **kwargs):
+    """
+    Call fn(*args, **kwargs) under the service's limiter, retrying throttling
+    and transient errors. `headers_of(result)` may return the response
+    headers of a successful call so the limiter can track the quota.
+    """
+    limiter = get_limiter(service)
+    attempt = 0
+    while True:
+        limiter.acquire()
+        limiter.count("requests")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            limiter.release()
+            status, headers = _status_and_headers(e)
+            if not is_retryable(e) or attempt + 1 >= settings.RETRY_MAX_ATTEMPTS:
+                limiter.count("failures")
+                raise
+            delay = _retry_delay(attempt, headers)
+            if status in (403, 429, 529):
+                limiter.throttled(delay)
+            limiter.count("retries")
+            print(f"{service}: {e} - retrying in {delay:.1f}s (attempt {attempt + 2}/{settings.RETRY_MAX_ATTEMPTS})")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        limiter.release()
+        headroom = limiter.observe(headers_of(result)) if headers_of else None
+        limiter.succeeded(headroom)
+        return result
+
+
+def request(service, method, url, **kwargs):
+    """
+    HTTP request through the shared session with retries. Returns the final
+    response; a non-retryable error status is returned, not raised, so callers
+    keep their existing status checks.
+    """
+    session = get_http_session()
+
+    def send():
+        res = session.request(method, url, timeout=settings.HTTP_TIMEOUT, **kwargs)
+        if is_retryable(RetryableStatus(res)):
+            raise RetryableStatus(res)
+        return res
+
+    try:
+        return call_with_retry(service, send, headers_of=lambda res: res.headers)
+    except RetryableStatus as e:
+        return e.response
+
+
+def retry_summary():
+    """
+    Per-service request/retry/throttle counts for the run report.
+    """
+    return {name: dict(limiter.stats, concurrency=limiter.concurrency) for name, limiter in _limiters.items()}
@@ -0,0 +1,197 @@
+"""
+Content-addressed cache of model responses.
+
+Keyed by a hash of the full Messages API parameters (model, max_tokens,
+temperature, system and messages), so a byte-identical request is answered
+from disk. Modes (LLM_CACHE_MODE or configure()):
+
+- off:          never read or write
+- read-through: serve hits, call the model on a miss and store the reply
+- record:       always call the model and store/overwrite the reply
+- replay:       serve hits only; a miss raises LLMCacheMiss (no API call), for CI
+
+The store is a SQLite table bounded to LLM_CACHE_MAX_BYTES. Its size is
+kept as a running total in a meta row, so a put doesn't scan the table; once
+the total goes over the bound, least recently used entries are evicted until
+it is back under EVICT_TO of it.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import settings
+from services import metrics
+
+MODES = ("off", "read-through", "record", "replay")
+
+# Eviction frees room down to this share of max_bytes, so a full cache
+# doesn't evict on every put
+EVICT_TO = 0.9
+
+
+class LLMCacheMiss(Exception):
+    pass
+
+
+class LLMCache:
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.max_bytes = settings.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Caches created before the running total get it counted once
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM responses")
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self.local.conn = conn
+        return conn
+
+    def _count(self, stat, amount=1):
+        with self.lock:
+            self.stats[stat] += amount
+        metrics.increment("llm_cache_total", amount, result=stat)
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        self._count("hits")
+        return row[0]
+
+    def total_bytes(self):
+        return self._connection().execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+
+    def put(self, key, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        conn = self._connection()
+        # The entry and the running total change in one write transaction
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (size - (row[0] if row else 0),))
+            total = conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+            evicted = self._evict(conn, total) if total > self.max_bytes else 0
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _evict(self, conn, total):
+        # Oldest first through the last_used_at index, a page at a time
+        target = self.max_bytes * EVICT_TO
+        evicted = freed = 0
+        while total - freed > target:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY last_used_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total - freed <= target:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+        conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_bytes'", (freed,))
+        return evicted
+
+
+def cache_key(params):
+    """
+    Hash of the request parameters that determine the reply.
+    """
+    encoded = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+_mode = None
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def configure(mode):
+    """
+    Override LLM_CACHE_MODE for this process (e.g. from a --llm-cache flag).
+    """
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM cache mode {mode!r}; expected one of {', '.join(MODES)}")
+    _mode = mode
+
+
+def get_mode():
+    mode = _mode or settings.LLM_CACHE_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE {mode!r}; expected one of {', '.join(MODES)}")
+    return mode
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def lookup(params):
+    """
+    Cached reply text for `params`, or None if the model should be called.
+    Raises LLMCacheMiss in replay mode when nothing is cached.
+    """
+    mode = get_mode()
+    if mode in ("off", "record"):
+        return None
+    text = get_cache().get(cache_key(params))
+    if text is None and mode == "replay":
+        raise LLMCacheMiss(f"No cached response for request {cache_key(params)[:12]} (replay mode)")
+    return text
+
+
+def store(params, text):
+    if get_mode() in ("read-through", "record"):
+        get_cache().put(cache_key(params), text)
+
+
+def summary():
+    if get_mode() == "off" or _cache is None:
+        return {"mode": get_mode()}
+    with _cache.lock:
+        return dict(_cache.stats, mode=get_mode())
@@ -0,0 +1,274 @@
+"""
+In-process metrics for evaluation runs.
+
+Stages time themselves with `timer(stage)` (or the `timed(stage)` decorator)
+into a latency histogram per stage: fetch, enrich, prompt, llm, parse, write.
+Token usage, retries/throttling and cache hits/misses are recorded as
+counters by the services that see them. At the end of a run the registry is
+exported either as Prometheus text (`export_prometheus`) or as a JSON run
+report (`run_report` / `write_report`) showing where the time went.
+
+Histograms use fixed buckets, so memory stays flat however long a run is;
+percentiles in the report are interpolated from the buckets.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "evaluation_"
+
+# Seconds; spans a cache hit up to a slow model call or a rate-limited write
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for n, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = n
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate the q-quantile by linear interpolation inside its bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for n, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[n - 1] if n > 0 else 0.0
+                upper = self.buckets[n] if n < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": _round(self.quantile(0.5)),
+            "p90": _round(self.quantile(0.9)),
+            "p99": _round(self.quantile(0.99)),
+            "max": round(self.max, 4),
+        }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> Histogram
+_counters = {}  # (name, labels) -> number
+_started = time.time()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, **labels):
+    """
+    Add one observation to histogram `name` with the given labels.
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def increment(name, amount=1, **labels):
+    """
+    Add `amount` to counter `name` with the given labels.
+    """
+    if not amount:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def timer(stage):
+    """
+    Time the block into the stage_seconds histogram. Failed attempts are
+    timed too, and counted in stage_errors_total.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment("stage_errors_total", stage=stage)
+        raise
+    finally:
+        observe("stage_seconds", time.perf_counter() - started, stage=stage)
+
+
+def timed(stage):
+    """
+    Decorator form of timer().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset():
+    global _started
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+def _snapshot():
+    with _lock:
+        histograms = {key: (histogram, histogram.summary()) for key, histogram in _histograms.items()}
+        counters = dict(_counters)
+    return histograms, counters
+
+
+def stage_summary():
+    """
+    {stage: {count, total_seconds, mean, p50, p90, p99, max}} for the stages timed so far.
+    """
+    histograms, _ = _snapshot()
+    return {
+        dict(labels)["stage"]: summary
+        for (name, labels), (_, summary) in sorted(histograms.items())
+        if name == "stage_seconds"
+    }
+
+
+def run_report():
+    """
+    JSON-serialisable report of everything recorded since the last reset.
+    Stage `share` is each stage's part of the summed stage time; stages run
+    concurrently, so the totals can exceed the wall time.
+    """
+    histograms, counters = _snapshot()
+    stages = stage_summary()
+    stage_total = sum(summary["total_seconds"] for summary in stages.values())
+    for summary in stages.values():
+        summary["share"] = round(summary["total_seconds"] / stage_total, 3) if stage_total else 0.0
+
+    counter_report = {}
+    for (name, labels), value in sorted(counters.items()):
+        label_text = ",".join(f"{k}={v}" for k, v in labels)
+        counter_report.setdefault(name, {})[label_text or "total"] = value
+
+    other = {}
+    for (name, labels), (_, summary) in sorted(histograms.items()):
+        if name != "stage_seconds":
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            other.setdefault(name, {})[label_text or "total"] = summary
+
+    return {
+        "wall_seconds": round(time.time() - _started, 3),
+        "stages": stages,
+        "cache_hit_rates": _hit_rates(counters),
+        "counters": counter_report,
+        "histograms": other,
+    }
+
+
+def _counter(counters, name, **labels):
+    return counters.get(_key(name, labels), 0)
+
+
+def _rate(hits, total):
+    return round(hits / total, 3) if total else None
+
+
+def _hit_rates(counters):
+    """
+    Hit rates of the GitHub response cache, the LLM response cache and the
+    prompt (rubric prefix) cache, from the counters those services record.
+    """
+    github_hits = sum(_counter(counters, "github_cache_total", result=r) for r in ("memory_hits", "disk_hits", "revalidated"))
+    github_misses = _counter(counters, "github_cache_total", result="misses")
+    llm_hits = _counter(counters, "llm_cache_total", result="hits")
+    llm_misses = _counter(counters, "llm_cache_total", result="misses")
+    prompt_reads = _counter(counters, "llm_tokens_total", type="cache_read_input")
+    prompt_writes = _counter(counters, "llm_tokens_total", type="cache_creation_input")
+    return {
+        "github": _rate(github_hits, github_hits + github_misses),
+        "llm_response": _rate(llm_hits, llm_hits + llm_misses),
+        "prompt_prefix": _rate(prompt_reads, prompt_reads + prompt_writes),
+    }
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def export_prometheus():
+    """
+    Everything recorded so far in the Prometheus text exposition format.
+    """
+    histograms, counters = _snapshot()
+    lines = []
+    typed = set()
+
+    for (name, labels), value in sorted(counters.items()):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels_text(labels)} {value}")
+
+    for (name, labels), (histogram, _) in sorted(histograms.items(), key=lambda item: item[0]):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += bucket_count
+            lines.append(f"{metric}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{metric}_sum{_labels_text(labels)} {histogram.sum}")
+        lines.append(f"{metric}_count{_labels_text(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path):
+    """
+    Write the metrics to `path`: Prometheus text for .prom/.txt files, the JSON run report otherwise.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(export_prometheus())
+        else:
+            json.dump(run_report(), f, indent=2)
+    print(f"Metrics written to {path}")
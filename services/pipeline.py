@@ -0,0 +1,119 @@
+"""
+Staged producer/consumer pipeline.
+
+A source thread feeds items into a chain of stages connected by bounded
+queues. Each stage runs its own pool of worker threads, so every stage works
+on different items at the same time and throughput approaches that of the
+slowest stage. A full queue blocks the stage in front of it (backpressure),
+which keeps memory flat no matter how large the source is.
+"""
+import queue
+import threading
+from config import settings
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline step. `fn(item)` returns the item to pass on, or None to
+    drop it (e.g. an applicant that doesn't need evaluation).
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.queue_size = settings.PIPELINE_QUEUE_SIZE if queue_size is None else queue_size
+
+
+class PipelineStats:
+    def __init__(self, stages):
+        self.lock = threading.Lock()
+        self.processed = {stage.name: 0 for stage in stages}
+        self.dropped = {stage.name: 0 for stage in stages}
+        self.errors = []  # (stage name, item, exception)
+
+    def count(self, counter, stage_name):
+        with self.lock:
+            counter[stage_name] += 1
+
+    def error(self, stage_name, item, exc):
+        with self.lock:
+            self.errors.append((stage_name, item, exc))
+
+
+class Pipeline:
+    def __init__(self, stages):
+        self.stages = stages
+        self.stats = PipelineStats(stages)
+
+    def run(self, source):
+        """
+        Push every item of `source` through the stages in order.
+
+        Yields the output of the last stage as it completes, on the caller's
+        thread. An exception in a stage function is recorded in
+        `self.stats.errors` and the item is dropped; the run continues.
+        """
+        stages, stats = self.stages, self.stats
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        queues.append(queue.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE))
+        threads = []
+
+        def feed():
+            try:
+                for item in source:
+                    queues[0].put(item)
+            except Exception as e:
+                stats.error("source", None, e)
+            finally:
+                for _ in range(stages[0].workers):
+                    queues[0].put(_DONE)
+
+        def work(index, stage, remaining):
+            in_q, out_q = queues[index], queues[index + 1]
+            while True:
+                item = in_q.get()
+                if item is _DONE:
+                    break
+                try:
+                    result = stage.fn(item)
+                except Exception as e:
+                    stats.error(stage.name, item, e)
+                    continue
+                stats.count(stats.processed, stage.name)
+                if result is None:
+                    stats.count(stats.dropped, stage.name)
+                    continue
+                out_q.put(result)
+
+            # The last worker of a stage to finish signals every worker downstream
+            with remaining["lock"]:
+                remaining["count"] -= 1
+                last = remaining["count"] == 0
+            if last:
+                downstream = stages[index + 1].workers if index + 1 < len(stages) else 1
+                for _ in range(downstream):
+                    out_q.put(_DONE)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-source", daemon=True))
+        for index, stage in enumerate(stages):
+            remaining = {"count": stage.workers, "lock": threading.Lock()}
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work, args=(index, stage, remaining), name=f"pipeline-{stage.name}-{n}", daemon=True
+                ))
+
+        for thread in threads:
+            thread.start()
+
+        final_q = queues[-1]
+        while True:
+            item = final_q.get()
+            if item is _DONE:
+                break
+            yield item
+
+        for thread in threads:
+            thread.join()
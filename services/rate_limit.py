@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    acquire() blocks until the requested amount is available, so callers
+    running in many threads share one budget. slow_down() lowers the rate
+    for a while; it returns to the configured `rate` by itself.
+    """
+
+    def __init__(self, rate, capacity):
+        self.base_rate = float(rate)
+        self.rate = self.base_rate
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.slowed_until = None
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.slowed_until is not None and now >= self.slowed_until:
+            self.rate, self.slowed_until = self.base_rate, None
+
+    def acquire(self, amount=1):
+        """
+        Take `amount` tokens, sleeping until they are available.
+        Returns the number of seconds spent waiting.
+        """
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                wait = (amount - self.tokens) / self.rate
+                if self.slowed_until is not None:
+                    # Recheck at least every second, and when the slow-down ends
+                    wait = min(wait, 1.0, max(0.0, self.slowed_until - time.monotonic()))
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount):
+        """
+        Give back (positive) or charge extra (negative) tokens after the real
+        cost of a call is known. The balance may go negative, which makes later
+        acquire() calls wait until the debt has refilled.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+    def slow_down(self, rate, seconds):
+        """
+        Refill at `rate` (capped at the configured rate) for the next
+        `seconds`, e.g. to stretch the headroom a service reports over the
+        rest of its quota window.
+        """
+        with self.lock:
+            self._refill()
+            self.rate = max(min(float(rate), self.base_rate), 1e-6)
+            self.slowed_until = time.monotonic() + seconds
+
+    def restore_rate(self):
+        with self.lock:
+            self._refill()
+            self.rate, self.slowed_until = self.base_rate, None
+
+
+def tokens_per_minute_bucket(tokens_per_minute):
+    """
+    Build a bucket for a per-minute budget, or None when the budget is disabled.
+    """
+    if not tokens_per_minute or tokens_per_minute <= 0:
+        return None
+    return TokenBucket(rate=tokens_per_minute / 60.0, capacity=tokens_per_minute)
@@ -0,0 +1,130 @@
+"""
+Condensed README text for prompts.
+
+A README is streamed in its raw form and reading stops after
+README_MAX_BYTES, so a README of hundreds of KB is never fully downloaded
+or base64-decoded. The text is then stripped down to prose: code blocks,
+badges, images, HTML tags and comments, link targets, rule lines and
+repeated paragraphs are removed. Finally it is cut to README_MAX_TOKENS at a paragraph or line
+boundary.
+
+The same input always gives the same output, so the condensed form is cached
+under the repo and the head commit SHA. It is only fetched again after a
+push, and cached entries never go stale.
+"""
+import html
+import json
+import re
+from config import settings
+from services.github_cache import CachedResponse, get_cache
+from services.http_retry import request
+from services.repo_activity import head_sha
+
+CHARS_PER_TOKEN = 4  # also used by services.ai_eval.estimate_tokens
+TRUNCATION_MARK = " [...]"
+
+_CODE_BLOCK = re.compile(r"^[ \t]*(`{3,}|~{3,})[^\n]*\n.*?(?:^[ \t]*\1[ \t]*$|\Z)", re.MULTILINE | re.DOTALL)
+_HTML_COMMENT = re.compile(r"<!--.*?(?:-->|\Z)", re.DOTALL)
+# [![alt](image)](link) first, then plain ![alt](image)
+_BADGE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]")
+_LINK = re.compile(r"\[([^\]]+)\]\((?:[^()]|\([^)]*\))*\)")
+_REFERENCE = re.compile(r"^[ \t]*\[[^\]]+\]:[ \t]*\S+.*$", re.MULTILINE)
+_HTML_TAG = re.compile(r"</?[A-Za-z][^>]*>")
+_RULE = re.compile(r"^[ \t]*[-=*_|: ]{3,}[ \t]*(?:\n|\Z)", re.MULTILINE)
+_INLINE_CODE = re.compile(r"`([^`\n]*)`")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def strip_markup(text):
+    """
+    README markdown/HTML reduced to its prose. A code block cut open by the
+    byte limit is dropped to the end.
+    """
+    text = text.replace("\r\n", "\n")
+    text = _CODE_BLOCK.sub("", text)
+    text = _HTML_COMMENT.sub("", text)
+    text = _BADGE.sub("", text)
+    text = _LINK.sub(r"\1", text)
+    text = _REFERENCE.sub("", text)
+    text = _HTML_TAG.sub("", text)
+    text = _INLINE_CODE.sub(r"\1", text)
+    text = html.unescape(text)
+    text = _RULE.sub("", text)
+    lines = [line.rstrip() for line in text.split("\n")]
+    text = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+    # Repeated paragraphs (install steps per platform, badge rows) add nothing
+    return "\n\n".join(dict.fromkeys(text.split("\n\n")))
+
+
+def truncate(text, max_tokens):
+    """
+    Cut `text` to about `max_tokens`, preferring a paragraph, then a line,
+    then a word boundary in the second half of the allowance.
+    """
+    if max_tokens <= 0:
+        return ""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - len(TRUNCATION_MARK)]
+    for boundary in ("\n\n", "\n", " "):
+        position = cut.rfind(boundary)
+        if position > len(cut) // 2:
+            cut = cut[:position]
+            break
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def condense(text, max_tokens=None):
+    max_tokens = settings.README_MAX_TOKENS if max_tokens is None else max_tokens
+    return truncate(strip_markup(text or ""), max_tokens)
+
+
+def _stream_raw(full_name, headers=None):
+    """
+    First README_MAX_BYTES of the raw README, or None when there is none.
+    """
+    request_headers = dict(headers or {}, Accept="application/vnd.github.raw")
+    res = request("github", "GET", f"{settings.GITHUB_API_URL}/repos/{full_name}/readme", headers=request_headers, stream=True)
+    try:
+        if res.status_code != 200:
+            return None
+        chunks, size = [], 0
+        for chunk in res.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= settings.README_MAX_BYTES:
+                break
+    finally:
+        res.close()
+    # The cut can split a multi-byte character
+    return b"".join(chunks)[:settings.README_MAX_BYTES].decode("utf-8", errors="ignore")
+
+
+def fetch_condensed_readme(full_name, headers=None):
+    """
+    {"readme_content", "readme_filename"} for "owner/repo", condensed, from
+    the cache when the head commit hasn't moved.
+    """
+    empty = {"readme_content": None, "readme_filename": None}
+    sha = head_sha(full_name, headers)
+    cache = get_cache() if settings.GITHUB_CACHE_TTL > 0 and sha else None
+    key = f"readme:{full_name}@{sha}:{settings.README_MAX_BYTES}:{settings.README_MAX_TOKENS}"
+    if cache is not None:
+        entry, _ = cache.lookup(key)
+        if entry is not None:
+            return entry.json()
+
+    try:
+        raw = _stream_raw(full_name, headers)
+    except Exception:
+        return empty
+    result = empty if raw is None else {"readme_content": condense(raw), "readme_filename": "README"}
+    if cache is not None:
+        # Keyed by commit SHA, so the entry is never stale
+        cache.store(key, CachedResponse(200, json.dumps(result), {}))
+    return result
@@ -0,0 +1,102 @@
+"""
+Repository activity signals from small REST requests.
+
+The exact commit count comes from `commits?per_page=1`. With one item per
+page, the page number in the `Link: rel="last"` header is the total, so a
+single request of one commit replaces downloading 100-commit pages (which
+also capped the count at 100). That same commit gives the last commit date.
+
+With GITHUB_ACTIVITY_STATS, two more requests add the contributor count
+(`contributors?per_page=1&anon=1`, counted the same way) and commits in the
+last 4 weeks and 52 weeks (`stats/participation`). GitHub answers the stats
+endpoints with 202 while it computes them; those values are then None and
+are picked up on a later run.
+
+Responses go through the GitHub cache like the rest of the repo info. The
+GraphQL backend gets the same numbers from `history.totalCount`; see
+services.github_graphql.
+"""
+import re
+from urllib.parse import parse_qs, urlparse
+from config import settings
+from services.github_cache import cached_get
+
+_LAST_PAGE = re.compile(r'<([^>]+)>\s*;\s*rel="last"')
+
+
+def count_from_link(response):
+    """
+    Total items of a per_page=1 listing: the last page number from the Link
+    header, or the length of the body when everything fit on one page.
+    """
+    match = _LAST_PAGE.search(response.headers.get("Link") or "")
+    if match:
+        page = parse_qs(urlparse(match.group(1)).query).get("page")
+        if page and page[0].isdigit():
+            return int(page[0])
+    items = response.json()
+    return len(items) if isinstance(items, list) else 0
+
+
+def _latest_commit(full_name, headers=None):
+    return cached_get(f"{settings.GITHUB_API_URL}/repos/{full_name}/commits?per_page=1", headers=headers)
+
+
+def head_sha(full_name, headers=None):
+    """
+    SHA of the default branch head, or None. Shares the cached request with fetch_commit_activity().
+    """
+    res = _latest_commit(full_name, headers)
+    commits = res.json() if res.status_code == 200 else None
+    return commits[0]["sha"] if commits else None
+
+
+def fetch_commit_activity(full_name, headers=None):
+    """
+    {"commit_count", "last_commit_date"} for "owner/repo" from one request.
+    """
+    res = _latest_commit(full_name, headers)
+    if res.status_code == 409:
+        # GitHub's answer for an empty repository
+        return {"commit_count": 0, "last_commit_date": None}
+    if res.status_code != 200:
+        return {"error": f"Commits API returned status {res.status_code}"}
+    commits = res.json()
+    return {
+        "commit_count": count_from_link(res),
+        "last_commit_date": commits[0]["commit"]["committer"]["date"] if commits else None,
+    }
+
+
+def fetch_contributor_count(full_name, headers=None):
+    res = cached_get(f"{settings.GITHUB_API_URL}/repos/{full_name}/contributors?per_page=1&anon=1", headers=headers)
+    if res.status_code == 204:
+        return 0
+    if res.status_code != 200:
+        return None
+    return count_from_link(res)
+
+
+def fetch_participation(full_name, headers=None):
+    """
+    Commits in the last 4 and 52 weeks, or Nones while GitHub is still computing the stats.
+    """
+    res = cached_get(f"{settings.GITHUB_API_URL}/repos/{full_name}/stats/participation", headers=headers)
+    weeks = res.json().get("all") if res.status_code == 200 else None
+    if not weeks:
+        return {"commits_last_4_weeks": None, "commits_last_year": None}
+    return {"commits_last_4_weeks": sum(weeks[-4:]), "commits_last_year": sum(weeks)}
+
+
+def fetch_activity(full_name, headers=None):
+    """
+    Activity fields merged into repo info. The commit fields are always
+    fetched; contributors and participation only with GITHUB_ACTIVITY_STATS.
+    """
+    activity = fetch_commit_activity(full_name, headers)
+    if "error" in activity:
+        return activity
+    if settings.GITHUB_ACTIVITY_STATS:
+        activity["contributor_count"] = fetch_contributor_count(full_name, headers)
+        activity.update(fetch_participation(full_name, headers))
+    return activity
@@ -0,0 +1,174 @@
+"""
+Extract score, feedback and recommendation from evaluation replies.
+
+Free-text replies are read with one scan of a single precompiled,
+line-anchored pattern that picks up all the labelled lines at once
+(Score / Team Score / Feedback / Team Feedback / Recommendation, markdown
+emphasis and list markers allowed). Only a reply without a usable Score
+line gets further scans: first for a score label anywhere in a line
+("Overall Score: 85", "... gets Score: 66 overall"), then for the bare
+"85/100", "85 out of 100", "85 points", "85%" forms, ranked in the order
+the old cascaded searches tried them.
+
+Structured replies (a JSON object, or the input of a tool_use block) are
+read with no regex at all; see parse_structured().
+"""
+import json
+import re
+from collections import namedtuple
+
+ParsedResponse = namedtuple("ParsedResponse", ["score", "feedback", "recommendation"])
+
+RECOMMENDATIONS = ("Select", "Waitlist")
+
+# `rest` is a lookahead so the scan stays cheap: nothing past the label is consumed
+_LABELS = re.compile(
+    r"^[ \t>#*_]*(?:(?:[-+]|\d{1,2}[.)])[ \t]+[ \t>#*_]*)?(?P<label>team[ \t]+score|score|team[ \t]+feedback|feedback|recommendation)[ \t*_]*:[ \t*_]*(?=(?P<rest>[^\n]*))",
+    re.IGNORECASE | re.MULTILINE,
+)
+# A score label preceded by other words, as the old unanchored "Score:\s*(\d+)" allowed
+_INLINE_SCORE = re.compile(
+    r"(?P<label>team[ \t]+score|score)[ \t*_]*:[ \t*_]*(?P<number>\d{1,3})(?!\d)",
+    re.IGNORECASE,
+)
+_BARE_SCORE = re.compile(
+    r"(?<![\d.])(?P<number>\d{1,3})[ \t]*(?P<unit>/[ \t]*100|out[ \t]+of[ \t]+100|points|%)",
+    re.IGNORECASE,
+)
+
+# Rank of each candidate kind; lower wins. Mirrors the old pattern order.
+_LABEL_RANK = {"score": 0, "team score": 1}
+_TEAM_LABEL_RANK = {"team score": 0, "score": 1}
+_UNIT_RANK = {"/": 0, "o": 1, "p": 2, "%": 3}
+
+
+def _leading_int(text):
+    digits = ""
+    for char in text.lstrip():
+        if not char.isdigit():
+            break
+        digits += char
+    return int(digits) if digits else None
+
+
+def _recommendation(value):
+    word = value.strip(" \t*_.").lower()
+    for recommendation in RECOMMENDATIONS:
+        if word.startswith(recommendation.lower()):
+            return recommendation
+    return None
+
+
+def parse_response(response_text, team=False):
+    """
+    Parse a free-text evaluation reply. Returns ParsedResponse; score is
+    None when no score in 0-100 was found, recommendation is None when the
+    reply has no Select/Waitlist line.
+
+    With `team`, "Team Score"/"Team Feedback" take precedence over the
+    plain labels.
+    """
+    label_rank = _TEAM_LABEL_RANK if team else _LABEL_RANK
+    best_rank, score = None, None
+    feedback_start = {}
+    score_lines = []
+    recommendation = None
+
+    for match in _LABELS.finditer(response_text):
+        label = " ".join(match.group("label").lower().split())
+        if label in label_rank:
+            value = _leading_int(match.group("rest"))
+            if value is not None:
+                score_lines.append((match.start(), match.end("rest")))
+                candidate_rank = label_rank[label]
+                if 0 <= value <= 100 and (best_rank is None or candidate_rank < best_rank):
+                    best_rank, score = candidate_rank, value
+        elif label == "recommendation":
+            if recommendation is None:
+                recommendation = _recommendation(match.group("rest"))
+        else:
+            feedback_start.setdefault(label, match.start("rest"))
+
+    if score is None:
+        for match in _INLINE_SCORE.finditer(response_text):
+            value = int(match.group("number"))
+            candidate_rank = label_rank[" ".join(match.group("label").lower().split())]
+            if 0 <= value <= 100 and (best_rank is None or candidate_rank < best_rank):
+                best_rank, score = candidate_rank, value
+
+    if score is None:
+        for match in _BARE_SCORE.finditer(response_text):
+            value = int(match.group("number"))
+            candidate_rank = _UNIT_RANK[match.group("unit")[0].lower()]
+            if 0 <= value <= 100 and (best_rank is None or candidate_rank < best_rank):
+                best_rank, score = candidate_rank, value
+
+    if team and "team feedback" in feedback_start:
+        start = feedback_start["team feedback"]
+    else:
+        start = min(feedback_start.values()) if feedback_start else None
+
+    if start is not None:
+        feedback = response_text[start:].strip()
+    else:
+        # No "Feedback:" label: the whole reply minus the score lines
+        pieces, position = [], 0
+        for line_start, line_end in score_lines:
+            pieces.append(response_text[position:line_start])
+            position = line_end + 1
+        pieces.append(response_text[position:])
+        feedback = "".join(pieces).strip()
+
+    return ParsedResponse(score, feedback, recommendation)
+
+
+def parse_structured(payload, team=False):
+    """
+    Parse a structured reply: a dict (e.g. a tool_use block's input) or a
+    JSON object string, optionally inside a ``` fence. Accepts
+    score/feedback/recommendation keys, or team_score/team_feedback for
+    teams. No regular expressions involved. Returns ParsedResponse; fields
+    that are missing or of the wrong type come back as None.
+    """
+    if isinstance(payload, str):
+        text = payload.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+            text = text.rsplit("```", 1)[0]
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return ParsedResponse(None, None, None)
+    if not isinstance(payload, dict):
+        return ParsedResponse(None, None, None)
+
+    score = payload.get("team_score") if team and "team_score" in payload else payload.get("score")
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score.strip())
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        score = None
+    else:
+        score = int(score)
+
+    feedback = payload.get("team_feedback") if team and "team_feedback" in payload else payload.get("feedback")
+    feedback = feedback.strip() if isinstance(feedback, str) else None
+
+    recommendation = payload.get("recommendation")
+    recommendation = _recommendation(recommendation) if isinstance(recommendation, str) else None
+    return ParsedResponse(score, feedback, recommendation)
+
+
+def is_structured(response_text):
+    text = response_text.lstrip()
+    return text.startswith("{") or text.startswith("```json")
+
+
+def parse(response_text, team=False):
+    """
+    Parse any reply: JSON replies through parse_structured(), free text through parse_response().
+    """
+    if is_structured(response_text):
+        parsed = parse_structured(response_text, team=team)
+        if parsed.score is not None:
+            return parsed
+    return parse_response(response_text, team=team)
@@ -0,0 +1,100 @@
+"""
+Append-only JSONL journal of an evaluation run.
+
+Each line records one step for one key (an applicant record_id or a team
+code): "fetched", "evaluated" (with the raw model output, so it never has to
+be paid for again) and "written". A run started with resume=True loads the
+previous journal and keeps appending to it, so a crashed run can skip
+everything already written and replay evaluated-but-unwritten results
+without calling the model.
+"""
+import json
+import os
+import threading
+import time
+from config import settings
+
+FETCHED = "fetched"
+EVALUATED = "evaluated"
+WRITTEN = "written"
+
+_STATE_ORDER = {FETCHED: 0, EVALUATED: 1, WRITTEN: 2}
+
+
+class RunJournal:
+    def __init__(self, name, resume=False, directory=None):
+        directory = directory or settings.RUN_JOURNAL_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        if resume and os.path.exists(self.path):
+            self._load()
+        elif not resume and os.path.exists(self.path):
+            # A fresh run starts a fresh journal; keep the last one for inspection
+            os.replace(self.path, self.path + ".prev")
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line
+                    continue
+                self._merge(entry)
+
+    def _merge(self, entry):
+        key = entry["key"]
+        current = self.entries.get(key)
+        if current is None:
+            self.entries[key] = entry
+            return
+        merged = dict(current, **{k: v for k, v in entry.items() if v is not None})
+        # Never step backwards (e.g. a "fetched" line after "written" on a resumed run)
+        if _STATE_ORDER[entry["state"]] < _STATE_ORDER[current["state"]]:
+            merged["state"] = current["state"]
+        self.entries[key] = merged
+
+    def record(self, key, state, **data):
+        entry = {"key": key, "state": state, "ts": time.time(), **data}
+        line = json.dumps(entry, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            self._merge(entry)
+
+    def fetched(self, key):
+        self.record(key, FETCHED)
+
+    def evaluated(self, key, raw_output, **data):
+        self.record(key, EVALUATED, raw_output=raw_output, **data)
+
+    def written(self, key):
+        self.record(key, WRITTEN)
+
+    def get(self, key):
+        """
+        Latest merged entry for `key`, or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def state(self, key):
+        entry = self.get(key)
+        return entry["state"] if entry else None
+
+    def summary(self):
+        with self.lock:
+            counts = {FETCHED: 0, EVALUATED: 0, WRITTEN: 0}
+            for entry in self.entries.values():
+                counts[entry["state"]] += 1
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,156 @@
+"""
+Local snapshot of applicant results for the review dashboard.
+
+The snapshot is a pandas frame saved as Parquet (SNAPSHOT_PATH), one row
+per applicant with the fields reviewers look at plus a Recommendation
+column parsed once from the feedback. Readers only ever load the file.
+Airtable is touched by refresh(), which asks only for records whose
+SNAPSHOT_FIELDS changed since the last refresh (a LAST_MODIFIED_TIME()
+filter, so a score write-back brings the row in) and upserts them by
+record_id.
+
+Deleted records never show up in a delta, so the whole table is read again
+once the last full read is older than SNAPSHOT_FULL_REFRESH_SECONDS.
+refresh_if_stale() runs at most one refresh per SNAPSHOT_REFRESH_SECONDS
+however many dashboard sessions ask for it, so reviewers share one stream
+of Airtable requests instead of each polling the base. When reads come from
+the local mirror (AIRTABLE_READ_SOURCE), every refresh is a full read of the
+mirror, which costs no Airtable quota.
+"""
+import json
+import os
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from config import settings
+from services.airtable import iter_record_pages, modified_since
+from services.airtable_mirror import read_source
+from services.response_parser import parse_response
+from services.sync_state import to_iso, utc_now
+
+SNAPSHOT_FIELDS = [
+    "First Name", "Last Name", "Company", "Title", "Chosen Track",
+    "Team Code", "Team Name", "GitHub URL",
+    "Individual Score", "Individual Feedback", "Team Score", "Team Feedback",
+]
+SCORE_COLUMNS = ["Individual Score", "Team Score"]
+COLUMNS = ["record_id"] + SNAPSHOT_FIELDS + ["Recommendation"]
+
+_lock = threading.Lock()
+
+
+def _state_path(path):
+    return path + ".json"
+
+
+def _read_state(path):
+    state_path = _state_path(path)
+    if not os.path.exists(state_path) or not os.path.exists(path):
+        return {}
+    with open(state_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _write(frame, state, path):
+    # Parquet first, then the cursor: a crash in between only repeats a delta
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    frame.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    with open(_state_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(_state_path(path) + ".tmp", _state_path(path))
+
+
+def to_frame(records):
+    """
+    Airtable records ({"id", "fields"}) as snapshot rows.
+    """
+    rows = []
+    for record in records:
+        fields = record.get("fields", {})
+        row = {field: fields.get(field) for field in SNAPSHOT_FIELDS}
+        row["record_id"] = record["id"]
+        row["Recommendation"] = parse_response(row["Individual Feedback"] or "").recommendation
+        rows.append(row)
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    for column in SCORE_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    return frame
+
+
+def load(path=None):
+    """
+    The saved snapshot, or an empty frame before the first refresh.
+    """
+    path = path or settings.SNAPSHOT_PATH
+    if not os.path.exists(path):
+        return to_frame([])
+    return pd.read_parquet(path)
+
+
+def refresh(path=None, full=False):
+    """
+    Bring the snapshot up to date from Airtable. Returns the number of
+    records read. Reads everything with `full`, on the first refresh and
+    when the last full read is older than SNAPSHOT_FULL_REFRESH_SECONDS.
+    """
+    path = path or settings.SNAPSHOT_PATH
+    state = _read_state(path)
+    started = utc_now()
+    full_at = _parse_time(state.get("full_refresh_at"))
+    full = full or read_source() != "api" or full_at is None or started - full_at > timedelta(seconds=settings.SNAPSHOT_FULL_REFRESH_SECONDS)
+
+    formula = None
+    if not full:
+        since = _parse_time(state["cursor"]) - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        formula = modified_since(to_iso(since), SNAPSHOT_FIELDS)
+    records = [record for page in iter_record_pages(fields=SNAPSHOT_FIELDS, formula=formula) for record in page]
+    delta = to_frame(records)
+
+    if full:
+        frame = delta
+        state["full_refresh_at"] = to_iso(started)
+    else:
+        frame = load(path)
+        frame = pd.concat([frame[~frame["record_id"].isin(delta["record_id"])], delta], ignore_index=True)
+    state["cursor"] = to_iso(started)
+    _write(frame, state, path)
+    print(f"Snapshot {'full' if full else 'delta'} refresh: {len(records)} records read, {len(frame)} in snapshot")
+    return len(records)
+
+
+def refresh_if_stale(path=None, max_age=None):
+    """
+    refresh() unless one ran (in any process) within `max_age` seconds
+    (default SNAPSHOT_REFRESH_SECONDS). Returns True if it refreshed.
+    """
+    path = path or settings.SNAPSHOT_PATH
+    max_age = settings.SNAPSHOT_REFRESH_SECONDS if max_age is None else max_age
+    with _lock:
+        cursor = _parse_time(_read_state(path).get("cursor"))
+        if cursor is not None and utc_now() - cursor < timedelta(seconds=max_age):
+            return False
+        refresh(path)
+        return True
+
+
+def snapshot_time(path=None):
+    """
+    When the snapshot was last brought up to date (ISO 8601), or None.
+    """
+    return _read_state(path or settings.SNAPSHOT_PATH).get("cursor")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Refresh the local applicant snapshot from Airtable")
+    parser.add_argument("--full", action="store_true", help="re-read the whole table instead of a delta")
+    parser.add_argument("--path", default=settings.SNAPSHOT_PATH)
+    args = parser.parse_args()
+    refresh(args.path, full=args.full)
@@ -0,0 +1,149 @@
+"""
+Structured (tool-use) evaluation output.
+
+In "tool" output mode the prompts carry a record_evaluation tool and force
+the model to call it, so the reply is a typed {score, recommendation,
+feedback} object instead of text to be scraped. The object is checked
+against EVALUATION_SCHEMA. Fields that fail are re-asked instead of re-running
+the whole evaluation: the repair request repeats the original prompt (its
+rubric prefix is served from the prompt cache), then the model's tool call
+and a tool_result listing the problems. The tool then accepts only the
+invalid fields, so the model corrects them with the applicant in view.
+
+This module only builds requests and checks replies; services.ai_eval makes
+the calls. Mode: EVAL_OUTPUT_MODE or configure().
+"""
+from config import settings
+
+MODES = ("text", "tool")
+TOOL_NAME = "record_evaluation"
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {
+            "type": "integer",
+            "minimum": 10,
+            "maximum": 100,
+            "description": "Overall score from 10 to 100, following the scoring guidelines.",
+        },
+        "recommendation": {
+            "type": "string",
+            "enum": ["Select", "Waitlist"],
+            "description": "Select or Waitlist.",
+        },
+        "feedback": {
+            "type": "string",
+            "minLength": 40,
+            "description": (
+                "Internal note starting 'Hey Alan and Gretel,': strengths, weaknesses "
+                "and the evidence behind the score."
+            ),
+        },
+    },
+    "required": ["score", "recommendation", "feedback"],
+}
+
+# Output allowance of a repair that doesn't include the feedback
+REPAIR_MAX_TOKENS = 300
+# Stands in for the id of the call being repaired; only has to match its tool_result
+REPAIR_TOOL_USE_ID = "toolu_evaluation"
+
+_mode = settings.EVAL_OUTPUT_MODE
+
+
+def configure(mode):
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"Unknown output mode {mode!r}; expected one of {MODES}")
+    _mode = mode
+
+
+def enabled():
+    return _mode == "tool"
+
+
+def _tool(properties, required):
+    return {
+        "name": TOOL_NAME,
+        "description": "Record the evaluation of the applicant or team.",
+        "input_schema": {"type": "object", "properties": properties, "required": required},
+    }
+
+
+def tool_params():
+    """
+    Messages API parameters that make the model answer through the tool.
+    """
+    return {
+        "tools": [_tool(EVALUATION_SCHEMA["properties"], EVALUATION_SCHEMA["required"])],
+        "tool_choice": {"type": "tool", "name": TOOL_NAME},
+    }
+
+
+def tool_input(message):
+    """
+    The input of the record_evaluation call in a Messages API reply, or None.
+    """
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == TOOL_NAME:
+            return dict(block.input)
+    return None
+
+
+def _check(name, rule, value):
+    if value is None:
+        return "missing"
+    expected = rule.get("type")
+    if expected == "integer" and (isinstance(value, bool) or not isinstance(value, int)):
+        return f"got {value!r}; must be an integer"
+    if expected == "string" and not isinstance(value, str):
+        return f"got {value!r}; must be a string"
+    if ("minimum" in rule and value < rule["minimum"]) or ("maximum" in rule and value > rule["maximum"]):
+        return f"got {value}; must be from {rule.get('minimum')} to {rule.get('maximum')}"
+    if "enum" in rule and value not in rule["enum"]:
+        return f"got {value!r}; must be one of {', '.join(rule['enum'])}"
+    if "minLength" in rule and len(value.strip()) < rule["minLength"]:
+        return f"too short; must be at least {rule['minLength']} characters"
+    return None
+
+
+def validate(data, schema=EVALUATION_SCHEMA):
+    """
+    {field: problem} for every required field that is missing or breaks its rule.
+    """
+    if not isinstance(data, dict):
+        return {name: "missing" for name in schema["required"]}
+    errors = {}
+    for name in schema["required"]:
+        problem = _check(name, schema["properties"][name], data.get(name))
+        if problem:
+            errors[name] = problem
+    return errors
+
+
+def repair_params(params, data, errors):
+    """
+    The original request `params` continued with the model's tool call
+    (`data`) and a tool_result listing `errors`. The tool accepts only the
+    invalid fields. Only a feedback repair keeps the original max_tokens.
+    """
+    problems = "\n".join(f"- {name}: {problem}" for name, problem in errors.items())
+    properties = {name: EVALUATION_SCHEMA["properties"][name] for name in errors}
+    messages = list(params["messages"]) + [
+        {"role": "assistant", "content": [
+            {"type": "tool_use", "id": REPAIR_TOOL_USE_ID, "name": TOOL_NAME, "input": data},
+        ]},
+        {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": REPAIR_TOOL_USE_ID, "is_error": True,
+             "content": f"Invalid fields:\n{problems}"},
+            {"type": "text", "text": f"Call {TOOL_NAME} again with corrected values for these fields only."},
+        ]},
+    ]
+    return dict(
+        params,
+        max_tokens=params["max_tokens"] if "feedback" in errors else min(REPAIR_MAX_TOKENS, params["max_tokens"]),
+        messages=messages,
+        tools=[_tool(properties, list(errors))],
+        tool_choice={"type": "tool", "name": TOOL_NAME},
+    )
@@ -0,0 +1,86 @@
+"""
+Persistent state of the incremental sync daemon: the poll cursor and the
+team each known applicant belongs to.
+
+The cursor is the start time of the last poll that finished, so the next
+poll only asks Airtable for records edited since then. The team map is what
+lets a poll notice membership changes: an applicant whose Team Code differs
+from the stored one has left one team and joined another, and both need
+re-scoring. Applicants and teams whose evaluation or write failed are kept
+for the next poll, since an unedited record won't come back through the
+cursor on its own. Saved as JSON, replaced atomically after each poll.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from config import settings
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def to_iso(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class SyncState:
+    def __init__(self, path=None):
+        self.path = path or settings.SYNC_STATE_PATH
+        self.load()
+
+    def load(self):
+        """
+        (Re)read the saved state, dropping changes of a poll that didn't finish.
+        """
+        self.cursor = None  # ISO 8601 start of the last finished poll
+        self.teams = {}  # record_id -> Team Code ("" for none)
+        self.retry = []  # record_ids to fetch again next poll
+        self.retry_teams = []  # team codes to re-score next poll
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.cursor = data.get("cursor")
+            self.teams = data.get("teams", {})
+            self.retry = data.get("retry", [])
+            self.retry_teams = data.get("retry_teams", [])
+
+    def since(self, overlap=None):
+        """
+        Timestamp to poll from: the cursor minus `overlap` seconds, so edits
+        stamped by a clock slightly behind ours are not missed. None before
+        the first poll (read the whole table).
+        """
+        if self.cursor is None:
+            return None
+        overlap = settings.SYNC_OVERLAP_SECONDS if overlap is None else overlap
+        cursor = datetime.fromisoformat(self.cursor.replace("Z", "+00:00"))
+        return to_iso(cursor - timedelta(seconds=overlap))
+
+    def move_team(self, record_id, team_code):
+        """
+        Record the applicant's current team. Returns the previous team code
+        ("" for none) if a known applicant changed teams, else None. A first
+        sighting is not a move; a new applicant's team is re-scored because
+        the applicant is.
+        """
+        previous = self.teams.get(record_id)
+        self.teams[record_id] = team_code
+        if previous is None or previous == team_code:
+            return None
+        return previous
+
+    def save(self, cursor, retry=(), retry_teams=()):
+        self.cursor = cursor
+        self.retry = sorted(set(retry))
+        self.retry_teams = sorted(set(retry_teams))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({
+                "cursor": self.cursor, "teams": self.teams,
+                "retry": self.retry, "retry_teams": self.retry_teams,
+            }, f)
+        os.replace(temporary, self.path)
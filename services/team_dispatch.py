@@ -0,0 +1,53 @@
+import threading
+
+
+class TeamDispatcher:
+    """
+    Tracks individual evaluations per team and calls on_ready(team_code, members)
+    as soon as the last member of a team is done, so team scoring overlaps
+    the rest of the individual pass.
+
+    `teams` is {team_code: [applicant, ...]} as from group_applicants_by_team;
+    the member dicts are the same objects the individual pass updates, so the
+    team sees the fresh individual scores without reading Airtable again.
+    """
+
+    def __init__(self, teams, on_ready):
+        self.teams = teams
+        self.on_ready = on_ready
+        self.remaining = {team_code: len(members) for team_code, members in teams.items()}
+        self.team_of = {
+            member["record_id"]: team_code
+            for team_code, members in teams.items()
+            for member in members
+        }
+        self.dispatched = set()
+        self.lock = threading.Lock()
+
+    def done(self, applicant):
+        """
+        Mark one applicant's individual evaluation finished (scored, skipped
+        or failed). Returns the team code if this completed a team.
+        """
+        team_code = self.team_of.get(applicant["record_id"])
+        if team_code is None:
+            return None
+        with self.lock:
+            self.remaining[team_code] -= 1
+            if self.remaining[team_code] > 0 or team_code in self.dispatched:
+                return None
+            self.dispatched.add(team_code)
+        self.on_ready(team_code, self.teams[team_code])
+        return team_code
+
+    def dispatch_remaining(self):
+        """
+        Dispatch teams still waiting on members (e.g. a member never reached
+        the individual pass). Returns their codes.
+        """
+        with self.lock:
+            waiting = [code for code in self.teams if code not in self.dispatched]
+            self.dispatched.update(waiting)
+        for team_code in waiting:
+            self.on_ready(team_code, self.teams[team_code])
+        return waiting
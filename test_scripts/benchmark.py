@@ -0,0 +1,301 @@
+"""
+Offline end-to-end benchmark of the evaluation pipeline.
+
+Starts the fake Airtable, GitHub and Anthropic servers on localhost, fills
+the fake base with a seeded synthetic set of applicants (with teams and
+shared GitHub URLs), then runs the individual and team passes from
+test_scripts.eval_pipeline against them (or the single combined pass).
+Reports records/sec per pass, client-side p50/p99 per pipeline stage
+(services.metrics), server-side p50/p99 per route, request and status
+counts, and peak RSS. Nothing leaves the machine.
+
+    python -m test_scripts.benchmark --applicants 1000 --mode streaming
+    python -m test_scripts.benchmark --applicants 50000 --llm-latency 2 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+from test_scripts.fake_airtable import start_fake_airtable
+from test_scripts.fake_anthropic import start_fake_anthropic
+from test_scripts.fake_github import start_fake_github
+
+TRACKS = ["AI Agents", "Developer Tools", "Fintech", "Climate", "Health"]
+SKILLS = ["Python", "TypeScript", "Rust", "Go", "React", "PyTorch", "SQL", "Kubernetes", "Solidity", "Swift"]
+WORDS = (
+    "build ship learn prototype scale users model data agent team launch "
+    "open source latency product hackathon deploy api design research"
+).split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def generate_applicants(count, seed=0, team_share=0.7, shared_github_share=0.2):
+    """
+    Synthetic applicant rows (field dicts) for the fake base. About
+    `team_share` of applicants are in teams of 2-4 sharing a team code,
+    name, track and project repo; `shared_github_share` reuse another
+    applicant's GitHub profile URL, as duplicate sign-ups do.
+    """
+    rng = random.Random(seed)
+    applicants = []
+    team_number = 0
+    while len(applicants) < count:
+        in_team = rng.random() < team_share
+        size = min(rng.randint(2, 4) if in_team else 1, count - len(applicants))
+        track = rng.choice(TRACKS)
+        team_fields = {}
+        repo = f"https://github.com/team{team_number}/project-{team_number}"
+        if in_team and size > 1:
+            team_fields = {"Team Code": f"T{team_number:05d}", "Team Name": f"Team {team_number}"}
+        team_number += 1
+        for _ in range(size):
+            n = len(applicants)
+            if applicants and rng.random() < shared_github_share:
+                github_url = rng.choice(applicants)["GitHub URL"]
+            else:
+                github_url = f"https://github.com/dev{n}"
+            applicant = {
+                "Chosen Track": track,
+                "First Name": f"Applicant{n}",
+                "Last Name": f"Synthetic{n}",
+                "Company": f"Company {rng.randint(1, count)}",
+                "Title": rng.choice(["Engineer", "Student", "Founder", "Researcher", "Designer"]),
+                "GitHub URL": github_url,
+                "Motivation to Join": " ".join(_sentence(rng, 12) for _ in range(3)),
+                "Technical Skills": ", ".join(rng.sample(SKILLS, 3)),
+                "Past Projects": " ".join(_sentence(rng, 10) for _ in range(2)),
+                "GitHub Repository Link for Project": repo,
+                "Post-Event Development Interest": rng.choice(["Yes", "No", "Maybe"]),
+                "Other": "",
+            }
+            applicant.update(team_fields)
+            applicants.append(applicant)
+    return applicants
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _route_report(state):
+    with state.lock:
+        timings = {route: list(values) for route, values in state.timings.items()}
+        statuses = dict(state.status_counts)
+    routes = {
+        route: {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 0.5) * 1000, 2),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+        }
+        for route, values in sorted(timings.items())
+    }
+    return {"requests": state.request_count, "statuses": statuses, "routes": routes}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _configure_environment(args, airtable_url, github_url, anthropic_url, workdir):
+    """
+    Point the pipeline at the fakes. Must run before services are imported,
+    since config.settings reads the environment at import time. Client-side
+    limits default to generous values so the fakes' own limits govern;
+    anything already set in the environment wins.
+    """
+    os.environ.update({
+        "AIRTABLE_API_KEY": "patFakeBenchmarkKey",
+        "AIRTABLE_BASE_ID": "appBenchmark",
+        "AIRTABLE_TABLE_NAME": "Applicants",
+        "AIRTABLE_ENDPOINT_URL": airtable_url,
+        "CLAUDE_API_KEY": "sk-ant-fake-benchmark",
+        "ANTHROPIC_BASE_URL": anthropic_url,
+        "GITHUB_WEB_URL": github_url,
+        "GITHUB_API_URL": github_url,
+        "GITHUB_GRAPHQL_URL": f"{github_url}/graphql",
+        "GITHUB_CACHE_PATH": os.path.join(workdir, "github_cache.sqlite3"),
+        "RUN_JOURNAL_DIR": os.path.join(workdir, "journal"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite3"),
+        "LLM_CACHE_MODE": "off",
+        "AIRTABLE_MIRROR_PATH": os.path.join(workdir, "airtable_mirror.sqlite3"),
+        "AIRTABLE_READ_SOURCE": args.read_source,
+    })
+    os.environ["EVAL_OUTPUT_MODE"] = "tool" if args.tool_output else "text"
+    os.environ["EVAL_CASCADE"] = "true" if args.cascade else "false"
+    os.environ["PROMPT_README_TOKENS"] = str(args.readme_tokens)
+    if args.graphql:
+        os.environ["GITHUB_TOKEN"] = "ghp_fakebenchmark"
+    else:
+        os.environ.pop("GITHUB_TOKEN", None)
+    os.environ.setdefault("BATCH_POLL_INTERVAL", "1")
+    os.environ.setdefault("ANTHROPIC_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("EVAL_TOKENS_PER_MINUTE", "0")
+    os.environ.setdefault("GITHUB_REQUESTS_PER_SECOND", "1000")
+    os.environ.setdefault("RETRY_BASE_DELAY", "0.2")
+
+
+def _timed(fn, verbose):
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        fn()
+    return time.perf_counter() - started
+
+
+def run_benchmark(args):
+    applicants = generate_applicants(args.applicants, seed=args.seed)
+    team_members = sum(1 for applicant in applicants if applicant.get("Team Code"))
+
+    airtable, airtable_url = start_fake_airtable(
+        applicants, latency=args.airtable_latency, error_rate=args.error_rate, rate_limit=args.airtable_rate_limit
+    )
+    github, github_url = start_fake_github(latency=args.github_latency, error_rate=args.error_rate)
+    anthropic, anthropic_url = start_fake_anthropic(
+        latency=args.llm_latency, batch_delay=args.batch_delay, error_rate=args.error_rate
+    )
+
+    with tempfile.TemporaryDirectory(prefix="eval-bench-") as workdir:
+        _configure_environment(args, airtable_url, github_url, anthropic_url, workdir)
+        from test_scripts import eval_pipeline
+        from services import cascade, metrics
+        from services.ai_eval import reset_usage, usage_summary
+
+        # (pass name, run function, records the pass covers)
+        if args.mode == "combined":
+            passes = [("combined", lambda: eval_pipeline.run_combined_evaluation_and_update(force=True), args.applicants)]
+        elif args.mode == "batch":
+            passes = [
+                ("individual", lambda: eval_pipeline.run_batch_evaluation_and_update(force=True), args.applicants),
+                ("team", eval_pipeline.run_batch_team_evaluation_and_update, team_members),
+            ]
+        else:
+            individual = (eval_pipeline.run_streaming_evaluation_and_update if args.mode == "streaming"
+                          else eval_pipeline.run_evaluation_and_update)
+            passes = [
+                ("individual", lambda: individual(force=True), args.applicants),
+                ("team", eval_pipeline.run_team_evaluation_and_update, team_members),
+            ]
+
+        results = {}
+        for name, run, records in passes:
+            metrics.reset()
+            cascade.reset()
+            reset_usage()
+            seconds = _timed(run, args.verbose)
+            run_metrics = metrics.run_report()
+            results[name] = {
+                "seconds": round(seconds, 2),
+                "records_per_second": round(records / seconds, 2) if seconds else None,
+                "stages": run_metrics["stages"],
+                "cache_hit_rates": run_metrics["cache_hit_rates"],
+                "llm_usage": usage_summary(),
+            }
+            if args.cascade:
+                results[name]["cascade"] = cascade.summary()
+        fields = [record["fields"] for record in airtable.state.records.values()]
+        scored = {
+            "individual": sum(1 for f in fields if f.get("Individual Score")),
+            "team": sum(1 for f in fields if f.get("Team Score")),
+        }
+
+    for server in (airtable, github, anthropic):
+        server.shutdown()
+
+    return {
+        "config": {
+            "applicants": args.applicants,
+            "team_members": team_members,
+            "mode": args.mode,
+            "graphql": args.graphql,
+            "tool_output": args.tool_output,
+            "cascade": args.cascade,
+            "read_source": args.read_source,
+            "readme_tokens": args.readme_tokens,
+            "seed": args.seed,
+            "error_rate": args.error_rate,
+            "latency": {"airtable": args.airtable_latency, "github": args.github_latency, "llm": args.llm_latency},
+            "airtable_rate_limit": args.airtable_rate_limit,
+        },
+        "passes": results,
+        "scored": scored,
+        "servers": {
+            "airtable": _route_report(airtable.state),
+            "github": _route_report(github.state),
+            "anthropic": _route_report(anthropic.state),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def print_report(report):
+    config = report["config"]
+    print(f"Benchmark: {config['applicants']} applicants ({config['team_members']} in teams), "
+          f"mode={config['mode']}, graphql={config['graphql']}, error_rate={config['error_rate']}")
+    print(f"  scored: {report['scored']['individual']} individual, {report['scored']['team']} team members")
+    for name, result in report["passes"].items():
+        print(f"  {name:<10} {result['seconds']:>8.2f}s  {result['records_per_second']} records/sec")
+        usage = result["llm_usage"]
+        if usage["calls"]:
+            print(f"    llm usage: {usage['calls']} calls, {usage['input_tokens'] // usage['calls']} input "
+                  f"+ {usage['cache_read_input_tokens'] // usage['calls']} cache-read tokens per call")
+        for stage, timing in result["stages"].items():
+            print(f"    {stage:<14} n={timing['count']:<7} p50={_ms(timing['p50'])}ms p99={_ms(timing['p99'])}ms "
+                  f"total={timing['total_seconds']}s ({timing['share']:.0%})")
+        if "cascade" in result:
+            summary = result["cascade"]
+            print(f"    cascade: {summary['screened']} screened, {summary['escalated']} escalated {summary['reasons']}, "
+                  f"cost ${summary.get('cost_usd')} vs ${summary.get('large_only_cost_usd')} large-only")
+            for tier, totals in summary["tiers"].items():
+                print(f"      {tier:<6} {totals['model']} calls={totals['calls']} in={totals['input_tokens']} "
+                      f"out={totals['output_tokens']} p50={_ms(totals['p50_seconds'])}ms p90={_ms(totals['p90_seconds'])}ms")
+    for service, stats in report["servers"].items():
+        print(f"  {service}: {stats['requests']} requests, statuses {stats['statuses']}")
+        for route, timing in stats["routes"].items():
+            print(f"    {route:<14} n={timing['count']:<7} p50={timing['p50_ms']}ms p99={timing['p99_ms']}ms")
+    print(f"  peak RSS: {report['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation pipeline against local fake services")
+    parser.add_argument("--applicants", type=int, default=1000, help="synthetic applicants (100 to 50k)")
+    parser.add_argument("--mode", choices=["bounded", "streaming", "batch", "combined"], default="bounded",
+                        help="individual pass implementation, or one combined individual + team pass")
+    parser.add_argument("--graphql", action="store_true", help="enrich through the GraphQL backend")
+    parser.add_argument("--tool-output", action="store_true", help="evaluate with tool-use structured output")
+    parser.add_argument("--cascade", action="store_true", help="screen with the small model, escalate uncertain scores")
+    parser.add_argument("--read-source", choices=["api", "mirror"], default="api", help="read Airtable directly or through the local mirror")
+    parser.add_argument("--readme-tokens", type=int, default=0, help="condensed README tokens in applicant prompts (PROMPT_README_TOKENS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--airtable-latency", type=float, default=0.05, help="seconds per Airtable request")
+    parser.add_argument("--github-latency", type=float, default=0.05, help="seconds per GitHub request")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per Messages request")
+    parser.add_argument("--batch-delay", type=float, default=2.0, help="seconds before a message batch ends")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--airtable-rate-limit", type=float, default=5, help="Airtable requests per second before 429s")
+    parser.add_argument("--output", help="also write the report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,125 @@
+"""
+Reviewer dashboard over the local applicant snapshot (services.snapshot).
+
+    python -m streamlit run test_scripts/dashboard.py
+
+Every autorefresh tick re-reads only the Parquet file, and only when it
+changed on disk; the frame is shared by all sessions. Airtable is asked for
+a delta at most once per SNAPSHOT_REFRESH_SECONDS across every reviewer, so
+several people with the page open cost the base the same as one.
+Filtering and sorting run on the in-memory frame, and the table renders the
+first DASHBOARD_MAX_ROWS matches.
+"""
+import os
+import streamlit as st
+from streamlit_autorefresh import st_autorefresh
+from config import settings
+from services import snapshot
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load(path, modified):
+    # One frame shared (not copied) by every session; `modified` (file mtime)
+    # is part of the key, so a new file means a new frame
+    return snapshot.load(path)
+
+
+def load_snapshot():
+    try:
+        snapshot.refresh_if_stale()
+    except Exception as e:
+        st.warning(f"Snapshot refresh failed, showing the last one: {e}")
+    path = settings.SNAPSHOT_PATH
+    modified = os.path.getmtime(path) if os.path.exists(path) else None
+    return _load(path, modified)
+
+
+def _options(frame, column):
+    return sorted(value for value in frame[column].dropna().unique() if value != "")
+
+
+def filter_frame(frame):
+    """
+    Sidebar filters applied to the frame.
+    """
+    st.sidebar.header("Filters")
+    tracks = st.sidebar.multiselect("Track", _options(frame, "Chosen Track"))
+    recommendations = st.sidebar.multiselect("Recommendation", ["Select", "Waitlist", "None"])
+    low, high = st.sidebar.slider("Individual score", 0, 100, (0, 100))
+    unscored = st.sidebar.checkbox("Include unscored", value=True)
+    team = st.sidebar.text_input("Team code or name")
+    search = st.sidebar.text_input("Name or company")
+
+    scores = frame["Individual Score"]
+    mask = scores.between(low, high) | (scores.isna() & unscored)
+    if tracks:
+        mask &= frame["Chosen Track"].isin(tracks)
+    if recommendations:
+        wanted = frame["Recommendation"].isin([r for r in recommendations if r != "None"])
+        if "None" in recommendations:
+            wanted |= frame["Recommendation"].isna()
+        mask &= wanted
+    if team:
+        mask &= (frame["Team Code"].fillna("").str.contains(team, case=False, regex=False)
+                 | frame["Team Name"].fillna("").str.contains(team, case=False, regex=False))
+    if search:
+        names = frame["First Name"].fillna("") + " " + frame["Last Name"].fillna("") + " " + frame["Company"].fillna("")
+        mask &= names.str.contains(search, case=False, regex=False)
+    return frame[mask]
+
+
+def sort_frame(frame):
+    columns = ["Individual Score", "Team Score", "Chosen Track", "Team Code", "Last Name"]
+    column = st.sidebar.selectbox("Sort by", columns)
+    descending = st.sidebar.checkbox("Descending", value=column in ("Individual Score", "Team Score"))
+    return frame.sort_values(column, ascending=not descending, na_position="last")
+
+
+def show_team_summary(frame):
+    teams = frame[frame["Team Code"].fillna("") != ""]
+    if teams.empty:
+        return
+    summary = teams.groupby("Team Code").agg(
+        team_name=("Team Name", "first"),
+        track=("Chosen Track", "first"),
+        members=("record_id", "count"),
+        team_score=("Team Score", "max"),
+        mean_individual=("Individual Score", "mean"),
+    ).sort_values("team_score", ascending=False, na_position="last")
+    with st.expander(f"Teams ({len(summary)})"):
+        st.dataframe(summary.head(settings.DASHBOARD_MAX_ROWS), width="stretch")
+
+
+def show_details(frame):
+    if frame.empty:
+        return
+    labels = (frame["First Name"].fillna("") + " " + frame["Last Name"].fillna("")).tolist()
+    choice = st.selectbox("Applicant details", range(len(frame)), format_func=lambda n: labels[n])
+    row = frame.iloc[choice]
+    st.markdown(f"**{labels[choice]}** · {row['Title'] or ''} at {row['Company'] or ''} · {row['Chosen Track'] or ''}")
+    st.markdown(f"Individual score: **{row['Individual Score']}** · Recommendation: **{row['Recommendation']}**")
+    st.text(row["Individual Feedback"] or "No feedback yet.")
+    if row["Team Code"]:
+        st.markdown(f"Team {row['Team Name'] or row['Team Code']}: **{row['Team Score']}**")
+        st.text(row["Team Feedback"] or "No team feedback yet.")
+
+
+def main():
+    st.set_page_config(page_title="Applicant review", layout="wide")
+    st_autorefresh(interval=settings.DASHBOARD_AUTOREFRESH_SECONDS * 1000, key="snapshot")
+    frame = load_snapshot()
+    st.title("Applicant review")
+    st.caption(f"{len(frame)} applicants · snapshot from {snapshot.snapshot_time() or 'never'}")
+
+    shown = sort_frame(filter_frame(frame))
+    st.write(f"{len(shown)} matching" + (f", showing the first {settings.DASHBOARD_MAX_ROWS}" if len(shown) > settings.DASHBOARD_MAX_ROWS else ""))
+    shown = shown.head(settings.DASHBOARD_MAX_ROWS)
+    st.dataframe(
+        shown[["First Name", "Last Name", "Company", "Chosen Track", "Team Code", "Individual Score", "Recommendation", "Team Score"]],
+        width="stretch", hide_index=True,
+    )
+    show_details(shown)
+    show_team_summary(frame)
+
+
+main()
@@ -1,36 +1,240 @@
-from pyairtable import Table
-from config.settings import AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME,OPENAI_API_KEY,CLAUDE_API_KEY
-from services.ai_eval import evaluate_applicant, parse_ai_response
-from services.airtable import fetch_applicants_for_evaluation
+import argparse
+from services.clients import get_airtable_table
+from config import settings
+from prompts.prompts_template import get_applicant_evaluation_prompt, get_team_evaluation_prompt
+from services.ai_eval import evaluate_prompt, parse_ai_response, estimate_tokens, usage_summary
+from services.airtable import iter_applicants_for_evaluation, all_of, modified_since, INDIVIDUAL_SCORE_BLANK
 from services.ai_eval import evaluate_team, parse_team_ai_response
 from services.airtable import fetch_applicants_for_team_evaluation, group_applicants_by_team, prepare_team_data_for_ai, update_team_members_in_airtable
+from services.airtable import fetch_applicants_for_combined_evaluation
+from services.team_dispatch import TeamDispatcher
+from concurrent.futures import ThreadPoolExecutor
+from services.evaluation_engine import run_bounded
+from services.pipeline import Pipeline, Stage
+from services.ai_batch import evaluate_batch
+from services.rate_limit import tokens_per_minute_bucket
+from services.http_retry import retry_summary
+from services.run_journal import RunJournal, EVALUATED, WRITTEN
+from services import cascade, llm_cache, metrics, structured_eval
+from services.airtable_writer import AirtableWriteQueue
+from services.enrichment import enrich_applicant, enrich_applicants, GitHubPrefetcher, compute_fingerprint, needs_evaluation
 
-table = Table(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME)
+table = get_airtable_table()
 
-def run_evaluation_and_update():
-    applicants = fetch_applicants_for_evaluation()
-    for applicant in applicants:
-        try:
-            ai_output = evaluate_applicant(applicant)
-            score, feedback = parse_ai_response(ai_output)
-
-            if score is None:
-                print(f"Warning: No score parsed for applicant {applicant.get('First Name')}")
-
-            # Update Airtable record with Score and Feedback
-            table.update(applicant["record_id"], {
-                "Individual Score": score if score is not None else 0,
-                "Individual Feedback": feedback if feedback else "No feedback generated."
-            })
-            print(f"Updated applicant {applicant.get('First Name')} with score {score}")
-        except Exception as e:
-            print(f"Error evaluating applicant {applicant.get('First Name')}: {e}")
+
+def print_run_summary(writer, *journals):
+    """
+    End-of-run report shared by every mode. Closes the journals.
+    """
+    print(f"Write-back: {writer.summary()}")
+    for journal in journals:
+        label = f" ({journal.name})" if len(journals) > 1 else ""
+        print(f"Journal{label}: {journal.summary()}")
+        journal.close()
+    print(f"Token usage: {usage_summary()}")
+    if cascade.enabled():
+        print(f"Cascade: {cascade.summary()}")
+    print(f"LLM cache: {llm_cache.summary()}")
+    print(f"Requests: {retry_summary()}")
+    print(f"Stage timings: {metrics.stage_summary()}")
+
+def prepare_applicant(applicant, force=False, prefetcher=None, journal=None):
+    """
+    Attach GitHub data and the input fingerprint. Returns None when the
+    applicant's inputs are unchanged since the last score, or when a resumed
+    run's journal shows the result was already written.
+    """
+    if journal is not None:
+        entry = journal.get(applicant["record_id"])
+        if entry and entry["state"] == WRITTEN:
+            return None
+        if entry and entry["state"] == EVALUATED:
+            # Replay the stored model output instead of paying for the call again
+            applicant["raw_output"] = entry["raw_output"]
+            applicant["fingerprint"] = entry.get("fingerprint")
+            return applicant
+        journal.fetched(applicant["record_id"])
+
+    enrich_applicant(applicant, prefetcher)
+    applicant["fingerprint"] = compute_fingerprint(applicant)
+    if not needs_evaluation(applicant, applicant["fingerprint"], force=force):
+        return None
+    return applicant
+
+
+def build_applicant_prompt(applicant):
+    if "raw_output" not in applicant:
+        applicant["prompt"] = get_applicant_evaluation_prompt(applicant)
+    return applicant
+
+
+def score_applicant(applicant, budget=None, journal=None):
+    """
+    Run the LLM call for a prepared applicant (unless a resumed run already
+    has its output) and parse the result.
+    """
+    ai_output = applicant.get("raw_output")
+    if ai_output is None:
+        if budget is not None:
+            budget.acquire(estimate_tokens(applicant["prompt"]))
+        ai_output = evaluate_prompt(applicant["prompt"])
+        if journal is not None:
+            journal.evaluated(applicant["record_id"], ai_output, fingerprint=applicant["fingerprint"])
+    score, feedback = parse_ai_response(ai_output)
+
+    if score is None:
+        print(f"Warning: No score parsed for applicant {applicant.get('First Name')}")
+
+    applicant["score"], applicant["feedback"] = score, feedback
+    return applicant
+
+
+def queue_applicant_update(applicant, writer, journal=None):
+    # Queue Airtable update with Score and Feedback
+    score, feedback = applicant["score"], applicant["feedback"]
+    record_id = applicant["record_id"]
+    on_written = (lambda: journal.written(record_id)) if journal is not None else None
+    writer.add(record_id, {
+        "Individual Score": score if score is not None else 0,
+        "Individual Feedback": feedback if feedback else "No feedback generated.",
+        "Evaluation Fingerprint": applicant["fingerprint"]
+    }, on_written=on_written)
+    return applicant
+
+
+def evaluate_and_update_applicant(applicant, writer, force=False, journal=None, budget=None):
+    """
+    Evaluate one applicant and queue the score and feedback for write-back.
+    Returns None when the applicant's inputs are unchanged since the last
+    score and the evaluation was skipped. `budget` (a tokens-per-minute
+    bucket) is only charged when the LLM is actually called.
+    """
+    if prepare_applicant(applicant, force=force, journal=journal) is None:
+        return None
+    build_applicant_prompt(applicant)
+    score_applicant(applicant, budget, journal)
+    queue_applicant_update(applicant, writer, journal)
+    return applicant["score"]
+
+
+def run_evaluation_and_update(max_concurrency=None, tokens_per_minute=None, force=False, formula=None, resume=False):
+    """
+    Evaluate all applicants with up to `max_concurrency` evaluations in flight,
+    throttled by the tokens-per-minute budget (see config.settings).
+    Applicants whose inputs are unchanged since their last score are skipped
+    unless `force` is set. `formula` restricts the fetch server-side.
+    With `resume`, work recorded in the previous run's journal is not redone.
+    """
+    journal = RunJournal("individual", resume=resume)
+    applicants = list(iter_applicants_for_evaluation(formula))
+    # GitHub data for the whole set is fetched up front, once per unique URL;
+    # applicants the journal already has results for don't need it
+    enrich_applicants([a for a in applicants if journal.state(a["record_id"]) not in (EVALUATED, WRITTEN)])
+    if tokens_per_minute is None:
+        tokens_per_minute = settings.EVAL_TOKENS_PER_MINUTE
+    budget = tokens_per_minute_bucket(tokens_per_minute)
+    skipped = 0
+    with AirtableWriteQueue(table) as writer:
+        results = run_bounded(
+            applicants,
+            lambda applicant: evaluate_and_update_applicant(applicant, writer, force=force, journal=journal, budget=budget),
+            max_concurrency=max_concurrency,
+        )
+        for applicant, score, error in results:
+            if error is not None:
+                print(f"Error evaluating applicant {applicant.get('First Name')}: {error}")
+            elif score is None:
+                skipped += 1
+            else:
+                print(f"Evaluated applicant {applicant.get('First Name')} with score {score}")
+    print(f"Skipped {skipped} unchanged or already written applicants")
+    print_run_summary(writer, journal)
             
 
-def run_team_evaluation_and_update():
+def run_streaming_evaluation_and_update(force=False, formula=None, resume=False):
+    """
+    Individual evaluation as a staged pipeline:
+    Airtable page reader -> GitHub enricher -> prompt builder -> LLM workers -> batched writer.
+    Stages run concurrently on bounded queues (worker counts in config.settings),
+    so scoring starts with the first Airtable page and a slow stage holds back
+    the ones before it instead of buffering the whole table.
+    """
+    budget = tokens_per_minute_bucket(settings.EVAL_TOKENS_PER_MINUTE)
+    prefetcher = GitHubPrefetcher()
+    journal = RunJournal("individual", resume=resume)
+
+    def read_and_prefetch():
+        # GitHub lookups start as soon as a record is read, deduplicated across the run
+        for applicant in iter_applicants_for_evaluation(formula):
+            if journal.state(applicant["record_id"]) not in (EVALUATED, WRITTEN):
+                prefetcher.prefetch([applicant])
+            yield applicant
+
+    with AirtableWriteQueue(table) as writer:
+        pipeline = Pipeline([
+            Stage("enrich", lambda applicant: prepare_applicant(applicant, force=force, prefetcher=prefetcher, journal=journal), workers=settings.PIPELINE_ENRICH_WORKERS),
+            Stage("prompt", build_applicant_prompt, workers=settings.PIPELINE_PROMPT_WORKERS),
+            Stage("llm", lambda applicant: score_applicant(applicant, budget, journal), workers=settings.PIPELINE_LLM_WORKERS),
+            Stage("write", lambda applicant: queue_applicant_update(applicant, writer, journal), workers=1),
+        ])
+        for applicant in pipeline.run(read_and_prefetch()):
+            print(f"Evaluated applicant {applicant.get('First Name')} with score {applicant['score']}")
+    prefetcher.close()
+
+    for stage_name, applicant, error in pipeline.stats.errors:
+        name = applicant.get("First Name") if applicant else "-"
+        print(f"Error in {stage_name} stage for applicant {name}: {error}")
+    print(f"Skipped {pipeline.stats.dropped['enrich']} unchanged or already written applicants")
+    print_run_summary(writer, journal)
+
+
+def evaluate_team_with_journal(team_code, team_data, journal):
+    """
+    Evaluate a team, reusing the raw output from the journal of a resumed run.
+    """
+    entry = journal.get(team_code)
+    if entry and entry["state"] == EVALUATED:
+        return entry["raw_output"]
+    ai_output = evaluate_team(team_data)
+    journal.evaluated(team_code, ai_output)
+    return ai_output
+
+
+def evaluate_and_update_team(team_code, team_members, writer, journal):
+    """
+    Score one team and queue the team score/feedback for every member.
+    Returns the team score, or None if the team data could not be prepared.
+    """
+    journal.fetched(team_code)
+    # Prepare team data
+    team_data = prepare_team_data_for_ai(team_code, team_members)
+    if not team_data:
+        print(f"Warning: Could not prepare data for team {team_code}")
+        return None
+
+    # Get AI evaluation
+    ai_output = evaluate_team_with_journal(team_code, team_data, journal)
+
+    # Parse response
+    team_score, team_feedback = parse_team_ai_response(ai_output)
+    if team_score is None:
+        print(f"Warning: No team score parsed for team {team_code}")
+
+    # Update all team members in Airtable
+    update_team_members_in_airtable(
+        team_members, team_score, team_feedback, writer=writer,
+        on_team_written=lambda: journal.written(team_code),
+    )
+    return team_score
+
+
+def run_team_evaluation_and_update(resume=False):
     """
     Main function to run team evaluation pipeline.
+    With `resume`, teams the previous run's journal shows as written are
+    skipped and evaluated-but-unwritten teams are written without a new call.
     """
+    journal = RunJournal("team", resume=resume)
     # Step 1: Fetch all applicants with team codes
     print("Fetching applicants for team evaluation...")
     applicants = fetch_applicants_for_team_evaluation()
@@ -41,37 +245,211 @@ def run_team_evaluation_and_update():
     teams = group_applicants_by_team(applicants)
     print(f"Found {len(teams)} teams to evaluate")
     
-    # Step 3: Evaluate each team
+    # Step 3: Evaluate each team, batching the member updates across teams
+    writer = AirtableWriteQueue(table)
     for team_code, team_members in teams.items():
+        if journal.state(team_code) == WRITTEN:
+            continue
         print(f"\n--- Evaluating Team {team_code} ({len(team_members)} members) ---")
         
         try:
-            # Prepare team data
-            team_data = prepare_team_data_for_ai(team_code, team_members)
-            
-            if not team_data:
-                print(f"Warning: Could not prepare data for team {team_code}")
-                continue
-            
-            # Get AI evaluation
-            ai_output = evaluate_team(team_data)
-            
-            # Parse response
-            team_score, team_feedback = parse_team_ai_response(ai_output)
-            
-            if team_score is None:
-                print(f"Warning: No team score parsed for team {team_code}")
-            
-            # Update all team members in Airtable
-            update_team_members_in_airtable(team_members, team_score, team_feedback)
-            
-            print(f"Successfully evaluated team {team_code} with score {team_score}")
+            team_score = evaluate_and_update_team(team_code, team_members, writer, journal)
+            if team_score is not None:
+                print(f"Successfully evaluated team {team_code} with score {team_score}")
             
         except Exception as e:
             print(f"Error evaluating team {team_code}: {e}")
             # Continue with next team even if this one fails
+
+    # Step 4: Write out remaining updates
+    writer.flush()
+    print_run_summary(writer, journal)
             
             
+def run_combined_evaluation_and_update(force=False, resume=False):
+    """
+    Individual and team evaluation in one pass over the table.
+
+    Individual results stay in memory on the applicant dicts, and each team
+    is scored on a separate pool (TEAM_EVAL_WORKERS) as soon as its last
+    member's individual evaluation finishes, instead of re-reading the
+    whole table after the individual pass. Members whose inputs are
+    unchanged keep the score that was fetched with them. Individual and
+    team updates share one write queue, so a member whose individual
+    update is still pending gets both written in the same request.
+    """
+    individual_journal = RunJournal("individual", resume=resume)
+    team_journal = RunJournal("team", resume=resume)
+
+    print("Fetching applicants...")
+    applicants = fetch_applicants_for_combined_evaluation()
+    teams = group_applicants_by_team(applicants)
+    print(f"Found {len(applicants)} applicants in {len(teams)} teams")
+    # Team members next to each other, so teams complete (and start) early
+    team_order = {code: n for n, code in enumerate(teams)}
+    applicants.sort(key=lambda a: team_order.get(a.get("Team Code", "").strip(), len(team_order)))
+
+    enrich_applicants([a for a in applicants if individual_journal.state(a["record_id"]) not in (EVALUATED, WRITTEN)])
+
+    budget = tokens_per_minute_bucket(settings.EVAL_TOKENS_PER_MINUTE)
+    skipped = 0
+    team_futures = {}
+    with AirtableWriteQueue(table) as writer, ThreadPoolExecutor(max_workers=settings.TEAM_EVAL_WORKERS) as team_pool:
+
+        def dispatch_team(team_code, team_members):
+            if team_journal.state(team_code) == WRITTEN:
+                return
+            team_futures[team_code] = team_pool.submit(
+                evaluate_and_update_team, team_code, team_members, writer, team_journal
+            )
+
+        dispatcher = TeamDispatcher(teams, dispatch_team)
+        results = run_bounded(
+            applicants,
+            lambda applicant: evaluate_and_update_applicant(applicant, writer, force=force, journal=individual_journal, budget=budget),
+        )
+        for applicant, score, error in results:
+            if error is not None:
+                print(f"Error evaluating applicant {applicant.get('First Name')}: {error}")
+            elif score is None:
+                skipped += 1
+            else:
+                # The team prompt reads these fields
+                applicant["Individual Score"] = score
+                applicant["Individual Feedback"] = applicant["feedback"]
+                print(f"Evaluated applicant {applicant.get('First Name')} with score {score}")
+            dispatcher.done(applicant)
+        dispatcher.dispatch_remaining()
+
+        for team_code, future in team_futures.items():
+            try:
+                team_score = future.result()
+                if team_score is not None:
+                    print(f"Evaluated team {team_code} with score {team_score}")
+            except Exception as e:
+                print(f"Error evaluating team {team_code}: {e}")
+    print(f"Skipped {skipped} unchanged or already written applicants")
+    print_run_summary(writer, individual_journal, team_journal)
+
+
+def run_batch_evaluation_and_update(force=False, formula=None, resume=False):
+    """
+    Individual evaluation through the Message Batches API: every prompt is
+    submitted at once, results are collected when the batch ends and then
+    written back in batches. Meant for overnight full-cohort scoring.
+    """
+    journal = RunJournal("individual", resume=resume)
+    print("Fetching and enriching applicants...")
+    fetched = list(iter_applicants_for_evaluation(formula))
+    enrich_applicants([a for a in fetched if journal.state(a["record_id"]) not in (EVALUATED, WRITTEN)])
+    applicants = []
+    for applicant in fetched:
+        if prepare_applicant(applicant, force=force, journal=journal) is not None:
+            applicants.append(build_applicant_prompt(applicant))
+    if not applicants:
+        print("No applicants need evaluation")
+        journal.close()
+        return
+
+    # Only applicants without a journaled output go into the batch
+    results = evaluate_batch({a["record_id"]: a["prompt"] for a in applicants if "raw_output" not in a})
+
+    with AirtableWriteQueue(table) as writer:
+        for applicant in applicants:
+            if "raw_output" not in applicant:
+                ai_output, error = results[applicant["record_id"]]
+                if error is not None:
+                    print(f"Error evaluating applicant {applicant.get('First Name')}: {error}")
+                    continue
+                applicant["raw_output"] = ai_output
+                journal.evaluated(applicant["record_id"], ai_output, fingerprint=applicant["fingerprint"])
+            score_applicant(applicant)
+            queue_applicant_update(applicant, writer, journal)
+    print_run_summary(writer, journal)
+
+
+def run_batch_team_evaluation_and_update(resume=False):
+    """
+    Team evaluation through the Message Batches API.
+    """
+    journal = RunJournal("team", resume=resume)
+    teams = group_applicants_by_team(fetch_applicants_for_team_evaluation())
+    outputs, prompts = {}, {}
+    for team_code, team_members in teams.items():
+        entry = journal.get(team_code)
+        if entry and entry["state"] == WRITTEN:
+            continue
+        if entry and entry["state"] == EVALUATED:
+            outputs[team_code] = (entry["raw_output"], None)
+            continue
+        team_data = prepare_team_data_for_ai(team_code, team_members)
+        if team_data:
+            journal.fetched(team_code)
+            prompts[team_code] = get_team_evaluation_prompt(team_data)
+    if not prompts and not outputs:
+        print("No teams to evaluate")
+        journal.close()
+        return
+
+    if prompts:
+        for team_code, (ai_output, error) in evaluate_batch(prompts, team=True).items():
+            if error is None:
+                journal.evaluated(team_code, ai_output)
+            outputs[team_code] = (ai_output, error)
+
+    writer = AirtableWriteQueue(table)
+    for team_code, (ai_output, error) in outputs.items():
+        if error is not None:
+            print(f"Error evaluating team {team_code}: {error}")
+            continue
+        team_score, team_feedback = parse_team_ai_response(ai_output)
+        update_team_members_in_airtable(
+            teams[team_code], team_score, team_feedback, writer=writer,
+            on_team_written=lambda code=team_code: journal.written(code),
+        )
+    writer.flush()
+    print_run_summary(writer, journal)
+
+
 if __name__ == "__main__":
-    #run_evaluation_and_update()
-    run_team_evaluation_and_update()
+    parser = argparse.ArgumentParser(description="Evaluate applicants and write results back to Airtable")
+    parser.add_argument("mode", nargs="?", choices=["individual", "team"], default="team")
+    parser.add_argument("--force", action="store_true", help="re-evaluate applicants even if their inputs are unchanged")
+    parser.add_argument("--unscored", action="store_true", help="only fetch applicants without an Individual Score")
+    parser.add_argument("--since", help="only fetch records modified after this ISO 8601 timestamp")
+    parser.add_argument("--streaming", action="store_true", help="run the individual pass as a staged streaming pipeline")
+    parser.add_argument("--batch", action="store_true", help="score through the Message Batches API (slower, half the cost)")
+    parser.add_argument("--combined", action="store_true", help="score individuals and teams in one pass, each team as soon as its members are done")
+    parser.add_argument("--resume", action="store_true", help="continue the previous run from its journal instead of starting over")
+    parser.add_argument("--llm-cache", choices=llm_cache.MODES, help="LLM response cache mode (default: LLM_CACHE_MODE)")
+    parser.add_argument("--output", choices=structured_eval.MODES, help="evaluation output: scraped text or a tool-use object (default: EVAL_OUTPUT_MODE)")
+    parser.add_argument("--cascade", action="store_true", help="screen with the small model and escalate only uncertain scores (default: EVAL_CASCADE)")
+    parser.add_argument("--metrics", default=settings.METRICS_REPORT_PATH, help="write a metrics report here (.prom for Prometheus text, otherwise JSON)")
+    args = parser.parse_args()
+
+    if args.llm_cache:
+        llm_cache.configure(args.llm_cache)
+    if args.output:
+        structured_eval.configure(args.output)
+    if args.cascade:
+        cascade.configure(True)
+    formula = all_of(
+        INDIVIDUAL_SCORE_BLANK if args.unscored else None,
+        modified_since(args.since) if args.since else None,
+    )
+    if args.combined:
+        if args.unscored or args.since or args.batch or args.streaming:
+            parser.error("--combined reads the whole table and can't be used with --unscored, --since, --batch or --streaming")
+        run_combined_evaluation_and_update(force=args.force, resume=args.resume)
+    elif args.mode == "individual" and args.batch:
+        run_batch_evaluation_and_update(force=args.force, formula=formula, resume=args.resume)
+    elif args.mode == "team" and args.batch:
+        run_batch_team_evaluation_and_update(resume=args.resume)
+    elif args.mode == "individual" and args.streaming:
+        run_streaming_evaluation_and_update(force=args.force, formula=formula, resume=args.resume)
+    elif args.mode == "individual":
+        run_evaluation_and_update(force=args.force, formula=formula, resume=args.resume)
+    else:
+        run_team_evaluation_and_update(resume=args.resume)
+    if args.metrics:
+        metrics.write_report(args.metrics)
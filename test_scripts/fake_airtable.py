@@ -0,0 +1,271 @@
+"""
+Local stand-in for the Airtable records API used by the pipeline: paged
+list (GET and the POST listRecords fallback) with fields[], pageSize,
+offset and filterByFormula, plus single and batch PATCH updates.
+
+filterByFormula is evaluated by a small interpreter that understands the
+formulas services.airtable builds: AND/OR/NOT, {Field} = 'text',
+{Field} = BLANK(), RECORD_ID() = 'rec...',
+IS_AFTER(LAST_MODIFIED_TIME(...), DATETIME_PARSE('...')).
+LAST_MODIFIED_TIME({Field}, ...) only looks at the listed fields, as in
+Airtable, so writes to other fields don't make a record "modified".
+
+    python -m test_scripts.fake_airtable --port 8767
+    AIRTABLE_ENDPOINT_URL=http://127.0.0.1:8767 ...
+"""
+import argparse
+import re
+import threading
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+from test_scripts.fake_server import FakeHandler, FakeServiceState, start_server
+
+PAGE_SIZE = 100
+
+_TOKEN = re.compile(r"\s*(?:(\{[^}]*\})|('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|(-?\d+(?:\.\d+)?)|([A-Z_]+)|(!=|<=|>=|[=<>(),]))")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _blank(value):
+    return value is None or value == "" or value == []
+
+
+class Formula:
+    """
+    Parse a filterByFormula string once; call matches(record) per row.
+    """
+
+    def __init__(self, text):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if not match:
+                raise ValueError(f"Cannot parse formula at {text[pos:]!r}")
+            field, string, number, name, op = match.groups()
+            if field is not None:
+                self.tokens.append(("field", field[1:-1]))
+            elif string is not None:
+                self.tokens.append(("value", re.sub(r"\\(.)", r"\1", string[1:-1])))
+            elif number is not None:
+                self.tokens.append(("value", float(number)))
+            elif name is not None:
+                self.tokens.append(("name", name))
+            else:
+                self.tokens.append(("op", op))
+            pos = match.end()
+        self.pos = 0
+        self.tree = self._comparison()
+
+    def _next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _comparison(self):
+        left = self._term()
+        kind, value = self._peek()
+        if kind == "op" and value in ("=", "!=", "<", ">", "<=", ">="):
+            self.pos += 1
+            return ("cmp", value, left, self._term())
+        return left
+
+    def _term(self):
+        kind, value = self._next()
+        if kind in ("field", "value"):
+            return (kind, value)
+        if kind == "name":
+            args = []
+            self._next()  # "("
+            if self._peek() != ("op", ")"):
+                args.append(self._comparison())
+                while self._peek() == ("op", ","):
+                    self.pos += 1
+                    args.append(self._comparison())
+            self._next()  # ")"
+            return ("call", value, args)
+        if (kind, value) == ("op", "("):
+            inner = self._comparison()
+            self._next()
+            return inner
+        raise ValueError(f"Unexpected token {value!r}")
+
+    def _eval(self, node, record):
+        kind = node[0]
+        if kind == "value":
+            return node[1]
+        if kind == "field":
+            return record["fields"].get(node[1])
+        if kind == "cmp":
+            _, op, left, right = node
+            a, b = self._eval(left, record), self._eval(right, record)
+            if op in ("=", "!="):
+                equal = (_blank(a) and _blank(b)) or (not _blank(a) and not _blank(b) and str(a) == str(b))
+                return equal if op == "=" else not equal
+            if _blank(a) or _blank(b):
+                return False
+            return {"<": a < b, ">": a > b, "<=": a <= b, ">=": a >= b}[op]
+        _, name, args = node
+        if name == "BLANK":
+            return None
+        if name == "LAST_MODIFIED_TIME":
+            if not args:
+                return record["modified"]
+            stamps = [record["field_modified"].get(arg[1]) for arg in args if arg[0] == "field"]
+            return max([stamp for stamp in stamps if stamp] or [record["createdTime"]])
+        if name == "RECORD_ID":
+            return record["id"]
+        if name == "DATETIME_PARSE":
+            return self._eval(args[0], record)
+        values = [self._eval(arg, record) for arg in args]
+        if name == "AND":
+            return all(values)
+        if name == "OR":
+            return any(values)
+        if name == "NOT":
+            return not values[0]
+        if name == "IS_AFTER":
+            return _parse_time(values[0]) > _parse_time(values[1])
+        if name == "IS_BEFORE":
+            return _parse_time(values[0]) < _parse_time(values[1])
+        raise ValueError(f"Unsupported formula function {name}")
+
+    def matches(self, record):
+        return bool(self._eval(self.tree, record))
+
+
+class FakeAirtableState(FakeServiceState):
+    def __init__(self, records=(), **kwargs):
+        super().__init__(**kwargs)
+        self.records = {}
+        for n, fields in enumerate(records):
+            self.add(f"rec{n:014d}", fields)
+
+    def add(self, record_id, fields, modified=None):
+        stamp = modified or _now()
+        self.records[record_id] = {
+            "id": record_id, "createdTime": stamp, "modified": stamp, "fields": dict(fields),
+            "field_modified": {name: stamp for name in fields},
+        }
+
+    def list(self, fields=None, formula=None, page_size=PAGE_SIZE, offset=None):
+        with self.lock:
+            records = list(self.records.values())
+        if formula:
+            parsed = Formula(formula)
+            records = [record for record in records if parsed.matches(record)]
+        start = int(offset or 0)
+        page = records[start:start + page_size]
+        result = {"records": [self._public(record, fields) for record in page]}
+        if start + page_size < len(records):
+            result["offset"] = str(start + page_size)
+        return result
+
+    def update(self, record_id, fields):
+        with self.lock:
+            record = self.records.get(record_id)
+            if record is None:
+                return None
+            stamp = _now()
+            for name, value in fields.items():
+                if record["fields"].get(name) != value:
+                    record["field_modified"][name] = stamp
+            record["fields"].update(fields)
+            record["modified"] = stamp
+            return self._public(record)
+
+    @staticmethod
+    def _public(record, fields=None):
+        values = record["fields"]
+        if fields:
+            values = {name: values[name] for name in fields if not _blank(values.get(name))}
+        else:
+            values = {name: value for name, value in values.items() if not _blank(value)}
+        return {"id": record["id"], "createdTime": record["createdTime"], "fields": values}
+
+
+def _not_found():
+    return {"error": "NOT_FOUND"}
+
+
+class FakeAirtableHandler(FakeHandler):
+    def route(self, method, path, query, body):
+        state = self.state
+        # /v0/{base}/{table}[/{record_id} | /listRecords]
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "v0":
+            return "not_found", 404, _not_found()
+        rest = parts[3:]
+
+        if method == "GET" and not rest:
+            params = parse_qs(query)
+            page = state.list(
+                fields=params.get("fields[]"),
+                formula=(params.get("filterByFormula") or [None])[0],
+                page_size=int((params.get("pageSize") or [PAGE_SIZE])[0]),
+                offset=(params.get("offset") or [None])[0],
+            )
+            return "list", 200, page
+        if method == "POST" and rest == ["listRecords"]:
+            page = state.list(
+                fields=body.get("fields"),
+                formula=body.get("filterByFormula"),
+                page_size=int(body.get("pageSize") or PAGE_SIZE),
+                offset=body.get("offset"),
+            )
+            return "list", 200, page
+        if method == "PATCH" and not rest:
+            updated = []
+            for item in body.get("records", []):
+                record = state.update(item["id"], item.get("fields", {}))
+                if record is None:
+                    return "update", 404, _not_found()
+                updated.append(record)
+            return "update", 200, {"records": updated}
+        if method == "PATCH" and len(rest) == 1:
+            record = state.update(rest[0], body.get("fields", {}))
+            if record is None:
+                return "update", 404, _not_found()
+            return "update", 200, record
+        return "not_found", 404, _not_found()
+
+
+def start_fake_airtable(records=(), port=0, latency=0.0, error_rate=0.0, rate_limit=None):
+    """
+    Serve `records` (a list of field dicts) on a background thread.
+    Returns (server, base_url); server.state.records holds the live rows.
+    """
+    state = FakeAirtableState(records, latency=latency, error_rate=error_rate, rate_limit=rate_limit)
+    return start_server(FakeAirtableHandler, state, port)
+
+
+if __name__ == "__main__":
+    from test_scripts.benchmark import generate_applicants
+
+    parser = argparse.ArgumentParser(description="Fake Airtable records server")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--applicants", type=int, default=100, help="synthetic applicants to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, default=5, help="requests per second before answering HTTP 429")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_airtable(
+        generate_applicants(args.applicants), args.port, args.latency, args.error_rate, args.rate_limit
+    )
+    print(f"Fake Airtable listening on {base_url} with {args.applicants} applicants")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,202 @@
+"""
+Local stand-in for the Anthropic Messages and Message Batches endpoints.
+
+Replies are deterministic (the score is derived from a hash of the prompt)
+so pipeline runs are repeatable. Point the pipeline at it with:
+
+    python -m test_scripts.fake_anthropic --port 8765
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python -m test_scripts.eval_pipeline individual --batch
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from test_scripts.fake_server import FakeHandler, FakeServiceState, start_server
+
+MIN_CACHEABLE_TOKENS = 1024  # Sonnet's minimum cacheable prefix
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _prompt_text(params):
+    parts = []
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get("text", "") for block in content or [])
+    return "\n".join(parts)
+
+
+def _cacheable_prefix(params):
+    system = params.get("system")
+    if not isinstance(system, list):
+        return ""
+    return "".join(block.get("text", "") for block in system if block.get("cache_control"))
+
+
+def fake_reply(params, state=None):
+    """
+    Deterministic evaluation-shaped reply for a Messages request. With a
+    server `state`, a system prefix marked cache_control is reported as a
+    cache write the first time and a cache read afterwards, once it reaches
+    the minimum cacheable length like the real API.
+    """
+    prompt = _prompt_text(params)
+    prefix = _cacheable_prefix(params)
+    cache_creation = cache_read = 0
+    if len(prefix) // 4 >= MIN_CACHEABLE_TOKENS and state is not None:
+        with state.lock:
+            seen = prefix in state.cached_prefixes
+            state.cached_prefixes.add(prefix)
+        if seen:
+            cache_read = len(prefix) // 4
+        else:
+            cache_creation = len(prefix) // 4
+    digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    score = 40 + digest % 56
+    label = "Team Score" if "TEAM:" in prompt else "Score"
+    recommendation = "Select" if score >= 70 else "Waitlist"
+    feedback = f"Hey Alan and Gretel,\nSynthetic evaluation {digest % 10000:04d} from the local fake server."
+    text = f"{label}: {score}/100\n\nFeedback: {feedback}\n\nRecommendation: {recommendation}"
+    content = [{"type": "text", "text": text}]
+    stop_reason = "end_turn"
+
+    tools = params.get("tools")
+    if tools:
+        # Answer through the (first) tool with the fields its schema asks for.
+        # One full evaluation in ten gets an invalid recommendation, to exercise repairs.
+        properties = tools[0].get("input_schema", {}).get("properties", {})
+        values = {
+            "score": score,
+            "recommendation": "Maybe" if len(properties) > 1 and digest % 10 == 0 else recommendation,
+            "feedback": feedback,
+        }
+        tool_input = {name: values[name] for name in properties if name in values}
+        content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tools[0]["name"], "input": tool_input}]
+        text = json.dumps(tool_input)
+        stop_reason = "tool_use"
+
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "fake-model"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": max(1, len(prompt) // 4),
+            "output_tokens": max(1, len(text) // 4),
+            "cache_creation_input_tokens": cache_creation,
+            "cache_read_input_tokens": cache_read,
+        },
+    }
+
+
+class FakeAnthropicState(FakeServiceState):
+    def __init__(self, latency=0.0, batch_delay=1.0, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.batch_delay = batch_delay
+        self.batches = {}
+        self.cached_prefixes = set()
+
+    def batch_object(self, batch, base_url):
+        ended = time.time() - batch["created"] >= self.batch_delay
+        total = len(batch["requests"])
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else total,
+                "succeeded": total if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": batch["created_at"],
+            "expires_at": batch["created_at"],
+            "ended_at": _now() if ended else None,
+            "cancel_initiated_at": None,
+            "archived_at": None,
+            "results_url": f"{base_url}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+
+def _not_found(what):
+    return {"type": "error", "error": {"type": "not_found_error", "message": what}}
+
+
+class FakeAnthropicHandler(FakeHandler):
+    def route(self, method, path, query, body):
+        state = self.state
+        if method == "POST" and path == "/v1/messages":
+            headers = {
+                "anthropic-ratelimit-requests-limit": "1000",
+                "anthropic-ratelimit-requests-remaining": "999",
+                "anthropic-ratelimit-requests-reset": _now(),
+            }
+            return "messages", 200, fake_reply(body, state), headers
+        if method == "POST" and path == "/v1/messages/batches":
+            batch = {
+                "id": f"msgbatch_{uuid.uuid4().hex[:24]}",
+                "created": time.time(),
+                "created_at": _now(),
+                "requests": body.get("requests", []),
+            }
+            with state.lock:
+                state.batches[batch["id"]] = batch
+            return "batches", 200, state.batch_object(batch, self.base_url())
+
+        parts = path.strip("/").split("/")
+        # v1/messages/batches/{id}[/results]
+        if method == "GET" and len(parts) >= 4 and parts[:3] == ["v1", "messages", "batches"]:
+            batch = state.batches.get(parts[3])
+            if batch is None:
+                return "batches", 404, _not_found(parts[3])
+            if len(parts) == 4:
+                return "batches", 200, state.batch_object(batch, self.base_url())
+            if parts[4] == "results":
+                lines = [
+                    json.dumps({
+                        "custom_id": request["custom_id"],
+                        "result": {"type": "succeeded", "message": fake_reply(request["params"], state)},
+                    })
+                    for request in batch["requests"]
+                ]
+                body = ("\n".join(lines) + "\n").encode("utf-8")
+                return "batch_results", 200, body, {"Content-Type": "application/binary"}
+        return "not_found", 404, _not_found(path)
+
+
+def start_fake_anthropic(port=0, latency=0.0, batch_delay=1.0, error_rate=0.0, rate_limit=None):
+    """
+    Start the fake server on a background thread. Returns (server, base_url);
+    call server.shutdown() to stop it.
+    """
+    state = FakeAnthropicState(latency=latency, batch_delay=batch_delay, error_rate=error_rate, rate_limit=rate_limit)
+    return start_server(FakeAnthropicHandler, state, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages/Batches server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each request")
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="seconds before a batch reports ended")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, help="requests per second before answering HTTP 429")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_anthropic(args.port, args.latency, args.batch_delay, args.error_rate, args.rate_limit)
+    print(f"Fake Anthropic API listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,241 @@
+"""
+Local stand-in for the parts of GitHub the enrichment step touches: profile
+pages (scraped HTML), the REST repo/commits/contributors/participation/readme
+endpoints (listings paged with Link headers) and GraphQL user/repository
+lookups. Every user and repo "exists"; their stats are
+derived from a hash of the name so runs are repeatable.
+
+    python -m test_scripts.fake_github --port 8766
+    GITHUB_WEB_URL=http://127.0.0.1:8766 GITHUB_API_URL=http://127.0.0.1:8766 ...
+"""
+import argparse
+import base64
+import hashlib
+import re
+import threading
+import time
+from urllib.parse import parse_qs
+from test_scripts.fake_server import FakeHandler, FakeServiceState, start_server
+
+_USER_ALIAS = re.compile(r'(u\d+): user\(login: "((?:[^"\\]|\\.)*)"\)')
+_REPO_ALIAS = re.compile(r'(r\d+): repository\(owner: "((?:[^"\\]|\\.)*)", name: "((?:[^"\\]|\\.)*)"\)')
+
+
+def _number(name, modulo):
+    return int(hashlib.sha256(name.encode("utf-8")).hexdigest(), 16) % modulo
+
+
+def profile(username):
+    return {
+        "login": username,
+        "name": username.replace("-", " ").title(),
+        "bio": f"Builder of things #{_number(username, 1000)}",
+        "followers": _number(username + ":followers", 500),
+        "repo_count": _number(username + ":repos", 80),
+    }
+
+
+def repo(full_name):
+    owner, name = full_name.split("/", 1)
+    commit_count = 1 + _number(full_name + ":commits", 300)
+    return {
+        "name": name,
+        "owner": owner,
+        "stars": _number(full_name + ":stars", 2000),
+        "forks": _number(full_name + ":forks", 200),
+        "watchers": _number(full_name + ":watchers", 100),
+        "language": ["Python", "TypeScript", "Go", "Rust"][_number(full_name, 4)],
+        "commit_count": commit_count,
+        "contributor_count": 1 + _number(full_name + ":contributors", 12),
+        # Commits per week for the last 52 weeks, oldest first
+        "weekly_commits": [_number(f"{full_name}:week{n}", 4) for n in range(52)],
+        "pushed_at": "2025-01-15T12:00:00Z",
+    }
+
+
+def readme_text(full_name, commit_count):
+    """
+    A short README for most repos; one in five is a bloated one (badges, HTML,
+    code blocks) of a few hundred KB, like the worst real ones.
+    """
+    owner, name = full_name.split("/", 1)
+    intro = f"# {name}\n\nA synthetic project by {owner} with {commit_count} commits.\n"
+    if _number(full_name + ":bloated", 5):
+        return intro
+    badges = "".join(
+        f"[![badge{n}](https://img.shields.io/badge/b{n}-ok-green.svg)](https://example.com/{n}) " for n in range(12)
+    )
+    # Numbered sections, so the prose survives paragraph de-duplication and the token limits bite
+    sections = "".join(
+        '<p align="center"><img src="https://example.com/logo.png" width="200"></p>\n\n'
+        f"## Step {n}\n\nRun the [command line tool](https://example.com/docs) on batch {n} of your data.\n\n"
+        "```python\n" + "print('hello world')\n" * 40 + "```\n\n"
+        "| Option | Default |\n|---|---|\n| --fast | false |\n\n"
+        for n in range(400)
+    )
+    return f"{badges}\n\n{intro}\n" + sections
+
+
+def commit_sha(full_name, n):
+    return hashlib.sha1(f"{full_name}:{n}".encode("utf-8")).hexdigest()
+
+
+def profile_html(user):
+    return (
+        "<html><body>"
+        f'<span class="p-name">{user["name"]}</span>'
+        f'<div class="p-note">{user["bio"]}</div>'
+        f'<a href="/{user["login"]}?tab=followers"><span>{user["followers"]}</span> followers</a>'
+        f'<a href="/{user["login"]}?tab=repositories"><span>{user["repo_count"]}</span> repositories</a>'
+        "</body></html>"
+    )
+
+
+def _user_node(username):
+    user = profile(username)
+    return {
+        "login": user["login"],
+        "name": user["name"],
+        "bio": user["bio"],
+        "followers": {"totalCount": user["followers"]},
+        "repositories": {"totalCount": user["repo_count"]},
+    }
+
+
+def _repo_node(full_name):
+    info = repo(full_name)
+    return {
+        "name": info["name"],
+        "stargazerCount": info["stars"],
+        "forkCount": info["forks"],
+        "watchers": {"totalCount": info["watchers"]},
+        "primaryLanguage": {"name": info["language"]},
+        "pushedAt": info["pushed_at"],
+        "defaultBranchRef": {"target": {"history": {
+            "totalCount": info["commit_count"],
+            "nodes": [{"committedDate": info["pushed_at"]}],
+        }}},
+    }
+
+
+def _activity_node(full_name):
+    weeks = repo(full_name)["weekly_commits"]
+    return {"defaultBranchRef": {"target": {
+        "recent": {"totalCount": sum(weeks[-4:])},
+        "year": {"totalCount": sum(weeks)},
+    }}}
+
+
+def _merge(node, extra):
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(node.get(key), dict):
+            _merge(node[key], value)
+        else:
+            node[key] = value
+    return node
+
+
+def _page(items, query, path, base_url):
+    """
+    Slice a listing by per_page/page and add GitHub's Link header.
+    """
+    params = parse_qs(query)
+    per_page = int((params.get("per_page") or ["30"])[0])
+    page = int((params.get("page") or ["1"])[0])
+    last = max(1, -(-len(items) // per_page))
+    headers = {}
+    if last > 1:
+        links = []
+        if page < last:
+            links.append(f'<{base_url}{path}?per_page={per_page}&page={page + 1}>; rel="next"')
+        links.append(f'<{base_url}{path}?per_page={per_page}&page={last}>; rel="last"')
+        headers["Link"] = ", ".join(links)
+    return items[(page - 1) * per_page:page * per_page], headers
+
+
+class FakeGitHubHandler(FakeHandler):
+    def rate_limit_headers(self):
+        return {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+
+    def route(self, method, path, query, body):
+        headers = self.rate_limit_headers()
+        if method == "POST" and path == "/graphql":
+            text = body.get("query", "")
+            data = {alias: _user_node(login) for alias, login in _USER_ALIAS.findall(text)}
+            activity = "recent: history(since:" in text
+            with_readme = "readme: object(" in text
+            for alias, owner, name in _REPO_ALIAS.findall(text):
+                full_name = f"{owner}/{name}"
+                node = _repo_node(full_name)
+                if with_readme:
+                    node["readme"] = {"text": readme_text(full_name, repo(full_name)["commit_count"])}
+                data[alias] = _merge(node, _activity_node(full_name)) if activity else node
+            return "graphql", 200, {"data": data}, headers
+
+        parts = path.strip("/").split("/")
+        if method != "GET":
+            return "not_found", 404, {"message": "Not Found"}, headers
+        if len(parts) >= 3 and parts[0] == "repos":
+            full_name = f"{parts[1]}/{parts[2]}"
+            info = repo(full_name)
+            if len(parts) == 3:
+                return "repos", 200, {
+                    "name": info["name"],
+                    "full_name": f"{info['owner']}/{info['name']}",
+                    "stargazers_count": info["stars"],
+                    "forks_count": info["forks"],
+                    "watchers_count": info["watchers"],
+                    "language": info["language"],
+                    "pushed_at": info["pushed_at"],
+                }, headers
+            if parts[3] == "commits":
+                commits = [
+                    {"sha": commit_sha(full_name, n), "commit": {"committer": {"date": info["pushed_at"]}}}
+                    for n in range(info["commit_count"])
+                ]
+                commits, link = _page(commits, query, path, self.base_url())
+                return "commits", 200, commits, dict(headers, **link)
+            if parts[3] == "contributors":
+                contributors = [{"login": f"contributor{n}", "contributions": 1} for n in range(info["contributor_count"])]
+                contributors, link = _page(contributors, query, path, self.base_url())
+                return "contributors", 200, contributors, dict(headers, **link)
+            if parts[3:] == ["stats", "participation"]:
+                return "participation", 200, {"all": info["weekly_commits"], "owner": [0] * 52}, headers
+            if parts[3] == "readme":
+                readme = readme_text(full_name, info["commit_count"])
+                if "raw" in (self.headers.get("Accept") or ""):
+                    return "readme", 200, readme.encode("utf-8"), dict(headers, **{"Content-Type": "text/plain"})
+                content = base64.b64encode(readme.encode("utf-8")).decode("ascii")
+                return "readme", 200, {"name": "README.md", "encoding": "base64", "content": content}, headers
+        if len(parts) == 1 and parts[0]:
+            return "profile", 200, profile_html(profile(parts[0])), headers
+        return "not_found", 404, {"message": "Not Found"}, headers
+
+
+def start_fake_github(port=0, latency=0.0, error_rate=0.0, rate_limit=None):
+    """
+    Start the fake server on a background thread. Returns (server, base_url);
+    the same base URL serves the web, REST and GraphQL (/graphql) routes.
+    """
+    state = FakeServiceState(latency=latency, error_rate=error_rate, rate_limit=rate_limit)
+    return start_server(FakeGitHubHandler, state, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake GitHub web/REST/GraphQL server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, help="requests per second before answering HTTP 429")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_github(args.port, args.latency, args.error_rate, args.rate_limit)
+    print(f"Fake GitHub listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
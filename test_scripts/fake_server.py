@@ -0,0 +1,140 @@
+"""
+Shared plumbing for the local fake Airtable, GitHub and Anthropic servers.
+
+Each fake gets configurable latency, a random error rate (HTTP 500) and a
+requests-per-second limit (HTTP 429 with Retry-After once exceeded), and
+records the server-side latency of every request by route so the
+benchmark can report per-stage percentiles.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeServiceState:
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit=None, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # requests per second; None for unlimited
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.status_counts = {}
+        self.timings = {}  # route -> [seconds]
+        self.window_start = time.time()
+        self.window_count = 0
+
+    def admit(self):
+        """
+        Decide whether to throttle (429) or fail (500) a request. Returns the status to send, or None.
+        """
+        with self.lock:
+            self.request_count += 1
+            if self.rate_limit:
+                now = time.time()
+                if now - self.window_start >= 1.0:
+                    self.window_start, self.window_count = now, 0
+                self.window_count += 1
+                if self.window_count > self.rate_limit:
+                    return 429
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 500
+        return None
+
+    def record(self, route, status, seconds):
+        with self.lock:
+            self.timings.setdefault(route, []).append(seconds)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """
+    Base handler. Subclasses implement route(method, path, query, body) and
+    return (route name, status, payload[, headers]); payload may be a dict
+    (sent as JSON), str or bytes.
+    """
+
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, method):
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        status = self.state.admit()
+        if status == 429:
+            route, payload, headers = "throttled", {"error": {"type": "rate_limit_error"}}, {"Retry-After": "1"}
+        elif status == 500:
+            route, payload, headers = "error", {"error": {"type": "api_error"}}, {}
+        else:
+            if self.state.latency:
+                time.sleep(self.state.latency)
+            path, _, query = self.path.partition("?")
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+            except json.JSONDecodeError:
+                body = {}
+            result = self.route(method, path, query, body)
+            route, status, payload = result[:3]
+            headers = result[3] if len(result) > 3 else {}
+
+        if isinstance(payload, (dict, list)):
+            data = json.dumps(payload).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        elif isinstance(payload, str):
+            data = payload.encode("utf-8")
+            headers.setdefault("Content-Type", "text/html; charset=utf-8")
+        else:
+            data = payload or b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading early, e.g. a streamed download cut at a byte limit
+            self.close_connection = True
+        self.state.record(route, status, time.perf_counter() - started)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def route(self, method, path, query, body):
+        return "not_found", 404, {"error": "NOT_FOUND"}
+
+
+def start_server(handler_class, state, port=0):
+    """
+    Serve `handler_class` with `state` on a background thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    handler = type(handler_class.__name__, (handler_class,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
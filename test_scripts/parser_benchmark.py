@@ -0,0 +1,243 @@
+"""
+Benchmark of services.response_parser against the previous cascaded-regex
+parser, over a corpus of recorded replies.
+
+The corpus is every raw output in the run journals (RUN_JOURNAL_DIR) and
+every reply in the LLM response cache (LLM_CACHE_PATH), topped up with
+seeded synthetic replies in the formats the model actually produces
+(markdown labels, "out of 100", missing feedback label, team replies,
+JSON). Reports microseconds per reply for both parsers and where their
+scores disagree.
+
+    python -m test_scripts.parser_benchmark --synthetic 5000
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sqlite3
+import time
+from config import settings
+from services import response_parser
+
+
+# Previous implementation from services/ai_eval.py, kept here as the baseline
+def legacy_parse_ai_response(response_text):
+    """
+    Simple parser for AI evaluation responses.
+    Extracts score and feedback without making assumptions about quality.
+    """
+    score = None
+    
+    # Look for score patterns in order of preference
+    score_patterns = [
+        r'Score:\s*(\d+)/100',           # "Score: 85/100"
+        r'Score:\s*(\d+)',               # "Score: 85"
+        r'(\d+)/100',                    # "85/100"
+        r'(\d+)\s*out of 100',           # "85 out of 100"
+        r'(\d+)\s*points',               # "85 points"
+        r'(\d+)\s*%',                    # "85%"
+    ]
+    
+    for pattern in score_patterns:
+        match = re.search(pattern, response_text, re.IGNORECASE)
+        if match:
+            try:
+                extracted_score = int(match.group(1))
+                # Only validate it's a reasonable number (0-100)
+                if 0 <= extracted_score <= 100:
+                    score = extracted_score
+                    break
+            except (ValueError, IndexError):
+                continue
+    
+    # Extract feedback
+    feedback_match = re.search(r'Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
+    if feedback_match:
+        feedback = feedback_match.group(1).strip()
+    else:
+        # If no "Feedback:" found, use the entire response minus the score line
+        feedback_lines = []
+        for line in response_text.split('\n'):
+            if not re.match(r'Score:\s*\d+', line, re.IGNORECASE):
+                feedback_lines.append(line)
+        feedback = '\n'.join(feedback_lines).strip()
+    
+    # If no score found, return None and let the caller decide what to do
+    if score is None:
+        score=10
+        feedback = response_text.strip()
+    
+    return score, feedback
+
+
+def legacy_parse_team_ai_response(response_text):
+    """
+    Parse AI response to extract team score and team feedback.
+    Similar to parse_ai_response but for team evaluation.
+    """
+    import re
+    
+    score = None
+    
+    # Look for team score patterns in order of preference
+    score_patterns = [
+        r'Team Score:\s*(\d+)/100',      # "Team Score: 85/100"
+        r'Team Score:\s*(\d+)',          # "Team Score: 85"
+        r'Score:\s*(\d+)/100',           # "Score: 85/100" (fallback)
+        r'Score:\s*(\d+)',               # "Score: 85" (fallback)
+        r'(\d+)/100',                    # "85/100"
+        r'(\d+)\s*out of 100',           # "85 out of 100"
+        r'(\d+)\s*points',               # "85 points"
+        r'(\d+)\s*%',                    # "85%"
+    ]
+    
+    for pattern in score_patterns:
+        match = re.search(pattern, response_text, re.IGNORECASE)
+        if match:
+            try:
+                extracted_score = int(match.group(1))
+                # Only validate it's a reasonable number (0-100)
+                if 0 <= extracted_score <= 100:
+                    score = extracted_score
+                    break
+            except (ValueError, IndexError):
+                continue
+    
+    # Extract team feedback
+    feedback_match = re.search(r'Team Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
+    if feedback_match:
+        feedback = feedback_match.group(1).strip()
+    else:
+        # Fallback to regular "Feedback:" pattern
+        feedback_match = re.search(r'Feedback:\s*(.*)', response_text, re.DOTALL | re.IGNORECASE)
+        if feedback_match:
+            feedback = feedback_match.group(1).strip()
+        else:
+            # If no "Feedback:" found, use the entire response minus the score line
+            feedback_lines = []
+            for line in response_text.split('\n'):
+                if not re.match(r'(Team\s+)?Score:\s*\d+', line, re.IGNORECASE):
+                    feedback_lines.append(line)
+            feedback = '\n'.join(feedback_lines).strip()
+    
+    # If no score found, return default score and let caller decide what to do
+    if score is None:
+        score = 10
+        feedback = response_text.strip()
+    
+    return score, feedback
+
+
+def recorded_replies():
+    """
+    (reply, is_team) pairs from the run journals and the LLM response cache.
+    """
+    replies = []
+    for path in glob.glob(os.path.join(settings.RUN_JOURNAL_DIR, "*.jsonl*")):
+        is_team = os.path.basename(path).startswith("team")
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("raw_output"):
+                    replies.append((entry["raw_output"], is_team))
+    if os.path.exists(settings.LLM_CACHE_PATH):
+        conn = sqlite3.connect(settings.LLM_CACHE_PATH)
+        for (response,) in conn.execute("SELECT response FROM responses"):
+            replies.append((response, "TEAM SCORE" in response.upper()))
+        conn.close()
+    return replies
+
+
+def synthetic_replies(count, seed=0):
+    """
+    Replies in the shapes seen in practice, with feedback of realistic length.
+    """
+    rng = random.Random(seed)
+    words = "strong solid experience motivation project team shipped prototype github repo skills clear".split()
+    replies = []
+    for _ in range(count):
+        score = rng.randint(10, 98)
+        recommendation = "Select" if score >= 70 else "Waitlist"
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(80, 250)))
+        team = rng.random() < 0.3
+        label = "Team Score" if team else "Score"
+        feedback_label = "Team Feedback" if team else "Feedback"
+        shape = rng.randrange(8)
+        if shape == 0:
+            text = f"{label}: {score}/100\n\n{feedback_label}: Hey Alan and Gretel,\n{body}\n\nRecommendation: {recommendation}"
+        elif shape == 1:
+            text = f"**{label}:** {score}/100\n\n**{feedback_label}:** {body}\n\n**Recommendation:** {recommendation}"
+        elif shape == 2:
+            text = f"{label}: {score}\n{body}\nRecommendation: {recommendation}"
+        elif shape == 3:
+            text = f"Overall I would rate this {score} out of 100.\n\n{feedback_label}: {body}"
+        elif shape == 5:
+            prefix = rng.choice(["Overall ", "Final ", "- ", "1. "])
+            text = f"{prefix}{label}: {score}\n\n{feedback_label}: {body}\n\nRecommendation: {recommendation}"
+        elif shape == 6:
+            text = f"{body}\nThe applicant gets {label}: {score} overall."
+        elif shape == 4:
+            text = json.dumps({"score": score, "recommendation": recommendation, "feedback": body})
+        else:
+            text = f"{body}\nNo numeric score given."
+        replies.append((text, team))
+    return replies
+
+
+def _time(parse, corpus, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [parse(text, team) for text, team in corpus]
+    elapsed = time.perf_counter() - started
+    return results, elapsed / (repeat * len(corpus)) * 1e6
+
+
+def legacy(text, team):
+    return (legacy_parse_team_ai_response if team else legacy_parse_ai_response)(text)
+
+
+def current(text, team):
+    parsed = response_parser.parse(text, team=team)
+    return parsed.score, parsed.feedback, parsed.recommendation
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation reply parser")
+    parser.add_argument("--synthetic", type=int, default=2000, help="synthetic replies added to the recorded ones")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus per parser")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", type=int, default=5, help="disagreements to print")
+    args = parser.parse_args()
+
+    recorded = recorded_replies()
+    corpus = recorded + synthetic_replies(args.synthetic, args.seed)
+    if not corpus:
+        parser.error("empty corpus: no recorded replies and --synthetic 0")
+    print(f"Corpus: {len(recorded)} recorded + {len(corpus) - len(recorded)} synthetic replies")
+
+    legacy_results, legacy_us = _time(legacy, corpus, args.repeat)
+    current_results, current_us = _time(current, corpus, args.repeat)
+    print(f"  legacy cascade: {legacy_us:8.1f} us/reply")
+    print(f"  single pass:    {current_us:8.1f} us/reply  ({legacy_us / current_us:.1f}x)")
+
+    unparsed = sum(1 for score, _, _ in current_results if score is None)
+    with_recommendation = sum(1 for _, _, recommendation in current_results if recommendation)
+    print(f"  no score found: {unparsed} (the legacy parser silently scored these 10)")
+    print(f"  recommendation extracted: {with_recommendation}")
+
+    # An unparsed reply is stored with the fallback score, as the legacy parser did.
+    # JSON replies are left out: the legacy parser could only score them 10.
+    disagreements = [
+        (text, old[0], new[0])
+        for (text, _), old, new in zip(corpus, legacy_results, current_results)
+        if old[0] != (new[0] if new[0] is not None else 10) and not response_parser.is_structured(text)
+    ]
+    print(f"  score disagreements on free text: {len(disagreements)}")
+    for text, old, new in disagreements[:args.show]:
+        print(f"    legacy={old} new={new}: {text[:80]!r}")
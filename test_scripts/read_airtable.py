@@ -1,16 +1,10 @@
 
-from pyairtable import Api
-from config import settings
-
-API_KEY = settings.AIRTABLE_API_KEY
-BASE_ID = settings.AIRTABLE_BASE_ID
-TABLE_NAME = settings.AIRTABLE_TABLE_NAME
+from services.airtable import iter_record_pages
 
 def test_read_airtable():
     try:
-        api = Api(API_KEY)
-        table = api.table(BASE_ID, TABLE_NAME)
-        records = table.all()
+        # From the local mirror when AIRTABLE_READ_SOURCE is mirror/offline
+        records = [record for page in iter_record_pages() for record in page]
         print(f"Fetched {len(records)} records from Airtable:")
         for rec in records:
             print(rec['fields'])
@@ -0,0 +1,177 @@
+"""
+Long-running incremental sync: polls Airtable on an APScheduler interval
+and scores new or edited applications within a poll of their submission.
+
+Each poll asks Airtable only for records whose input fields
+(SYNC_WATCHED_FIELDS) changed since the previous poll, using a
+LAST_MODIFIED_TIME() filter, plus anything that failed last time. Our own
+score write-backs don't touch those fields, so they never come back as
+deltas. The deltas are evaluated like a normal individual run (unchanged
+fingerprints are skipped). Then every team that gained or lost a member,
+or had a member re-scored, is re-read and re-scored.
+
+    python -m test_scripts.sync_daemon                 # poll every SYNC_POLL_INTERVAL seconds
+    python -m test_scripts.sync_daemon --once          # a single poll, e.g. from cron
+
+The first poll has no cursor and reads the whole table once.
+"""
+import argparse
+from datetime import timedelta
+from apscheduler.schedulers.blocking import BlockingScheduler
+from config import settings
+from services.airtable import (
+    SYNC_WATCHED_FIELDS, any_of, fetch_applicants_for_combined_evaluation, fetch_applicants_for_team_evaluation,
+    group_applicants_by_team, modified_since, record_id_in, team_code_in,
+)
+from services.airtable_writer import AirtableWriteQueue
+from services.enrichment import enrich_applicants
+from services.evaluation_engine import run_bounded
+from services.rate_limit import tokens_per_minute_bucket
+from services.run_journal import RunJournal, FETCHED, EVALUATED
+from services.sync_state import SyncState, to_iso, utc_now
+from services import cascade, llm_cache, metrics, structured_eval
+from test_scripts.eval_pipeline import table, evaluate_and_update_applicant, evaluate_and_update_team, print_run_summary
+
+
+def fetch_deltas(state):
+    """
+    Applicants edited since the last poll, plus the ones that failed in it.
+    """
+    since = state.since()
+    if since is None:
+        print("First poll: reading the whole table")
+        return fetch_applicants_for_combined_evaluation()
+    formula = any_of(modified_since(since, SYNC_WATCHED_FIELDS), record_id_in(state.retry))
+    return fetch_applicants_for_combined_evaluation(formula)
+
+
+def evaluate_deltas(applicants, writer, force=False):
+    """
+    Score the delta applicants. Returns (teams to re-score, record_ids that failed).
+    """
+    enrich_applicants(applicants)
+    teams, failed = set(), set()
+    budget = tokens_per_minute_bucket(settings.EVAL_TOKENS_PER_MINUTE)
+    results = run_bounded(
+        applicants,
+        lambda applicant: evaluate_and_update_applicant(applicant, writer, force=force, budget=budget),
+    )
+    for applicant, score, error in results:
+        if error is not None:
+            print(f"Error evaluating applicant {applicant.get('First Name')}: {error}")
+            failed.add(applicant["record_id"])
+        elif score is not None:
+            print(f"Evaluated applicant {applicant.get('First Name')} with score {score}")
+            team_code = applicant.get("Team Code", "").strip()
+            if team_code:
+                teams.add(team_code)
+    return teams, failed
+
+
+def rescore_teams(team_codes, writer, journal):
+    """
+    Re-read the members of `team_codes` (with their fresh individual scores)
+    and score each team again. Returns the team codes that failed.
+    """
+    codes = sorted(team_codes)
+    members = []
+    for start in range(0, len(codes), settings.SYNC_TEAM_BATCH_SIZE):
+        members.extend(fetch_applicants_for_team_evaluation(team_code_in(codes[start:start + settings.SYNC_TEAM_BATCH_SIZE])))
+    teams = group_applicants_by_team(members)
+    for team_code in set(codes) - set(teams):
+        # Fewer than two members left; the remaining member keeps the last team score
+        print(f"Team {team_code} has fewer than two members; not re-scored")
+
+    failed = set()
+    results = run_bounded(
+        teams.items(),
+        lambda team: evaluate_and_update_team(team[0], team[1], writer, journal),
+        max_concurrency=settings.TEAM_EVAL_WORKERS,
+    )
+    for (team_code, _), team_score, error in results:
+        if error is not None:
+            print(f"Error evaluating team {team_code}: {error}")
+            failed.add(team_code)
+        elif team_score is not None:
+            print(f"Evaluated team {team_code} with score {team_score}")
+    return failed
+
+
+def sync_once(state, force=False):
+    """
+    One poll: fetch deltas, score them, re-score affected teams, then move
+    the cursor to the poll's start. Anything that failed is retried next poll.
+    """
+    started = to_iso(utc_now())
+    applicants = fetch_deltas(state)
+    print(f"Poll at {started}: {len(applicants)} new or edited applicants")
+
+    teams = set(state.retry_teams)
+    for applicant in applicants:
+        team_code = applicant.get("Team Code", "").strip()
+        previous = state.move_team(applicant["record_id"], team_code)
+        if previous is not None:
+            print(f"Applicant {applicant.get('First Name')} moved from team {previous or '-'} to {team_code or '-'}")
+            teams.update(code for code in (previous, team_code) if code)
+
+    journal = RunJournal("sync_team")
+    with AirtableWriteQueue(table) as writer:
+        scored_teams, failed = evaluate_deltas(applicants, writer, force=force) if applicants else (set(), set())
+        teams |= scored_teams
+        # Team prompts read the members' individual scores back from Airtable
+        writer.flush()
+        failed_teams = rescore_teams(teams, writer, journal) if teams else set()
+    failed |= {failure["record_id"] for failure in writer.failures if "Individual Score" in failure["fields"]}
+    failed_teams |= {code for code in teams if journal.state(code) in (FETCHED, EVALUATED)}
+    print(f"Re-scored {len(teams) - len(failed_teams)} teams; retrying {len(failed)} applicants and {len(failed_teams)} teams next poll")
+    print_run_summary(writer, journal)
+    state.save(started, retry=failed, retry_teams=failed_teams)
+
+
+def run_poll(state, force=False, metrics_path=None):
+    # Scheduler jobs must not raise; a failed poll leaves the cursor where it was
+    metrics.reset()
+    cascade.reset()
+    try:
+        sync_once(state, force=force)
+    except Exception as e:
+        state.load()
+        print(f"Poll failed, will retry from {state.cursor or 'the beginning'}: {e}")
+    if metrics_path:
+        metrics.write_report(metrics_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll Airtable and score new or edited applications as they arrive")
+    parser.add_argument("--interval", type=float, default=settings.SYNC_POLL_INTERVAL, help="seconds between polls")
+    parser.add_argument("--once", action="store_true", help="run a single poll and exit")
+    parser.add_argument("--state", default=settings.SYNC_STATE_PATH, help="where the cursor and team map are kept")
+    parser.add_argument("--force", action="store_true", help="re-evaluate delta applicants even if their inputs are unchanged")
+    parser.add_argument("--llm-cache", choices=llm_cache.MODES, help="LLM response cache mode (default: LLM_CACHE_MODE)")
+    parser.add_argument("--output", choices=structured_eval.MODES, help="evaluation output: scraped text or a tool-use object (default: EVAL_OUTPUT_MODE)")
+    parser.add_argument("--cascade", action="store_true", help="screen with the small model and escalate only uncertain scores (default: EVAL_CASCADE)")
+    parser.add_argument("--metrics", default=settings.METRICS_REPORT_PATH, help="write a metrics report here after each poll")
+    args = parser.parse_args()
+
+    if args.llm_cache:
+        llm_cache.configure(args.llm_cache)
+    if args.output:
+        structured_eval.configure(args.output)
+    if args.cascade:
+        cascade.configure(True)
+    state = SyncState(args.state)
+    if args.once:
+        run_poll(state, force=args.force, metrics_path=args.metrics)
+    else:
+        scheduler = BlockingScheduler(timezone="UTC")
+        # One poll at a time; polls missed while a long one runs collapse into one,
+        # and the cursor makes that poll cover the whole gap
+        scheduler.add_job(
+            run_poll, "interval", seconds=args.interval, args=[state, args.force, args.metrics],
+            id="airtable_sync", max_instances=1, coalesce=True, next_run_time=utc_now() + timedelta(seconds=1),
+        )
+        print(f"Polling Airtable every {args.interval:g}s (Ctrl+C to stop)")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            pass
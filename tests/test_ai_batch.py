@@ -0,0 +1,24 @@
+import unittest
+
+from services.ai_batch import _CUSTOM_ID_PATTERN, _custom_ids
+
+
+class CustomIdTest(unittest.TestCase):
+    def test_valid_keys_are_kept(self):
+        self.assertEqual(_custom_ids(["rec123", "TEAM_1"]), {"rec123": "rec123", "TEAM_1": "TEAM_1"})
+
+    def test_ids_are_unique_and_valid(self):
+        keys = ["item-0", "item-1", "Team #1", "Team #2", 1, "1", "x" * 80]
+        ids = _custom_ids(keys)
+        self.assertEqual(len(set(ids.values())), len(keys))
+        for custom_id in ids.values():
+            self.assertRegex(custom_id, _CUSTOM_ID_PATTERN)
+        self.assertEqual(ids["item-0"], "item-0")
+
+    def test_fallback_ids_are_stable(self):
+        # Same id whatever the key's position, unlike a counter
+        self.assertEqual(_custom_ids(["Team #1"])["Team #1"], _custom_ids(["Other", "Team #1"])["Team #1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config import settings
+from services import airtable_writer
+from services.airtable_mirror import AirtableMirror, _row
+from services.airtable_writer import AirtableWriteQueue
+
+MODIFIED = "2025-01-01T00:00:00.000Z"
+
+
+class RecordingTable:
+    def __init__(self):
+        self.updates = []
+
+    def batch_update(self, records):
+        self.updates.extend(records)
+
+
+class MirrorWriteBackTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.mirror = AirtableMirror(os.path.join(self.workdir.name, "mirror.sqlite3"))
+        conn = self.mirror._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO records (record_id, team_code, chosen_track, modified, fields) VALUES (?, ?, ?, ?, ?)",
+                _row({"id": "rec1", "fields": {"First Name": "Ada", "Team Code": "T1", "Individual Score": 40}}, MODIFIED),
+            )
+
+    def tearDown(self):
+        self.mirror._connection().close()
+        self.workdir.cleanup()
+
+    def fields(self, record_id):
+        return {record["id"]: record["fields"] for page in self.mirror.iter_pages() for record in page}.get(record_id)
+
+    def test_apply_updates_merges_fields(self):
+        self.mirror.apply_updates([{"id": "rec1", "fields": {"Individual Score": 85}}, {"id": "rec2", "fields": {"Individual Score": 10}}])
+        self.assertEqual(self.fields("rec1"), {"First Name": "Ada", "Team Code": "T1", "Individual Score": 85})
+        self.assertIsNone(self.fields("rec2"))
+        self.assertEqual(self.mirror.count(), 1)
+
+    def test_writer_applies_saved_updates_when_reading_the_mirror(self):
+        with mock.patch.object(settings, "AIRTABLE_READ_SOURCE", "mirror"), \
+                mock.patch.object(airtable_writer, "get_mirror", return_value=self.mirror):
+            with AirtableWriteQueue(RecordingTable()) as writer:
+                writer.add("rec1", {"Individual Score": 72, "Individual Feedback": "Good"})
+        self.assertEqual(self.fields("rec1")["Individual Score"], 72)
+        self.assertEqual(self.fields("rec1")["Individual Feedback"], "Good")
+
+    def test_writer_leaves_the_mirror_alone_when_reading_the_api(self):
+        with mock.patch.object(settings, "AIRTABLE_READ_SOURCE", "api"), \
+                mock.patch.object(airtable_writer, "get_mirror", return_value=self.mirror):
+            with AirtableWriteQueue(RecordingTable()) as writer:
+                writer.add("rec1", {"Individual Score": 72})
+        self.assertEqual(self.fields("rec1")["Individual Score"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
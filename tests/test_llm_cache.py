@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config import settings
+from services import llm_cache
+from services.llm_cache import LLMCache
+
+
+class LLMCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self.workdir.name, "llm_cache.sqlite3"), max_bytes=100)
+
+    def tearDown(self):
+        self.cache._connection().close()
+        self.workdir.cleanup()
+
+    def stored_sum(self):
+        return self.cache._connection().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def test_running_total_follows_puts_and_replacements(self):
+        self.cache.put("a", "x" * 10)
+        self.cache.put("b", "y" * 20)
+        self.cache.put("a", "z" * 5)
+        self.assertEqual(self.cache.total_bytes(), 25)
+        self.assertEqual(self.cache.total_bytes(), self.stored_sum())
+
+    def test_evicts_least_recently_used_below_the_bound(self):
+        for key in "abc":
+            self.cache.put(key, key * 30)
+        # "a" is read again, so "b" is now the oldest
+        self.cache.get("a")
+        self.cache.put("d", "d" * 30)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), "c" * 30)
+        self.assertEqual(self.cache.get("a"), "a" * 30)
+        self.assertLessEqual(self.cache.total_bytes(), 90)
+        self.assertEqual(self.cache.total_bytes(), self.stored_sum())
+
+    def test_reopening_keeps_the_total(self):
+        self.cache.put("a", "x" * 40)
+        reopened = LLMCache(self.cache.path, max_bytes=100)
+        self.assertEqual(reopened.total_bytes(), 40)
+        reopened._connection().close()
+
+
+class LLMCacheModeTest(unittest.TestCase):
+    def tearDown(self):
+        llm_cache._mode = None
+
+    def test_configure_rejects_unknown_modes(self):
+        with self.assertRaises(ValueError):
+            llm_cache.configure("readthrough")
+
+    def test_unknown_setting_is_rejected(self):
+        with mock.patch.object(settings, "LLM_CACHE_MODE", "replay-only"):
+            with self.assertRaises(ValueError):
+                llm_cache.get_mode()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from config import settings
+from services import rate_limit
+from services.http_retry import _default_limits
+from services.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def max_in_window(times, window=1.0):
+    return max(sum(1 for t in times if start <= t < start + window) for start in times)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limit, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def acquire_times(self, bucket, count):
+        times = []
+        for _ in range(count):
+            bucket.acquire()
+            times.append(self.clock.now)
+        return times
+
+    def test_airtable_limiter_stays_under_the_limit_in_any_second(self):
+        rate, burst, _ = _default_limits("airtable")
+        times = self.acquire_times(TokenBucket(rate, burst), 50)
+        self.assertLessEqual(max_in_window(times), settings.AIRTABLE_REQUESTS_PER_SECOND)
+
+    def test_burst_equal_to_rate_allows_more_than_the_rate(self):
+        times = self.acquire_times(TokenBucket(5, 5), 20)
+        self.assertGreater(max_in_window(times), 5)
+
+    def test_slow_down_ends_at_the_reset(self):
+        bucket = TokenBucket(5, 1)
+        bucket.slow_down(0.01, 2)
+        self.assertEqual(bucket.rate, 0.01)
+        self.clock.sleep(2)
+        bucket.acquire()
+        self.assertEqual(bucket.rate, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
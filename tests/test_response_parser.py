@@ -0,0 +1,81 @@
+import json
+import unittest
+
+from services import response_parser
+from test_scripts.parser_benchmark import legacy_parse_ai_response, legacy_parse_team_ai_response
+
+# Reply shapes the legacy unanchored "Score:\s*(\d+)" search handled
+PREFIXED_REPLIES = [
+    ("Overall Score: 85\n\nFeedback: Solid work.", 85),
+    ("Final Score: 72\nFeedback: Good.", 72),
+    ("- Score: 85\n- Feedback: Good.", 85),
+    ("1. Score: 85\n2. Feedback: Good.", 85),
+    ("After review, the applicant gets Score: 66 overall.", 66),
+    ("**Final Score:** 90/100\n\n**Feedback:** Great.", 90),
+]
+
+
+class LegacyAgreementTest(unittest.TestCase):
+    def test_prefixed_score_labels_match_legacy(self):
+        for text, expected in PREFIXED_REPLIES:
+            with self.subTest(text=text):
+                self.assertEqual(legacy_parse_ai_response(text)[0], expected)
+                self.assertEqual(response_parser.parse(text).score, expected)
+
+    def test_prefixed_team_score_labels_match_legacy(self):
+        for text in ("Overall Team Score: 81\nTeam Feedback: ok", "- Team Score: 81", "The team earns Team Score: 81."):
+            with self.subTest(text=text):
+                self.assertEqual(legacy_parse_team_ai_response(text)[0], 81)
+                self.assertEqual(response_parser.parse(text, team=True).score, 81)
+
+    def test_common_shapes_match_legacy(self):
+        replies = [
+            "Score: 85/100\n\nFeedback: Hey Alan and Gretel,\nNice.\n\nRecommendation: Select",
+            "**Score:** 64/100\n\n**Feedback:** Fine.\n\n**Recommendation:** Waitlist",
+            "Score: 70\nNo feedback label here.",
+            "I would rate this 77 out of 100.\n\nFeedback: Good.",
+            "Worth 55 points.",
+        ]
+        for text in replies:
+            with self.subTest(text=text):
+                legacy_score, legacy_feedback = legacy_parse_ai_response(text)
+                parsed = response_parser.parse(text)
+                self.assertEqual(parsed.score, legacy_score)
+                if "**" not in text:
+                    # The legacy parser left the closing "**" of a bold label in the feedback
+                    self.assertEqual(parsed.feedback, legacy_feedback)
+
+
+class ParseTest(unittest.TestCase):
+    def test_labelled_score_beats_bare_forms(self):
+        parsed = response_parser.parse("Rated 40/100 last year.\nScore: 80\nFeedback: Better now.")
+        self.assertEqual(parsed.score, 80)
+
+    def test_out_of_range_score_is_ignored(self):
+        self.assertIsNone(response_parser.parse("Score: 150\nFeedback: ?").score)
+
+    def test_team_label_preferred_for_teams(self):
+        text = "Score: 60\nTeam Score: 75\nTeam Feedback: Strong team."
+        self.assertEqual(response_parser.parse(text, team=True).score, 75)
+        self.assertEqual(response_parser.parse(text, team=True).feedback, "Strong team.")
+        self.assertEqual(response_parser.parse(text).score, 60)
+
+    def test_recommendation(self):
+        parsed = response_parser.parse("Score: 80\nFeedback: Good.\n\n**Recommendation:** Select.")
+        self.assertEqual(parsed.recommendation, "Select")
+
+    def test_no_score(self):
+        parsed = response_parser.parse("Nothing numeric here.")
+        self.assertIsNone(parsed.score)
+
+    def test_json_reply(self):
+        text = json.dumps({"score": 61, "feedback": "Fine.", "recommendation": "Waitlist"})
+        self.assertEqual(response_parser.parse(text), response_parser.ParsedResponse(61, "Fine.", "Waitlist"))
+
+    def test_fenced_json_reply(self):
+        text = '```json\n{"team_score": 70, "team_feedback": "Ok."}\n```'
+        self.assertEqual(response_parser.parse(text, team=True).score, 70)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from services import structured_eval
+
+PARAMS = {
+    "model": "claude-3-5-sonnet-20241022",
+    "max_tokens": 2000,
+    "temperature": 0.3,
+    "system": [{"type": "text", "text": "RUBRIC", "cache_control": {"type": "ephemeral"}}],
+    "messages": [{"role": "user", "content": "APPLICANT: Ada"}],
+    **structured_eval.tool_params(),
+}
+
+
+class ValidateTest(unittest.TestCase):
+    def test_valid(self):
+        data = {"score": 80, "recommendation": "Select", "feedback": "Hey Alan and Gretel, " + "solid work " * 5}
+        self.assertEqual(structured_eval.validate(data), {})
+
+    def test_problems(self):
+        errors = structured_eval.validate({"score": 150, "recommendation": "Maybe"})
+        self.assertEqual(set(errors), {"score", "recommendation", "feedback"})
+        self.assertEqual(errors["feedback"], "missing")
+
+
+class RepairParamsTest(unittest.TestCase):
+    def test_repair_continues_the_original_conversation(self):
+        data = {"score": 80, "recommendation": "Maybe", "feedback": "Hey Alan and Gretel, ..."}
+        repair = structured_eval.repair_params(PARAMS, data, {"recommendation": "got 'Maybe'"})
+
+        self.assertEqual(repair["system"], PARAMS["system"])
+        self.assertEqual(repair["messages"][0], PARAMS["messages"][0])
+        tool_use = repair["messages"][1]["content"][0]
+        tool_result = repair["messages"][2]["content"][0]
+        self.assertEqual((tool_use["type"], tool_use["input"]), ("tool_use", data))
+        self.assertEqual(tool_result["tool_use_id"], tool_use["id"])
+        self.assertIn("recommendation: got 'Maybe'", tool_result["content"])
+        self.assertEqual(list(repair["tools"][0]["input_schema"]["properties"]), ["recommendation"])
+        self.assertEqual(repair["max_tokens"], structured_eval.REPAIR_MAX_TOKENS)
+        # The original request is left as it was
+        self.assertEqual(len(PARAMS["messages"]), 1)
+
+    def test_feedback_repair_keeps_output_allowance(self):
+        repair = structured_eval.repair_params(PARAMS, {"score": 80}, {"feedback": "missing"})
+        self.assertEqual(repair["max_tokens"], PARAMS["max_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from prompts import prompts_template
+from services.airtable import FIELDS_TO_FETCH, PROJECT_REPO_FIELD, SYNC_WATCHED_FIELDS, modified_since
+from test_scripts.fake_airtable import FakeAirtableState
+
+CURSOR = "2025-01-01T00:00:00.000Z"
+
+
+class SyncDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.state = FakeAirtableState()
+        self.state.add("rec1", {"First Name": "Ada", PROJECT_REPO_FIELD: "https://github.com/ada/old"},
+                       modified="2024-12-01T00:00:00.000Z")
+
+    def deltas(self):
+        formula = modified_since(CURSOR, SYNC_WATCHED_FIELDS)
+        return [record["id"] for record in self.state.list(formula=formula)["records"]]
+
+    def test_project_repo_edit_is_a_delta(self):
+        self.assertEqual(self.deltas(), [])
+        self.state.update("rec1", {PROJECT_REPO_FIELD: "https://github.com/ada/new"})
+        self.assertEqual(self.deltas(), ["rec1"])
+
+    def test_score_write_back_is_not_a_delta(self):
+        self.state.update("rec1", {"Individual Score": 80, "Evaluation Fingerprint": "abc"})
+        self.assertEqual(self.deltas(), [])
+
+    def test_prompt_reads_a_fetched_and_watched_field(self):
+        applicant = {"First Name": "Ada", PROJECT_REPO_FIELD: "https://github.com/ada/project", "repo_info": {}}
+        prompt = prompts_template.get_applicant_evaluation_prompt(applicant, structured=False)
+        self.assertIn("https://github.com/ada/project", str(prompt))
+        self.assertIn(PROJECT_REPO_FIELD, FIELDS_TO_FETCH)
+        self.assertIn(PROJECT_REPO_FIELD, SYNC_WATCHED_FIELDS)
+
+
+if __name__ == "__main__":
+    unittest.main()